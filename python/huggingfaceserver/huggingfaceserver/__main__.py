@@ -113,6 +113,40 @@ parser.add_argument(
     action="store_true",
     help="Return all probabilities",
 )
+parser.add_argument(
+    "--top_k",
+    type=int,
+    default=5,
+    help="the number of most probable tokens returned for each mask of the fill_mask task with --return_probabilities, "
+    "0 to return the probabilities of the whole vocabulary",
+)
+parser.add_argument(
+    "--disable_length_bucketing",
+    action="store_true",
+    help="run encoder models on the whole padded batch instead of on buckets of inputs of similar lengths",
+)
+parser.add_argument(
+    "--pooling",
+    default="mean",
+    choices=["mean", "cls", "last"],
+    help="the pooling of the token embeddings of the text_embedding task",
+)
+parser.add_argument(
+    "--disable_normalize",
+    action="store_true",
+    help="do not normalize the embeddings of the text_embedding task",
+)
+parser.add_argument(
+    "--disable_continuous_batching",
+    action="store_true",
+    help="generate the completion requests one at a time instead of in a continuously updated batch",
+)
+parser.add_argument(
+    "--max_batch_sequences",
+    type=int,
+    default=16,
+    help="the maximum number of sequences generated at once with continuous batching",
+)
 
 parser = maybe_add_vllm_cli_parser(parser)
 
@@ -209,6 +243,8 @@ def load_model():
                 max_length=kwargs["max_length"],
                 dtype=dtype,
                 trust_remote_code=kwargs["trust_remote_code"],
+                continuous_batching=not kwargs["disable_continuous_batching"],
+                max_batch_sequences=kwargs["max_batch_sequences"],
             )
         else:
             # Convert dtype from string to torch dtype. Default to float32
@@ -220,6 +256,7 @@ def load_model():
                 args.predictor_protocol,
                 args.predictor_use_ssl,
                 args.predictor_request_timeout_seconds,
+                args.predictor_grpc_use_typed_contents,
             )
             logger.info(f"Loading encoder model for task '{task.name}' in {dtype}")
             model = HuggingfaceEncoderModel(
@@ -236,7 +273,12 @@ def load_model():
                 trust_remote_code=kwargs["trust_remote_code"],
                 tensor_input_names=kwargs.get("tensor_input_names", None),
                 return_token_type_ids=kwargs.get("return_token_type_ids", None),
+                return_probabilities=kwargs["return_probabilities"],
                 predictor_config=predictor_config,
+                length_bucketing=not kwargs["disable_length_bucketing"],
+                pooling=kwargs["pooling"],
+                top_k=kwargs["top_k"] or None,
+                normalize=not kwargs["disable_normalize"],
             )
     model.load()
     return model
@@ -0,0 +1,496 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import inspect
+import queue
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import torch
+from kserve.constants.constants import LLM_STATS_KEY
+from kserve.logging import logger
+from transformers import (
+    GenerationConfig,
+    LogitsProcessorList,
+    PreTrainedModel,
+    PreTrainedTokenizerBase,
+)
+from transformers.generation import GenerationMode
+
+_KeyValue = Tuple[torch.Tensor, torch.Tensor]
+
+
+class _SequenceGroup:
+    def __init__(self, req: Dict[str, Any]):
+        """The sequences generated for the prompts of a completion request."""
+        self.req = req
+        self.request = req["request"]
+        self.stream = bool(self.request.params.stream)
+        self.echo = bool(self.request.params.echo)
+        stopping_criteria = req["kwargs"].get("stopping_criteria")
+        # The stop sequence criteria is shared with the request to report the finish reason.
+        self.stop_sequence_criteria = (
+            stopping_criteria[0] if stopping_criteria else None
+        )
+        self.sequences: List[_Sequence] = []
+
+    def put(self, item):
+        self.req["loop"].call_soon_threadsafe(
+            self.req["response_queue"].put_nowait, item
+        )
+
+    @property
+    def finished(self) -> bool:
+        return all(seq.finished for seq in self.sequences)
+
+
+class _Sequence:
+    def __init__(
+        self,
+        group: _SequenceGroup,
+        input_ids: List[int],
+        prompt_ids: List[int],
+        generation_config: GenerationConfig,
+        processors: LogitsProcessorList,
+        eos_token_ids: List[int],
+    ):
+        """A prompt being generated, one token per decode step.
+
+        The logits processors are given the padded prompt followed by the generated tokens, as in generate.
+        """
+        self.group = group
+        self.input_ids = input_ids
+        self.prompt_ids = prompt_ids
+        self.token_ids: List[int] = []
+        self.finished = False
+        self.max_new_tokens = generation_config.max_new_tokens
+        self.do_sample = bool(generation_config.do_sample)
+        self.seed = group.request.params.seed
+        self._generator: Optional[torch.Generator] = None
+        if generation_config.eos_token_id is not None:
+            eos_token_ids = generation_config.eos_token_id
+            if not isinstance(eos_token_ids, list):
+                eos_token_ids = [eos_token_ids]
+        self.eos_token_ids = set(eos_token_ids)
+        self.stop_sequences: List[List[int]] = []
+        if group.stop_sequence_criteria is not None:
+            self.stop_sequences = [
+                seq.tolist() for seq in group.stop_sequence_criteria.stop_sequences
+            ]
+        self.processors = processors
+        # The offsets of the tokens already streamed, see read_text.
+        self._prefix_offset = 0
+        self._read_offset = 0
+
+    @property
+    def output_ids(self) -> List[int]:
+        return self.prompt_ids + self.token_ids if self.group.echo else self.token_ids
+
+    def next_token(self, scores: torch.Tensor) -> int:
+        if self.processors:
+            input_ids = torch.tensor(
+                [self.input_ids + self.token_ids], device=scores.device
+            )
+            scores = self.processors(input_ids, scores)
+        if not self.do_sample:
+            return int(scores.argmax(dim=-1))
+        if self._generator is None and self.seed is not None:
+            self._generator = torch.Generator(device=scores.device)
+            self._generator.manual_seed(self.seed)
+        probs = torch.softmax(scores, dim=-1)
+        return int(torch.multinomial(probs, num_samples=1, generator=self._generator))
+
+    def append(self, token_id: int):
+        self.token_ids.append(token_id)
+        if token_id in self.eos_token_ids or len(self.token_ids) >= self.max_new_tokens:
+            self.finished = True
+        for stop_sequence in self.stop_sequences:
+            if self.token_ids[-len(stop_sequence) :] == stop_sequence:
+                self.group.stop_sequence_criteria.triggered = True
+                self.finished = True
+
+    def read_text(self, tokenizer: PreTrainedTokenizerBase) -> str:
+        """Get the text of the tokens generated since the last call.
+
+        The tokens are decoded along with the tokens before them, so that the spaces between tokens are kept,
+        and the text is held back while it ends with an incomplete character.
+        """
+        output_ids = self.output_ids
+        prefix = tokenizer.decode(
+            output_ids[self._prefix_offset : self._read_offset],
+            skip_special_tokens=True,
+        )
+        text = tokenizer.decode(
+            output_ids[self._prefix_offset :], skip_special_tokens=True
+        )
+        if len(text) > len(prefix) and (self.finished or not text.endswith("\ufffd")):
+            self._prefix_offset = self._read_offset
+            self._read_offset = len(output_ids)
+            return text[len(prefix) :]
+        return ""
+
+
+class _UnsupportedCacheError(Exception):
+    pass
+
+
+class ContinuousBatchingScheduler:
+    """Iteration level scheduler of the completion requests of a decoder-only model.
+
+    Instead of generating the requests one at a time, the scheduler runs one decode step at a time for all
+    the running sequences. The prompts of the new requests are prefilled and join the running batch
+    between two decode steps, and the finished sequences leave it, so that a long completion doesn't delay
+    the requests arriving after it.
+
+    The key value cache of the running sequences is kept as a single left padded batch. The cache of a
+    prefilled prompt is padded to the length of the batch when it joins it, the rows of the finished
+    sequences are removed and the padding columns no longer used by any sequence are trimmed.
+    """
+
+    def __init__(
+        self,
+        model: PreTrainedModel,
+        tokenizer: PreTrainedTokenizerBase,
+        max_batch_sequences: int = 16,
+    ):
+        """
+        Args:
+            model: The decoder-only model.
+            tokenizer: The tokenizer of the model.
+            max_batch_sequences: The maximum number of sequences generated at once. The requests arriving
+                when the batch is full wait for running sequences to finish.
+        """
+        self._model = model
+        self._tokenizer = tokenizer
+        self.max_batch_sequences = max_batch_sequences
+        self._accepts_position_ids = (
+            "position_ids" in inspect.signature(model.forward).parameters
+        )
+        # Bloom caches the keys as [batch * heads, head_dim, length] and the values as
+        # [batch * heads, length, head_dim], which are converted to [batch, heads, ...] tensors.
+        self._bloom_cache = hasattr(model, "_convert_to_bloom_cache")
+        self._key_length_dim = 3 if self._bloom_cache else 2
+        eos_token_id = (
+            model.generation_config.eos_token_id
+            if model.generation_config is not None
+            else None
+        )
+        if eos_token_id is None:
+            eos_token_id = tokenizer.eos_token_id
+        if not isinstance(eos_token_id, list):
+            eos_token_id = [eos_token_id]
+        self._eos_token_ids = [i for i in eos_token_id if i is not None]
+        # Set to False when the cache of the model can't be batched, the requests are then generated one
+        # at a time by the fallback handler.
+        self.supported = True
+        self._waiting: Deque[Dict[str, Any]] = deque()
+        self._sequences: List[_Sequence] = []
+        self._cache: Optional[List[_KeyValue]] = None
+        self._attention_mask: Optional[torch.Tensor] = None
+
+    @torch.no_grad()
+    def run(
+        self,
+        request_queue: queue.Queue,
+        handle_request: Callable[[Dict[str, Any]], None],
+    ):
+        """Generate the requests of the queue until a None request is received.
+
+        Args:
+            request_queue: The queue of generate requests.
+            handle_request: Generates a single request, for the models whose cache can't be batched.
+        """
+        stopping = False
+        while True:
+            if not stopping:
+                stopping = self._receive(request_queue)
+            if stopping and not self._waiting and not self._sequences:
+                return
+            while self._waiting and (
+                not self._sequences
+                or len(self._sequences) + self._num_prompts(self._waiting[0])
+                <= self.max_batch_sequences
+            ):
+                req = self._waiting.popleft()
+                if not self.supported or not self._supports_generation_config(
+                    req["kwargs"]["generation_config"]
+                ):
+                    handle_request(req)
+                    continue
+                try:
+                    self._prefill(req)
+                except _UnsupportedCacheError as e:
+                    logger.warning(
+                        f"Continuous batching is not supported by this model: {e}. "
+                        f"Generating one request at a time."
+                    )
+                    self.supported = False
+                    handle_request(req)
+                except Exception as e:
+                    logger.error(f"Failed to prefill the prompts: {e}", exc_info=True)
+                    _SequenceGroup(req).put(e)
+            self._drop_finished()
+            if self._sequences:
+                try:
+                    self._decode()
+                except Exception as e:
+                    logger.error(f"Failed to run a decode step: {e}", exc_info=True)
+                    self._fail_running(e)
+                self._drop_finished()
+
+    def _receive(self, request_queue: queue.Queue) -> bool:
+        # Block for new requests only when there is nothing to generate.
+        block = not self._sequences and not self._waiting
+        while True:
+            try:
+                req = request_queue.get(block=block)
+            except queue.Empty:
+                return False
+            if req is None:
+                return True
+            self._waiting.append(req)
+            block = False
+
+    @staticmethod
+    def _supports_generation_config(generation_config: GenerationConfig) -> bool:
+        # Only the search modes picking one token per sequence and step can be run by the scheduler, the
+        # other modes (e.g. beam search) are generated one request at a time.
+        return generation_config.get_generation_mode() in (
+            GenerationMode.GREEDY_SEARCH,
+            GenerationMode.SAMPLE,
+        )
+
+    @staticmethod
+    def _num_prompts(req: Dict[str, Any]) -> int:
+        return req["kwargs"]["input_ids"].shape[0]
+
+    def _forward(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: torch.Tensor,
+        cache: Optional[List[_KeyValue]],
+    ) -> Tuple[torch.Tensor, List[_KeyValue]]:
+        kwargs = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "use_cache": True,
+        }
+        if self._accepts_position_ids:
+            # The positions of left padded sequences, as computed by generate.
+            position_ids = attention_mask.long().cumsum(-1) - 1
+            position_ids.masked_fill_(attention_mask == 0, 1)
+            kwargs["position_ids"] = position_ids[:, -input_ids.shape[-1] :]
+        if cache is not None:
+            kwargs["past_key_values"] = self._to_model_cache(cache)
+        outputs = self._model(**kwargs)
+        return outputs.logits[:, -1, :].float(), self._from_model_cache(
+            outputs.past_key_values, input_ids.shape[0]
+        )
+
+    def _to_model_cache(self, cache: List[_KeyValue]):
+        if self._bloom_cache:
+            return self._model._convert_to_bloom_cache(
+                tuple((key.contiguous(), value.contiguous()) for key, value in cache)
+            )
+        return tuple(cache)
+
+    def _from_model_cache(self, past_key_values, batch_size: int) -> List[_KeyValue]:
+        if hasattr(past_key_values, "to_legacy_cache"):
+            past_key_values = past_key_values.to_legacy_cache()
+        if self._bloom_cache:
+            past_key_values = self._model._convert_to_standard_cache(
+                past_key_values, batch_size
+            )
+        return [tuple(layer) for layer in past_key_values]
+
+    def _check_cache(self, cache: List[_KeyValue], batch_size: int, length: int):
+        for layer in cache:
+            if len(layer) != 2 or not all(torch.is_tensor(t) for t in layer):
+                raise _UnsupportedCacheError("the cache is not a key and a value")
+            key, value = layer
+            if (
+                key.dim() != 4
+                or value.dim() != 4
+                or key.shape[0] != batch_size
+                or value.shape[0] != batch_size
+                or key.shape[self._key_length_dim] != length
+                or value.shape[2] != length
+            ):
+                raise _UnsupportedCacheError(
+                    f"unexpected cache shapes {tuple(key.shape)} and {tuple(value.shape)}"
+                )
+
+    def _prefill(self, req: Dict[str, Any]):
+        group = _SequenceGroup(req)
+        kwargs = req["kwargs"]
+        input_ids = kwargs["input_ids"]
+        attention_mask = kwargs.get("attention_mask")
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        generation_config = kwargs["generation_config"]
+        processors = self._get_logits_processors(generation_config, input_ids)
+        logits, cache = self._forward(input_ids, attention_mask, None)
+        self._check_cache(cache, input_ids.shape[0], input_ids.shape[-1])
+        for ids, mask in zip(input_ids, attention_mask):
+            group.sequences.append(
+                _Sequence(
+                    group,
+                    ids.tolist(),
+                    ids[mask.bool()].tolist(),
+                    generation_config,
+                    processors,
+                    self._eos_token_ids,
+                )
+            )
+        self._merge(group.sequences, cache, attention_mask)
+        self._sample(group.sequences, logits)
+
+    def _get_logits_processors(
+        self, generation_config: GenerationConfig, input_ids: torch.Tensor
+    ) -> LogitsProcessorList:
+        """Build the logits processors and warpers generate would use for the prompts."""
+        input_length = input_ids.shape[-1]
+        generation_config = copy.deepcopy(generation_config)
+        if generation_config.max_new_tokens is not None:
+            generation_config.max_length = (
+                generation_config.max_new_tokens + input_length
+            )
+        processors = self._model._get_logits_processor(
+            generation_config=generation_config,
+            input_ids_seq_length=input_length,
+            encoder_input_ids=input_ids,
+            prefix_allowed_tokens_fn=None,
+            logits_processor=LogitsProcessorList(),
+        )
+        if generation_config.do_sample:
+            processors.extend(self._model._get_logits_warper(generation_config))
+        return processors
+
+    def _merge(
+        self,
+        sequences: List[_Sequence],
+        cache: List[_KeyValue],
+        attention_mask: torch.Tensor,
+    ):
+        if self._cache is None:
+            self._sequences, self._cache, self._attention_mask = (
+                list(sequences),
+                cache,
+                attention_mask,
+            )
+            return
+        length = max(self._attention_mask.shape[-1], attention_mask.shape[-1])
+        self._cache = [
+            (
+                torch.cat(
+                    [
+                        _left_pad(key, self._key_length_dim, length),
+                        _left_pad(new_key, self._key_length_dim, length),
+                    ]
+                ),
+                torch.cat(
+                    [_left_pad(value, 2, length), _left_pad(new_value, 2, length)]
+                ),
+            )
+            for (key, value), (new_key, new_value) in zip(self._cache, cache)
+        ]
+        self._attention_mask = torch.cat(
+            [
+                _left_pad(self._attention_mask, 1, length),
+                _left_pad(attention_mask, 1, length),
+            ]
+        )
+        self._sequences.extend(sequences)
+
+    def _decode(self):
+        input_ids = torch.tensor(
+            [[seq.token_ids[-1]] for seq in self._sequences],
+            device=self._attention_mask.device,
+        )
+        attention_mask = torch.cat(
+            [self._attention_mask, self._attention_mask.new_ones((len(input_ids), 1))],
+            dim=-1,
+        )
+        logits, self._cache = self._forward(input_ids, attention_mask, self._cache)
+        self._attention_mask = attention_mask
+        self._sample(self._sequences, logits)
+
+    def _sample(self, sequences: List[_Sequence], logits: torch.Tensor):
+        for seq, scores in zip(sequences, logits):
+            seq.append(seq.next_token(scores[None]))
+            if seq.group.stream:
+                text = seq.read_text(self._tokenizer)
+                if text:
+                    seq.group.put(text)
+        for group in {id(seq.group): seq.group for seq in sequences}.values():
+            if group.finished:
+                self._complete(group)
+
+    def _complete(self, group: _SequenceGroup):
+        stats = group.request.context.get(LLM_STATS_KEY)
+        if stats is not None:
+            stats.num_generation_tokens = sum(
+                len(seq.token_ids) for seq in group.sequences
+            )
+        if group.stream:
+            group.put(None)
+        else:
+            group.put(
+                self._tokenizer.batch_decode(
+                    [seq.output_ids for seq in group.sequences],
+                    skip_special_tokens=True,
+                )
+            )
+
+    def _drop_finished(self):
+        keep = [i for i, seq in enumerate(self._sequences) if not seq.finished]
+        if len(keep) == len(self._sequences):
+            return
+        self._sequences = [self._sequences[i] for i in keep]
+        if not keep:
+            self._cache, self._attention_mask = None, None
+            return
+        index = torch.tensor(keep, device=self._attention_mask.device)
+        attention_mask = self._attention_mask.index_select(0, index)
+        # The padding columns only needed by the finished sequences are removed.
+        start = int(attention_mask.any(dim=0).nonzero()[0])
+        self._attention_mask = attention_mask[:, start:]
+        self._cache = [
+            (
+                _trim(key.index_select(0, index), self._key_length_dim, start),
+                _trim(value.index_select(0, index), 2, start),
+            )
+            for key, value in self._cache
+        ]
+
+    def _fail_running(self, error: Exception):
+        for group in {id(seq.group): seq.group for seq in self._sequences}.values():
+            group.put(error)
+        self._sequences, self._cache, self._attention_mask = [], None, None
+
+
+def _left_pad(tensor: torch.Tensor, dim: int, length: int) -> torch.Tensor:
+    missing = length - tensor.shape[dim]
+    if missing == 0:
+        return tensor
+    shape = list(tensor.shape)
+    shape[dim] = missing
+    return torch.cat([tensor.new_zeros(shape), tensor], dim=dim)
+
+
+def _trim(tensor: torch.Tensor, dim: int, start: int) -> torch.Tensor:
+    if start == 0:
+        return tensor
+    return tensor.narrow(dim, start, tensor.shape[dim] - start)
@@ -13,15 +13,25 @@
 # limitations under the License.
 
 import pathlib
-from typing import Any, Dict, Optional, Union
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import torch
+import torch.nn.functional as F
 from accelerate import init_empty_weights
 from kserve import Model
+from kserve.batcher import DynamicBatcher
 from kserve.errors import InferenceError
 from kserve.logging import logger
 from kserve.model import PredictorConfig
 from kserve.protocol.infer_type import InferInput, InferRequest, InferResponse
+from kserve.protocol.rest.openai import (
+    EmbeddingRequest,
+    OpenAIEncoderModel,
+    create_embedding_response,
+)
+from kserve.protocol.rest.openai.errors import OpenAIError, create_error_response
 from kserve.utils.utils import (
     from_np_dtype,
     get_predict_input,
@@ -47,8 +57,14 @@ from .task import (
 )
 from .utils import _get_and_verify_max_len
 
+POOLING_METHODS = ("mean", "cls", "last")
+# The number of tokens returned for each mask by default, as the fill-mask pipeline of transformers.
+DEFAULT_TOP_K = 5
+
 
-class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
+class HuggingfaceEncoderModel(
+    Model, OpenAIEncoderModel
+):  # pylint:disable=c-extension-no-member
     task: MLTask
     model_config: PretrainedConfig
     model_id_or_path: Union[pathlib.Path, str]
@@ -60,10 +76,15 @@ class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
     model_revision: Optional[str]
     tokenizer_revision: Optional[str]
     trust_remote_code: bool
+    pooling: str
+    normalize: bool
+    top_k: Optional[int]
     ready: bool = False
     _tokenizer: PreTrainedTokenizerBase
     _model: Optional[PreTrainedModel] = None
+    _embedding_batcher: Optional[DynamicBatcher] = None
     _device: torch.device
+    _id_to_token: List[str]
 
     def __init__(
         self,
@@ -82,6 +103,10 @@ class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
         trust_remote_code: bool = False,
         return_probabilities: bool = False,
         predictor_config: Optional[PredictorConfig] = None,
+        length_bucketing: bool = True,
+        pooling: str = "mean",
+        normalize: bool = True,
+        top_k: Optional[int] = DEFAULT_TOP_K,
     ):
         super().__init__(model_name, predictor_config)
         self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -96,6 +121,18 @@ class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
         self.tokenizer_revision = tokenizer_revision
         self.trust_remote_code = trust_remote_code
         self.return_probabilities = return_probabilities
+        # The rows of a batch are run in buckets of similar lengths, see _forward.
+        self.length_bucketing = length_bucketing
+        if pooling not in POOLING_METHODS:
+            raise ValueError(
+                f"Unsupported pooling {pooling}. Supported pooling methods are: {', '.join(POOLING_METHODS)}"
+            )
+        # The token embeddings of the text_embedding task are pooled with `pooling`, see _embed.
+        self.pooling = pooling
+        self.normalize = normalize
+        # The number of tokens returned for each mask of the fill_mask task with return_probabilities,
+        # None for the probabilities of the whole vocabulary.
+        self.top_k = top_k
 
         if model_config:
             self.model_config = model_config
@@ -179,6 +216,12 @@ class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
             logger.info(
                 f"Successfully loaded huggingface model from path {model_id_or_path}"
             )
+        if self.task == MLTask.fill_mask and self.return_probabilities:
+            # Decoding the tokens of the whole vocabulary at each request is slow, they are decoded once.
+            vocab_size = max(self.model_config.vocab_size, len(self._tokenizer))
+            self._id_to_token = self._tokenizer.batch_decode(
+                [[token_id] for token_id in range(len(self._tokenizer))]
+            ) + [""] * (vocab_size - len(self._tokenizer))
         self.ready = True
         return self.ready
 
@@ -187,20 +230,17 @@ class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
         payload: Union[Dict, InferRequest],
         context: Dict[str, Any],
     ) -> Union[BatchEncoding, InferRequest]:
-        instances = get_predict_input(payload)
+        context["payload"] = payload
+        return self._preprocess_instances(get_predict_input(payload), context)
+
+    def _preprocess_instances(
+        self, instances: List, context: Dict[str, Any]
+    ) -> Union[BatchEncoding, InferRequest]:
         # Serialize to tensor
         if self.predictor_host:
-            inputs = self._tokenizer(
-                instances,
-                max_length=self.max_length,
-                add_special_tokens=self.add_special_tokens,
-                return_tensors=TensorType.NUMPY,
-                return_token_type_ids=self.return_token_type_ids,
-                padding=True,
-                truncation=True,
-            )
-            context["payload"] = payload
+            inputs = self._encode(instances, TensorType.NUMPY)
             context["input_ids"] = inputs["input_ids"]
+            context["attention_mask"] = inputs.get("attention_mask")
             infer_inputs = []
             for key, input_tensor in inputs.items():
                 if (not self.tensor_input_names) or (key in self.tensor_input_names):
@@ -216,19 +256,44 @@ class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
             )
             return infer_request
         else:
-            inputs = self._tokenizer(
-                instances,
-                max_length=self.max_length,
-                add_special_tokens=self.add_special_tokens,
-                return_tensors=TensorType.PYTORCH,
-                return_token_type_ids=self.return_token_type_ids,
-                padding=True,
-                truncation=True,
-            )
-            context["payload"] = payload
+            inputs = self._encode(instances, TensorType.PYTORCH)
             context["input_ids"] = inputs["input_ids"]
+            context["attention_mask"] = inputs.get("attention_mask")
             return inputs
 
+    def _encode(self, instances: List, return_tensors: TensorType) -> BatchEncoding:
+        if not all(isinstance(instance, str) for instance in instances):
+            # The inputs are already tokenized, e.g. the token arrays of the embeddings API. A dynamic
+            # batch can mix them with texts, which are tokenized without padding first.
+            texts = [instance for instance in instances if isinstance(instance, str)]
+            encoded = iter(
+                self._tokenizer(
+                    texts,
+                    max_length=self.max_length,
+                    add_special_tokens=self.add_special_tokens,
+                    truncation=True,
+                )["input_ids"]
+                if texts
+                else []
+            )
+            input_ids = [
+                next(encoded) if isinstance(instance, str) else instance
+                for instance in instances
+            ]
+            return self._tokenizer.pad(
+                {"input_ids": [ids[: self.max_length] for ids in input_ids]},
+                return_tensors=return_tensors,
+            )
+        return self._tokenizer(
+            instances,
+            max_length=self.max_length,
+            add_special_tokens=self.add_special_tokens,
+            return_tensors=return_tensors,
+            return_token_type_ids=self.return_token_type_ids,
+            padding=True,
+            truncation=True,
+        )
+
     async def predict(
         self,
         input_batch: Union[BatchEncoding, InferRequest],
@@ -239,13 +304,158 @@ class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
             # like NVIDIA triton inference server
             return await super().predict(input_batch, context)
         else:
-            input_batch = input_batch.to(self._device)
-            try:
-                with torch.no_grad():
-                    outputs = self._model(**input_batch).logits
-                    return outputs
-            except Exception as e:
-                raise InferenceError(str(e))
+            # The forward pass runs off the event loop, according to the execution policy.
+            return await self._run_handler("_predict_locally", input_batch)
+
+    def _predict_locally(self, input_batch: BatchEncoding) -> Tensor:
+        input_batch = input_batch.to(self._device)
+        try:
+            with torch.no_grad():
+                return self._forward(input_batch)
+        except Exception as e:
+            raise InferenceError(str(e))
+
+    def _forward(self, input_batch: BatchEncoding) -> Tensor:
+        """
+        Run the model on the rows of the batch grouped by length, so that the short rows are not padded to
+        the length of the longest one. The batch holds the instances of all the requests coalesced by
+        dynamic batching. The logits of the buckets are scattered back to the rows of the batch, with zero
+        logits at the padding positions of the token level tasks.
+        """
+        attention_mask = input_batch.get("attention_mask")
+        if not self.length_bucketing or attention_mask is None:
+            return self._run_model(input_batch)
+        batch_size, length = input_batch["input_ids"].shape
+        buckets = _get_length_buckets(attention_mask.sum(dim=-1).tolist())
+        if len(buckets) == 1 and buckets[0][1] == length:
+            return self._run_model(input_batch)
+        left_padded = self._tokenizer.padding_side == "left"
+        logits = None
+        for rows, bucket_length in buckets:
+            index = torch.tensor(rows, device=input_batch["input_ids"].device)
+            bucket_batch = {}
+            for name, tensor in input_batch.items():
+                tensor = tensor.index_select(0, index)
+                if tensor.dim() > 1 and tensor.shape[1] == length:
+                    tensor = _trim_padding(tensor, bucket_length, left_padded)
+                bucket_batch[name] = tensor
+            bucket_logits = self._run_model(bucket_batch)
+            token_level = bucket_logits.dim() > 2
+            if logits is None:
+                shape = [batch_size, *bucket_logits.shape[1:]]
+                if token_level:
+                    shape[1] = length
+                logits = bucket_logits.new_zeros(shape)
+            if not token_level:
+                logits[index] = bucket_logits
+            elif left_padded:
+                logits[index, length - bucket_length :] = bucket_logits
+            else:
+                logits[index, :bucket_length] = bucket_logits
+        return logits
+
+    def _run_model(self, input_batch: Dict[str, Tensor]) -> Tensor:
+        outputs = self._model(**input_batch)
+        if self.task == MLTask.text_embedding:
+            return outputs.last_hidden_state
+        return outputs.logits
+
+    def _embed(self, token_embeddings: Tensor, attention_mask: Tensor) -> Tensor:
+        """
+        Pool the token embeddings of each row into one embedding.
+        """
+        attention_mask = attention_mask.to(token_embeddings.device)
+        embeddings = _pool(token_embeddings.float(), attention_mask, self.pooling)
+        if self.normalize:
+            embeddings = F.normalize(embeddings, p=2, dim=-1)
+        return embeddings
+
+    async def create_embedding(self, request: EmbeddingRequest) -> Dict[str, Any]:
+        if self.task != MLTask.text_embedding:
+            raise OpenAIError(
+                create_error_response(
+                    f"Model {self.name} does not support embeddings, its task is {self.task.name}"
+                )
+            )
+        params = request.params
+        instances = params.input
+        if isinstance(instances, str) or (
+            len(instances) > 0 and isinstance(instances[0], int)
+        ):
+            instances = [instances]
+        if len(instances) == 0:
+            raise OpenAIError(create_error_response("The input must not be empty"))
+        hidden_size = self.model_config.hidden_size
+        if params.dimensions is not None and params.dimensions > hidden_size:
+            raise OpenAIError(
+                create_error_response(
+                    f"The dimensions must not be greater than {hidden_size}",
+                    param="dimensions",
+                )
+            )
+        # The texts and token lists are tokenized and padded by the model, the embeddings of the queued
+        # requests are computed in one batch and stay numpy arrays up to the response.
+        payload = {"instances": instances}
+        if self.max_batch_size is not None and self.max_batch_size > 1:
+            response = await self._get_embedding_batcher().submit(payload)
+        else:
+            response = await self._embed_instances(payload)
+        rows, num_tokens = zip(*response["predictions"])
+        embeddings = np.stack(rows)
+        if params.dimensions is not None:
+            embeddings = embeddings[:, : params.dimensions]
+        if self.normalize:
+            norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return create_embedding_response(
+            self.name, embeddings, sum(num_tokens), params.encoding_format
+        )
+
+    def _get_embedding_batcher(self) -> DynamicBatcher:
+        if self._embedding_batcher is None:
+            self._embedding_batcher = DynamicBatcher(
+                self.name,
+                lambda payload, headers: self._embed_instances(payload),
+                max_batch_size=self.max_batch_size,
+                max_latency_ms=self.max_latency_ms,
+            )
+        return self._embedding_batcher
+
+    async def _embed_instances(self, payload: Dict) -> Dict:
+        """
+        Embed a batch of texts or token lists. The predictions are the pooled embedding of each instance,
+        before it is truncated and normalized for its request, with its number of tokens.
+        """
+        instances = payload["instances"]
+        if self.predictor_host:
+            context = {}
+            infer_request = self._preprocess_instances(instances, context)
+            token_embeddings = _to_tensor(await self.predict(infer_request, context))
+            attention_mask = torch.as_tensor(context["attention_mask"])
+            pooled = _pool(
+                token_embeddings.float(),
+                attention_mask.to(token_embeddings.device),
+                self.pooling,
+            )
+        else:
+            # The tokenization and the forward pass run off the event loop, according to the execution
+            # policy.
+            pooled, attention_mask = await self._run_handler("_pool_locally", instances)
+        num_tokens = attention_mask.sum(dim=-1).tolist()
+        return {"predictions": list(zip(pooled.cpu().numpy(), num_tokens))}
+
+    def _pool_locally(self, instances: List) -> Tuple[Tensor, Tensor]:
+        inputs = self._encode(instances, TensorType.PYTORCH)
+        attention_mask = inputs.get("attention_mask")
+        if attention_mask is None:
+            attention_mask = torch.ones_like(inputs["input_ids"])
+        token_embeddings = self._predict_locally(inputs)
+        pooled = _pool(
+            token_embeddings.float(),
+            attention_mask.to(token_embeddings.device),
+            self.pooling,
+        )
+        return pooled, attention_mask
 
     def postprocess(
         self, outputs: Union[Tensor, InferResponse], context: Dict[str, Any]
@@ -253,53 +463,112 @@ class HuggingfaceEncoderModel(Model):  # pylint:disable=c-extension-no-member
         input_ids = context["input_ids"]
         request = context["payload"]
         if isinstance(outputs, InferResponse):
-            shape = torch.Size(outputs.outputs[0].shape)
-            data = torch.Tensor(outputs.outputs[0].data)
-            outputs = data.view(shape)
-            input_ids = torch.Tensor(input_ids)
-        inferences = []
-        if self.task == MLTask.sequence_classification:
-            num_rows, num_cols = outputs.shape
-            for i in range(num_rows):
-                out = outputs[i].unsqueeze(0)
-                if self.return_probabilities:
-                    inferences.append(dict(enumerate(out.numpy().flatten())))
-                else:
-                    predicted_idx = out.argmax().item()
-                    inferences.append(predicted_idx)
+            outputs = _to_tensor(outputs)
+        if self.task == MLTask.text_embedding:
+            attention_mask = torch.as_tensor(context["attention_mask"])
+            embeddings = self._embed(outputs, attention_mask)
+            return get_predict_response(request, embeddings.cpu().numpy(), self.name)
+        elif self.task == MLTask.sequence_classification:
+            if self.return_probabilities:
+                inferences = [dict(enumerate(row)) for row in outputs.tolist()]
+            else:
+                inferences = outputs.argmax(dim=-1).tolist()
             return get_predict_response(request, inferences, self.name)
         elif self.task == MLTask.fill_mask:
-            num_rows = outputs.shape[0]
-            for i in range(num_rows):
-                mask_pos = (input_ids == self._tokenizer.mask_token_id)[i]
-                mask_token_index = mask_pos.nonzero(as_tuple=True)[0]
-                if self.return_probabilities:
-                    probabilities = torch.softmax(outputs[i, mask_token_index], dim=-1)
-                    decoded_probabilities = []
-                    for idx, probs in enumerate(probabilities):
-                        token_probs = []
-                        for token_id, prob in enumerate(probs):
-                            token = self._tokenizer.decode([token_id])
-                            token_probs.append({f"{token}": f"{prob.item():.4f}"})
-                        decoded_probabilities.append(token_probs)
-                    inferences.append(decoded_probabilities)
-                else:
-                    predicted_token_id = outputs[i, mask_token_index].argmax(axis=-1)
-                    inferences.append(self._tokenizer.decode(predicted_token_id))
+            mask = torch.as_tensor(input_ids, device=outputs.device) == (
+                self._tokenizer.mask_token_id
+            )
+            if self.return_probabilities:
+                inferences = self._mask_probabilities(outputs, mask)
+            else:
+                predicted_token_ids = outputs.argmax(dim=-1)
+                inferences = [
+                    self._tokenizer.decode(predicted_token_ids[i][mask[i]].tolist())
+                    for i in range(outputs.shape[0])
+                ]
             return get_predict_response(request, inferences, self.name)
         elif self.task == MLTask.token_classification:
-            num_rows = outputs.shape[0]
-            for i in range(num_rows):
-                output = outputs[i].unsqueeze(0)
-                if self.return_probabilities:
-                    for values in output.tolist():
-                        res = [{k: v for k, v in enumerate(value)} for value in values]
-                        inferences.append([res])
-                else:
-                    predictions = torch.argmax(output, dim=2)
-                    inferences.append(predictions.tolist())
+            if self.return_probabilities:
+                inferences = [
+                    [[dict(enumerate(token)) for token in row]]
+                    for row in outputs.tolist()
+                ]
+            else:
+                inferences = [[row] for row in outputs.argmax(dim=-1).tolist()]
             return get_predict_response(request, inferences, self.name)
         else:
             raise ValueError(
                 f"Unsupported task {self.task}. Please check the supported `task` option."
             )
+
+    def _mask_probabilities(self, outputs: Tensor, mask: Tensor) -> List:
+        """
+        Returns the probabilities of the tokens for each mask of each row, as a list of {token: probability}.
+        The probabilities of all the masks of the batch are computed at once. Only the `top_k` most probable
+        tokens are returned, in descending order of probability, unless `top_k` is None.
+        """
+        rows, positions = mask.nonzero(as_tuple=True)
+        probabilities = torch.softmax(outputs[rows, positions].float(), dim=-1)
+        if self.top_k is not None:
+            values, token_ids = probabilities.topk(
+                min(self.top_k, probabilities.shape[-1]), dim=-1
+            )
+            token_ids = token_ids.tolist()
+        else:
+            values = probabilities
+            token_ids = [range(probabilities.shape[-1])] * probabilities.shape[0]
+        inferences = [[] for _ in range(outputs.shape[0])]
+        for row, mask_ids, mask_values in zip(
+            rows.tolist(), token_ids, values.tolist()
+        ):
+            inferences[row].append(
+                [
+                    {self._id_to_token[token_id]: f"{value:.4f}"}
+                    for token_id, value in zip(mask_ids, mask_values)
+                ]
+            )
+        return inferences
+
+
+def _get_length_buckets(lengths: List[int]) -> List[Tuple[List[int], int]]:
+    """
+    Group the rows of a batch by the power of two above their length. Returns the rows and the
+    length of the longest row of each bucket.
+    """
+    buckets: Dict[int, List[int]] = defaultdict(list)
+    for row, row_length in enumerate(lengths):
+        buckets[max(16, 1 << (max(row_length, 1) - 1).bit_length())].append(row)
+    return [
+        (rows, max(lengths[row] for row in rows)) for _, rows in sorted(buckets.items())
+    ]
+
+
+def _trim_padding(tensor: Tensor, length: int, left_padded: bool) -> Tensor:
+    return tensor[:, -length:] if left_padded else tensor[:, :length]
+
+
+def _to_tensor(outputs: Union[Tensor, InferResponse]) -> Tensor:
+    if isinstance(outputs, InferResponse):
+        shape = torch.Size(outputs.outputs[0].shape)
+        data = torch.Tensor(outputs.outputs[0].data)
+        return data.view(shape)
+    return outputs
+
+
+def _pool(token_embeddings: Tensor, attention_mask: Tensor, pooling: str) -> Tensor:
+    """
+    Pool the token embeddings of a batch which can be either left or right padded. The CLS token is the
+    first token of a row and the last token is the last one which is not padding.
+    """
+    attention_mask = attention_mask.long()
+    if pooling == "mean":
+        mask = attention_mask.unsqueeze(-1).to(token_embeddings.dtype)
+        summed = (token_embeddings * mask).sum(dim=1)
+        return summed / mask.sum(dim=1).clamp(min=1)
+    rows = torch.arange(token_embeddings.shape[0], device=token_embeddings.device)
+    if pooling == "cls":
+        positions = attention_mask.argmax(dim=1)
+    else:
+        length = attention_mask.shape[1]
+        positions = length - 1 - attention_mask.flip(dims=[1]).argmax(dim=1)
+    return token_embeddings[rows, positions]
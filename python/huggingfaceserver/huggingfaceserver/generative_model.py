@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import asyncio
+import copy
 import pathlib
 import queue
 import time
@@ -22,6 +23,7 @@ from typing import (
     AsyncIterator,
     Dict,
     Iterable,
+    List,
     Optional,
     TypedDict,
     Union,
@@ -60,7 +62,11 @@ from transformers import (
 )
 from kserve.metrics import LLMStats
 
-from .stop_sequence_stopping_criteria import StopSequenceStoppingCriteria
+from .continuous_batching import ContinuousBatchingScheduler
+from .stop_sequence_stopping_criteria import (
+    BatchStoppingCriteria,
+    StopSequenceStoppingCriteria,
+)
 from .task import (
     MLTask,
     is_generative_task,
@@ -99,6 +105,8 @@ class CompletionStreamer:
         text = await self.generate_queue.get()
         if text is None:
             raise StopAsyncIteration()
+        if isinstance(text, Exception):
+            raise text
         if (
             self.stop_sequence_stopping_criteria
             and self.stop_sequence_stopping_criteria.triggered
@@ -138,6 +146,7 @@ class HuggingfaceGenerativeModel(
     _model: PreTrainedModel
     _device: torch.device
     _request_queue: queue.Queue[Optional[_GenerateRequest]]
+    _scheduler: Optional[ContinuousBatchingScheduler] = None
 
     def __init__(
         self,
@@ -152,6 +161,8 @@ class HuggingfaceGenerativeModel(
         tokenizer_revision: Optional[str] = None,
         trust_remote_code: bool = False,
         system_fingerprint: Optional[str] = None,
+        continuous_batching: bool = True,
+        max_batch_sequences: int = 16,
     ):
         super().__init__(name)
         self.model_config = model_config
@@ -163,6 +174,9 @@ class HuggingfaceGenerativeModel(
         self.dtype = dtype
         self.system_fingerprint = system_fingerprint
         self.trust_remote_code = trust_remote_code
+        # Decoder-only models generate the concurrent requests in a single batch, see ContinuousBatchingScheduler.
+        self.continuous_batching = continuous_batching
+        self.max_batch_sequences = max_batch_sequences
         self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self._request_queue = queue.Queue()
 
@@ -244,6 +258,14 @@ class HuggingfaceGenerativeModel(
         logger.info(
             f"Successfully loaded huggingface model from path {model_id_or_path}"
         )
+        if (
+            self.continuous_batching
+            and not self.is_encoder_decoder
+            and not self.model_config.is_encoder_decoder
+        ):
+            self._scheduler = ContinuousBatchingScheduler(
+                self._model, self._tokenizer, self.max_batch_sequences
+            )
         Thread(target=self._process_requests).start()
         self.ready = True
         return self.ready
@@ -320,6 +342,9 @@ class HuggingfaceGenerativeModel(
         Process requests from the request queue in a background thread.
         This ensures we don't block the event loop while running generation.
         """
+        if self._scheduler is not None:
+            self._scheduler.run(self._request_queue, self._handle_request_safely)
+            return
         while True:
             req = self._request_queue.get()
 
@@ -327,7 +352,152 @@ class HuggingfaceGenerativeModel(
             if not req:
                 break
 
+            # The queued requests are drained and the compatible ones are generated together.
+            requests = [req]
+            stopping = False
+            while True:
+                try:
+                    req = self._request_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if not req:
+                    stopping = True
+                    break
+                requests.append(req)
+            for batch in self._group_compatible_requests(requests):
+                if len(batch) == 1:
+                    self._handle_request_safely(batch[0])
+                else:
+                    self._handle_batch_safely(batch)
+            if stopping:
+                break
+
+    def _group_compatible_requests(
+        self, requests: List[_GenerateRequest]
+    ) -> List[List[_GenerateRequest]]:
+        """
+        Group the requests which can be generated by a single generate call, up to max_batch_sequences prompts.
+        """
+        batches: List[List[_GenerateRequest]] = []
+        open_batches: Dict[Any, List[_GenerateRequest]] = {}
+        for req in requests:
+            key = self._batch_key(req)
+            batch = open_batches.get(key) if key is not None else None
+            num_prompts = req["kwargs"]["input_ids"].shape[0]
+            if batch is not None and (
+                sum(r["kwargs"]["input_ids"].shape[0] for r in batch) + num_prompts
+                <= self.max_batch_sequences
+            ):
+                batch.append(req)
+                continue
+            batch = [req]
+            batches.append(batch)
+            if key is not None:
+                open_batches[key] = batch
+        return batches
+
+    @staticmethod
+    def _batch_key(req: _GenerateRequest) -> Optional[Any]:
+        """
+        The requests with the same sampling parameters, stop sequences and power of two bucket of
+        max_new_tokens are compatible. Streaming and seeded requests are always generated alone.
+        """
+        params = req["request"].params
+        if params.stream or params.seed is not None:
+            return None
+        config = req["kwargs"]["generation_config"].to_dict()
+        max_new_tokens = config.pop("max_new_tokens") or 1
+        stopping_criteria = req["kwargs"]["stopping_criteria"]
+        stop_sequences = (
+            tuple(tuple(seq.tolist()) for seq in stopping_criteria[0].stop_sequences)
+            if stopping_criteria
+            else ()
+        )
+        return (
+            repr(sorted(config.items(), key=lambda item: item[0])),
+            stop_sequences,
+            1 << (max_new_tokens - 1).bit_length(),
+        )
+
+    def _handle_batch(self, requests: List[_GenerateRequest]):
+        """
+        Generate compatible requests with a single generate call. The prompts are padded together and the
+        outputs are split back per request.
+        """
+        prompts, max_new_tokens = [], []
+        for req in requests:
+            input_ids = req["kwargs"]["input_ids"]
+            attention_mask = req["kwargs"].get("attention_mask")
+            if attention_mask is None:
+                attention_mask = torch.ones_like(input_ids)
+            for ids, mask in zip(input_ids, attention_mask):
+                prompts.append(ids[mask.bool()].tolist())
+                max_new_tokens.append(req["kwargs"]["generation_config"].max_new_tokens)
+        inputs = self._tokenizer.pad(
+            {"input_ids": prompts}, padding=True, return_tensors=TensorType.PYTORCH
+        ).to(self._device)
+        input_length = inputs["input_ids"].shape[-1]
+        generation_config = copy.deepcopy(requests[0]["kwargs"]["generation_config"])
+        generation_config.max_new_tokens = max(max_new_tokens)
+        stopping_criteria = requests[0]["kwargs"]["stopping_criteria"]
+        batch_stopping_criteria = BatchStoppingCriteria(
+            # The decoder of encoder-decoder models starts with the decoder start token.
+            input_length=1 if self.is_encoder_decoder else input_length,
+            max_new_tokens=max_new_tokens,
+            stop_sequences=(
+                stopping_criteria[0].stop_sequences if stopping_criteria else []
+            ),
+        )
+        outputs = self._model.generate(
+            **inputs,
+            generation_config=generation_config,
+            stopping_criteria=StoppingCriteriaList([batch_stopping_criteria]),
+        )
+        # The rows which stopped early are padded up to the longest row, only count the generated tokens.
+        pad_token_id = generation_config.pad_token_id
+        if pad_token_id is None:
+            pad_token_id = self._tokenizer.pad_token_id
+        generated = outputs[:, 1 if self.is_encoder_decoder else input_length :]
+        num_generated = (
+            (generated != pad_token_id)
+            .sum(dim=-1)
+            .cpu()
+            .clamp(max=batch_stopping_criteria.max_new_tokens)
+        )
+        start = 0
+        for req in requests:
+            request, kwargs = req["request"], req["kwargs"]
+            end = start + kwargs["input_ids"].shape[0]
+            output_start = (
+                0 if request.params.echo or self.is_encoder_decoder else input_length
+            )
+            stats: LLMStats = request.context[LLM_STATS_KEY]
+            stats.num_generation_tokens = int(num_generated[start:end].sum())
+            if kwargs["stopping_criteria"]:
+                kwargs["stopping_criteria"][0].triggered = bool(
+                    batch_stopping_criteria.triggered[start:end].any()
+                )
+            texts = self._tokenizer.batch_decode(
+                outputs[start:end, output_start:], skip_special_tokens=True
+            )
+            req["loop"].call_soon_threadsafe(req["response_queue"].put_nowait, texts)
+            start = end
+
+    def _handle_batch_safely(self, requests: List[_GenerateRequest]):
+        try:
+            self._handle_batch(requests)
+        except Exception as e:
+            logger.error(f"Failed to generate the completions: {e}", exc_info=True)
+            for req in requests:
+                req["loop"].call_soon_threadsafe(req["response_queue"].put_nowait, e)
+
+    def _handle_request_safely(self, req: _GenerateRequest):
+        try:
             self._handle_request(req)
+        except Exception as e:
+            logger.error(f"Failed to generate the completion: {e}", exc_info=True)
+            # The error is raised to the waiting request instead of stopping the background thread.
+            req["loop"].call_soon_threadsafe(req["response_queue"].put_nowait, e)
 
     def _submit_request(
         self, kwargs: Dict[str, Any], request: CompletionRequest
@@ -414,6 +584,8 @@ class HuggingfaceGenerativeModel(
             inputs = self._tokenizer(
                 prompts, padding=True, return_tensors=TensorType.PYTORCH
             ).to(self._device)
+        if params.stream and inputs["input_ids"].shape[0] > 1:
+            raise ValueError("'stream' is not supported with multiple prompts")
         num_input_tokens_per_prompt = inputs["input_ids"].shape[-1]
         num_input_tokens = num_input_tokens_per_prompt * inputs["input_ids"].shape[0]
         stats.num_prompt_tokens = num_input_tokens
@@ -466,6 +638,8 @@ class HuggingfaceGenerativeModel(
             )
         else:
             outputs = await response_queue.get()
+            if isinstance(outputs, Exception):
+                raise outputs
             if (
                 stop_sequence_stopping_criteria is not None
                 and stop_sequence_stopping_criteria.triggered
@@ -46,3 +46,39 @@ class StopSequenceStoppingCriteria(StoppingCriteria):
                 self.triggered = True
                 return True
         return False
+
+
+class BatchStoppingCriteria(StoppingCriteria):
+    """
+    This class stops each sequence of a batch built from several requests at its own maximum number of new
+    tokens and at the stop sequences, without stopping the other sequences of the batch.
+    """
+
+    def __init__(
+        self,
+        input_length: int,
+        max_new_tokens: List[int],
+        stop_sequences: List[torch.LongTensor],
+    ):
+        self.input_length = input_length
+        self.max_new_tokens = torch.tensor(max_new_tokens)
+        self.stop_sequences = stop_sequences
+        self.done = torch.zeros(len(max_new_tokens), dtype=torch.bool)
+        # The sequences which were stopped by a stop sequence.
+        self.triggered = torch.zeros(len(max_new_tokens), dtype=torch.bool)
+
+    def __call__(
+        self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs
+    ) -> torch.BoolTensor:
+        generated = input_ids.shape[-1] - self.input_length
+        is_done = generated >= self.max_new_tokens
+        for seq in self.stop_sequences:
+            if seq.shape[-1] > generated:
+                continue
+            matched = torch.all(
+                input_ids[:, -len(seq) :] == seq.to(input_ids.device), dim=1
+            ).cpu()
+            self.triggered |= matched & ~self.done
+            is_done |= matched
+        self.done |= is_done
+        return self.done.to(input_ids.device)
@@ -27,6 +27,10 @@ from transformers import (
     AutoModelForTokenClassification,
     PretrainedConfig,
 )
+from transformers.models.auto.modeling_auto import (
+    MODEL_FOR_CAUSAL_LM_MAPPING_NAMES,
+    MODEL_FOR_MASKED_LM_MAPPING_NAMES,
+)
 
 
 class MLTask(str, Enum):
@@ -42,6 +46,7 @@ class MLTask(str, Enum):
     text_generation = auto()
     text2text_generation = auto()
     multiple_choice = auto()
+    text_embedding = auto()
 
     @classmethod
     def _missing_(cls, value: str):
@@ -63,6 +68,9 @@ ARCHITECTURES_2_TASK = {
     "ForConditionalGeneration": MLTask.text2text_generation,
     "MTModel": MLTask.text2text_generation,
     "EncoderDecoderModel": MLTask.text2text_generation,
+    # A base model without a task head, e.g. BertModel of the sentence-transformers models. Only the
+    # encoder-only models are inferred as text_embedding, see _is_encoder_only.
+    "Model": MLTask.text_embedding,
 }
 
 TASK_2_CLS = {
@@ -74,6 +82,7 @@ TASK_2_CLS = {
     MLTask.text_generation: AutoModelForCausalLM,
     MLTask.text2text_generation: AutoModelForSeq2SeqLM,
     MLTask.multiple_choice: AutoModelForMultipleChoice,
+    MLTask.text_embedding: AutoModel,
 }
 
 SUPPORTED_TASKS = {
@@ -82,6 +91,7 @@ SUPPORTED_TASKS = {
     MLTask.fill_mask,
     MLTask.text_generation,
     MLTask.text2text_generation,
+    MLTask.text_embedding,
 }
 
 
@@ -95,6 +105,9 @@ def infer_task_from_model_architecture(
             task = ARCHITECTURES_2_TASK[arch_options]
             break
 
+    if task == MLTask.text_embedding and not _is_encoder_only(model_config):
+        task = None
+
     if task is None:
         raise ValueError(
             f"Task couldn't be inferred from {architecture}. Please manually set `task` option. "
@@ -107,6 +120,21 @@ def infer_task_from_model_architecture(
     return task
 
 
+def _is_encoder_only(model_config: PretrainedConfig) -> bool:
+    """
+    The headless encoder-decoder models, e.g. T5Model, and decoder-only models, e.g. GPT2Model, are
+    not embedding models by default, their task must be set explicitly. A model type with a causal LM
+    head is a decoder unless it also has a masked LM head like BERT.
+    """
+    if model_config.is_encoder_decoder or model_config.is_decoder:
+        return False
+    model_type = getattr(model_config, "model_type", None)
+    return not (
+        model_type in MODEL_FOR_CAUSAL_LM_MAPPING_NAMES
+        and model_type not in MODEL_FOR_MASKED_LM_MAPPING_NAMES
+    )
+
+
 def is_generative_task(task: MLTask) -> bool:
     return task in {
         MLTask.text_generation,
@@ -12,18 +12,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import base64
+import copy
+import queue
+
+import numpy as np
 import pytest
 
 from kserve.model import PredictorConfig
-from kserve.protocol.rest.openai import ChatCompletionRequest, CompletionRequest
+from kserve.protocol.rest.openai import (
+    ChatCompletionRequest,
+    CompletionRequest,
+    EmbeddingRequest,
+)
 from kserve.protocol.rest.openai.types import (
     CreateChatCompletionRequest,
     CreateCompletionRequest,
+    CreateEmbeddingRequest,
 )
 from pytest_httpx import HTTPXMock
-from transformers import AutoConfig
+from transformers import AutoConfig, GenerationConfig
 from pytest import approx
+from unittest.mock import patch
 
+from .continuous_batching import ContinuousBatchingScheduler
 from .task import infer_task_from_model_architecture
 from .encoder_model import HuggingfaceEncoderModel
 from .generative_model import HuggingfaceGenerativeModel
@@ -71,6 +84,21 @@ def bert_base_model():
     model.stop()
 
 
+@pytest.fixture(scope="module")
+def bert_base_return_prob_top_k():
+    model = HuggingfaceEncoderModel(
+        "google-bert/bert-base-uncased",
+        model_id_or_path="bert-base-uncased",
+        do_lower_case=True,
+        dtype=torch.float32,
+        # The 5 most probable tokens of each mask are returned by default.
+        return_probabilities=True,
+    )
+    model.load()
+    yield model
+    model.stop()
+
+
 @pytest.fixture(scope="module")
 def bert_base_yelp_polarity():
     model = HuggingfaceEncoderModel(
@@ -97,6 +125,18 @@ def bert_base_return_prob():
     model.stop()
 
 
+@pytest.fixture(scope="module")
+def minilm_embedding_model():
+    model = HuggingfaceEncoderModel(
+        "all-MiniLM-L6-v2",
+        model_id_or_path="sentence-transformers/all-MiniLM-L6-v2",
+        dtype=torch.float32,
+    )
+    model.load()
+    yield model
+    model.stop()
+
+
 @pytest.fixture(scope="module")
 def bert_token_classification_retrun_prob():
     model = HuggingfaceEncoderModel(
@@ -146,6 +186,22 @@ def test_unsupported_model():
     assert "Task table_question_answering is not supported" in err_info.value.args[0]
 
 
+@pytest.mark.parametrize(
+    "model_type,architecture",
+    [("t5", "T5Model"), ("bart", "BartModel"), ("gpt2", "GPT2Model")],
+)
+def test_headless_model_not_inferred_as_embedding(model_type, architecture):
+    config = AutoConfig.for_model(model_type, architectures=[architecture])
+    with pytest.raises(ValueError) as err_info:
+        infer_task_from_model_architecture(config)
+    assert f"Task couldn't be inferred from {architecture}" in err_info.value.args[0]
+
+
+def test_encoder_model_inferred_as_embedding():
+    config = AutoConfig.for_model("bert", architectures=["BertModel"])
+    assert infer_task_from_model_architecture(config) == MLTask.text_embedding
+
+
 @pytest.mark.asyncio
 async def test_t5(t5_model: HuggingfaceGenerativeModel):
     params = CreateCompletionRequest(
@@ -172,6 +228,44 @@ async def test_t5_stopping_criteria(t5_model: HuggingfaceGenerativeModel):
     assert response.choices[0].text == "wir setzen"
 
 
+@pytest.mark.asyncio
+async def test_t5_micro_batching(t5_model: HuggingfaceGenerativeModel):
+    async def complete(prompt, stop=None, max_tokens=16):
+        params = CreateCompletionRequest(
+            model="t5-small",
+            prompt=prompt,
+            stop=stop,
+            max_tokens=max_tokens,
+            stream=False,
+        )
+        request = CompletionRequest(params=params, context={})
+        return await t5_model.create_completion(request)
+
+    prompt = "translate from English to German: we are making words"
+    other_prompt = "translate from English to German: the house is wonderful"
+    expected = (await complete(other_prompt)).choices[0].text
+    # The queued compatible requests are generated by a single generate call.
+    with patch.object(
+        t5_model._model, "generate", wraps=t5_model._model.generate
+    ) as generate:
+        responses = await asyncio.gather(
+            complete(prompt),
+            complete(other_prompt),
+            complete(prompt, max_tokens=12),
+            complete(prompt, stop=["setzen "]),
+        )
+    assert generate.call_count == 1
+    assert generate.call_args.kwargs["input_ids"].shape[0] == 4
+    assert responses[0].choices[0].text == "wir setzen Worte"
+    assert responses[1].choices[0].text == expected
+    assert responses[2].choices[0].text == "wir setzen Worte"
+    assert responses[3].choices[0].text == "wir setzen"
+    assert responses[3].choices[0].finish_reason == "stop"
+    assert responses[0].choices[0].finish_reason == "length"
+    # The padding after the rows which stopped early is not counted.
+    assert responses[3].usage.completion_tokens < responses[0].usage.completion_tokens
+
+
 @pytest.mark.asyncio
 async def test_t5_bad_params(t5_model: HuggingfaceGenerativeModel):
     params = CreateCompletionRequest(
@@ -200,6 +294,28 @@ async def test_bert(bert_base_model: HuggingfaceEncoderModel):
     assert response == {"predictions": ["paris", "france"]}
 
 
+@pytest.mark.asyncio
+async def test_bert_fill_mask_return_probabilities_top_k(
+    bert_base_return_prob_top_k: HuggingfaceEncoderModel,
+):
+    response = await bert_base_return_prob_top_k(
+        {
+            "instances": [
+                "The capital of France is [MASK].",
+                "The [MASK] of France is [MASK].",
+            ]
+        },
+        headers={},
+    )
+    first, second = response["predictions"]
+    assert len(first) == 1 and len(second) == 2
+    top_tokens = first[0]
+    assert len(top_tokens) == 5
+    assert list(top_tokens[0]) == ["paris"]
+    probabilities = [float(p) for token in top_tokens for p in token.values()]
+    assert probabilities == sorted(probabilities, reverse=True)
+
+
 @pytest.mark.asyncio
 async def test_model_revision(request: HuggingfaceEncoderModel):
     # https://huggingface.co/google-bert/bert-base-uncased
@@ -340,6 +456,31 @@ async def test_bloom_completion_max_tokens(bloom_model: HuggingfaceGenerativeMod
     )
 
 
+@pytest.mark.asyncio
+async def test_bloom_concurrent_completions(bloom_model: HuggingfaceGenerativeModel):
+    prompts = ["Hello, my dog is cute", "The capital of France is", "1, 2, 3,"]
+    max_tokens = [16, 5, 30]
+
+    async def complete(prompt, tokens):
+        params = CreateCompletionRequest(
+            model="bloom-560m",
+            prompt=prompt,
+            stream=False,
+            max_tokens=tokens,
+        )
+        request = CompletionRequest(params=params, context={})
+        response = await bloom_model.create_completion(request)
+        return response.choices[0].text
+
+    expected = [await complete(p, t) for p, t in zip(prompts, max_tokens)]
+    # The concurrent requests join and leave the same running batch.
+    outputs = await asyncio.gather(
+        *[complete(p, t) for p, t in zip(prompts, max_tokens)]
+    )
+    assert outputs == expected
+    assert expected[0] == ".\n- Hey, my dog is cute.\n- Hey, my dog is cute"
+
+
 @pytest.mark.asyncio
 async def test_bloom_completion_streaming(bloom_model: HuggingfaceGenerativeModel):
     params = CreateCompletionRequest(
@@ -412,6 +553,77 @@ async def test_bloom_chat_completion_streaming(bloom_model: HuggingfaceGenerativ
     )
 
 
+@pytest.mark.asyncio
+async def test_continuous_batching_matches_generate(
+    bloom_model: HuggingfaceGenerativeModel,
+):
+    model, tokenizer = bloom_model._model, bloom_model._tokenizer
+    # The longest prompt finishes first, so that the padding columns of the batch are trimmed, and the
+    # last prompt waits for it to leave the batch before being merged into it.
+    prompts = ["The quick brown fox jumps over the", "Hello, my dog is", "1, 2, 3,"]
+    max_tokens = [3, 12, 8]
+    generation_config = GenerationConfig(
+        no_repeat_ngram_size=2,
+        min_new_tokens=2,
+        bad_words_ids=[tokenizer.encode(" cute", add_special_tokens=False)],
+        eos_token_id=tokenizer.eos_token_id,
+        pad_token_id=tokenizer.pad_token_id,
+    )
+
+    expected, reqs = [], []
+    loop = asyncio.get_running_loop()
+    request_queue = queue.Queue()
+    for prompt, tokens in zip(prompts, max_tokens):
+        inputs = tokenizer([prompt], return_tensors="pt")
+        config = copy.deepcopy(generation_config)
+        config.max_new_tokens = tokens
+        outputs = model.generate(**inputs, generation_config=config)
+        expected.append(
+            tokenizer.decode(
+                outputs[0, inputs["input_ids"].shape[-1] :], skip_special_tokens=True
+            )
+        )
+        params = CreateCompletionRequest(
+            model="bloom-560m", prompt=prompt, stream=False, max_tokens=tokens
+        )
+        req = {
+            "kwargs": {
+                **inputs,
+                "generation_config": config,
+                "stopping_criteria": None,
+            },
+            "request": CompletionRequest(params=params, context={}),
+            "response_queue": asyncio.Queue(),
+            "loop": loop,
+        }
+        reqs.append(req)
+        request_queue.put(req)
+    request_queue.put(None)
+
+    scheduler = ContinuousBatchingScheduler(model, tokenizer, max_batch_sequences=2)
+    batches = []
+    decode = scheduler._decode
+
+    def record_decode():
+        batches.append((len(scheduler._sequences), scheduler._attention_mask.shape[-1]))
+        decode()
+
+    scheduler._decode = record_decode
+    await asyncio.to_thread(scheduler.run, request_queue, lambda req: None)
+
+    outputs = [(await req["response_queue"].get())[0] for req in reqs]
+    assert outputs == expected
+    assert scheduler._cache is None
+    # The last prompt joins the running batch as soon as the first one leaves it.
+    assert [size for size, _ in batches[:3]] == [2, 2, 2]
+    # The cache grows by one column per step, except when the padding of the first prompt is trimmed.
+    lengths = [length for _, length in batches]
+    assert any(b <= a for a, b in zip(lengths, lengths[1:]))
+    assert not ContinuousBatchingScheduler._supports_generation_config(
+        GenerationConfig(num_beams=2)
+    )
+
+
 @pytest.mark.asyncio
 async def test_input_padding(bert_base_yelp_polarity: HuggingfaceEncoderModel):
     # inputs with different lengths will throw an error
@@ -424,6 +636,96 @@ async def test_input_padding(bert_base_yelp_polarity: HuggingfaceEncoderModel):
     assert response == {"predictions": [1, 1]}
 
 
+@pytest.mark.asyncio
+async def test_length_bucketing(bert_base_return_prob: HuggingfaceEncoderModel):
+    short_request = "Hello, my dog is cute."
+    long_request = "My dog is cute and likes to play in the garden every morning. " * 4
+    expected = [
+        (await bert_base_return_prob({"instances": [r]}, headers={}))["predictions"][0]
+        for r in [short_request, long_request]
+    ]
+    # The short and the long instances are run in separate buckets.
+    response = await bert_base_return_prob(
+        {"instances": [short_request, long_request]}, headers={}
+    )
+    for prediction, expected_prediction in zip(response["predictions"], expected):
+        assert prediction == {
+            k: approx(v, abs=1e-4) for k, v in expected_prediction.items()
+        }
+
+
+@pytest.mark.asyncio
+async def test_length_bucketing_across_requests(
+    bert_base_yelp_polarity: HuggingfaceEncoderModel,
+):
+    # Dynamic batching coalesces the concurrent requests, which are then bucketed by length.
+    bert_base_yelp_polarity.max_batch_size = 8
+    try:
+        responses = await asyncio.gather(
+            bert_base_yelp_polarity({"instances": ["Hello, my dog is cute."]}),
+            bert_base_yelp_polarity(
+                {"instances": ["This is the worst food I have ever had. " * 5]}
+            ),
+        )
+    finally:
+        bert_base_yelp_polarity.max_batch_size = None
+        bert_base_yelp_polarity._batcher = None
+    assert responses == [{"predictions": [1]}, {"predictions": [0]}]
+
+
+@pytest.mark.asyncio
+async def test_text_embedding(minilm_embedding_model: HuggingfaceEncoderModel):
+    assert minilm_embedding_model.task == MLTask.text_embedding
+    inputs = ["Hello, my dog is cute.", "My dog likes to play in the garden. " * 4]
+    params = CreateEmbeddingRequest(model="all-MiniLM-L6-v2", input=inputs)
+    response = await minilm_embedding_model.create_embedding(
+        EmbeddingRequest(params=params)
+    )
+    embeddings = np.array([data["embedding"] for data in response["data"]])
+    assert embeddings.shape == (2, 384)
+    assert np.linalg.norm(embeddings, axis=1) == approx([1.0, 1.0], abs=1e-5)
+    assert response["usage"]["prompt_tokens"] > 0
+
+    # The embeddings of a batch are the same as the embeddings of each input.
+    for text, embedding in zip(inputs, embeddings):
+        params = CreateEmbeddingRequest(
+            model="all-MiniLM-L6-v2", input=text, encoding_format="base64"
+        )
+        response = await minilm_embedding_model.create_embedding(
+            EmbeddingRequest(params=params)
+        )
+        single = np.frombuffer(
+            base64.b64decode(response["data"][0]["embedding"]), dtype="<f4"
+        )
+        assert single == approx(embedding, abs=1e-5)
+
+    response = await minilm_embedding_model({"instances": inputs}, headers={})
+    assert np.array(response["predictions"]) == approx(embeddings, abs=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_text_embedding_ragged_token_inputs(
+    minilm_embedding_model: HuggingfaceEncoderModel,
+):
+    tokenizer = minilm_embedding_model._tokenizer
+    texts = ["Hello, my dog is cute.", "My dog likes to play in the garden."]
+    token_inputs = [tokenizer(text)["input_ids"] for text in texts]
+    assert len(token_inputs[0]) != len(token_inputs[1])
+    params = CreateEmbeddingRequest(model="all-MiniLM-L6-v2", input=token_inputs)
+    response = await minilm_embedding_model.create_embedding(
+        EmbeddingRequest(params=params)
+    )
+    assert response["usage"]["prompt_tokens"] == sum(map(len, token_inputs))
+    # The padded token lists have the embeddings of their texts.
+    params = CreateEmbeddingRequest(model="all-MiniLM-L6-v2", input=texts)
+    expected = await minilm_embedding_model.create_embedding(
+        EmbeddingRequest(params=params)
+    )
+    for data, expected_data in zip(response["data"], expected["data"]):
+        assert isinstance(data["embedding"], np.ndarray)
+        assert data["embedding"] == approx(expected_data["embedding"], abs=1e-5)
+
+
 @pytest.mark.asyncio
 async def test_input_truncation(bert_base_yelp_polarity: HuggingfaceEncoderModel):
     # bert-base-uncased has a max length of 512 (tokenizer.model_max_length).
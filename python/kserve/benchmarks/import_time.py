@@ -0,0 +1,95 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the import time of the kserve package in a fresh interpreter.
+
+Reports the best wall time of ``import kserve`` and of the imports a model server needs, the time
+spent per top-level package from ``python -X importtime``, and whether the optional dependencies which
+must stay lazy (Ray, pandas, the Kubernetes client, the CRD models and the OpenAI types) were imported.
+
+Usage: python benchmarks/import_time.py [--repeat N] [--top N]
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+STATEMENTS = {
+    "import kserve": "import kserve",
+    "model server": "from kserve import Model, ModelServer",
+}
+
+LAZY_MODULES = [
+    "ray",
+    "pandas",
+    "kubernetes",
+    "kserve.api.kserve_client",
+    "kserve.models",
+    "kserve.protocol.rest.openai.types.openapi",
+]
+
+
+def import_time(statement: str) -> float:
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    return float(output.stdout.strip().splitlines()[-1]) * 1000
+
+
+def slowest_packages(statement: str, top: int):
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    totals = defaultdict(int)
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, name = line[len("import time:") :].split("|")
+        if not self_time.strip().isdigit():
+            continue
+        # Attribute the time spent importing each module to its top-level package.
+        totals[name.strip().split(".")[0]] += int(self_time)
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def loaded_lazy_modules(statement: str):
+    code = f"import sys; {statement}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    return [m for m in output.stdout.strip().split(",") if m]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    for name, statement in STATEMENTS.items():
+        best = min(import_time(statement) for _ in range(args.repeat))
+        print(f"{name:<16} {best:10.2f} ms")
+        print(
+            f"{'':<16} lazy modules imported: {loaded_lazy_modules(statement) or 'none'}"
+        )
+    print(f"\ntime per top-level package of '{STATEMENTS['import kserve']}':")
+    for package, micros in slowest_packages(STATEMENTS["import kserve"], args.top):
+        print(f"  {package:<24} {micros / 1000:10.2f} ms")
@@ -0,0 +1,94 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Microbenchmark of get_predict_response for 1k, 10k and 100k rows outputs.
+
+Compares the previous row-wise conversions (``iterrows()`` and ``[val.item() for val in flatten()]``)
+with the current ones, including the JSON encoding of the response. ``numpy_data`` is the REST server
+path, where orjson serializes the numpy outputs without the conversion to lists.
+
+Usage: python benchmarks/predict_response.py [--repeat N]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from kserve.protocol.infer_type import InferInput, InferOutput, InferRequest
+from kserve.utils.numpy_codec import from_np_dtype
+from kserve.utils.utils import get_predict_response
+
+ROWS = [1_000, 10_000, 100_000]
+COLUMNS = 8
+
+
+def legacy_v1_dataframe(result: pd.DataFrame):
+    infer_outputs = []
+    for label, row in result.iterrows():
+        infer_outputs.append(row.to_dict())
+    return {"predictions": infer_outputs}
+
+
+def legacy_v2_ndarray(result: np.ndarray):
+    infer_output = InferOutput(
+        name="output-0", shape=list(result.shape), datatype=from_np_dtype(result.dtype)
+    )
+    infer_output.data = [val.item() for val in result.flatten()]
+    return infer_output
+
+
+def run(rows: int, repeat: int):
+    frame = pd.DataFrame(
+        np.random.rand(rows, COLUMNS), columns=[f"c{i}" for i in range(COLUMNS)]
+    )
+    tensor = frame.to_numpy()
+    v1_payload = {"instances": []}
+    v2_payload = InferRequest(
+        model_name="bench",
+        infer_inputs=[InferInput(name="input-0", shape=[0], datatype="FP64", data=[])],
+    )
+
+    def best(fn):
+        return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+    cases = {
+        "v1 dataframe iterrows": lambda: orjson.dumps(legacy_v1_dataframe(frame)),
+        "v1 dataframe records": lambda: orjson.dumps(
+            get_predict_response(v1_payload, frame, "bench")
+        ),
+        "v2 ndarray item()": lambda: orjson.dumps(legacy_v2_ndarray(tensor).data),
+        "v2 ndarray tolist()": lambda: orjson.dumps(
+            get_predict_response(v2_payload, tensor, "bench").to_rest()
+        ),
+        "v2 ndarray numpy_data": lambda: orjson.dumps(
+            get_predict_response(v2_payload, tensor, "bench").to_rest(numpy_data=True),
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        ),
+        "orjson numpy (lower bound)": lambda: orjson.dumps(
+            tensor, option=orjson.OPT_SERIALIZE_NUMPY
+        ),
+    }
+    for name, fn in cases.items():
+        print(f"{rows:>8} rows  {name:<28} {best(fn):10.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for rows in ROWS:
+        run(rows, args.repeat)
@@ -14,95 +14,108 @@
 
 from __future__ import absolute_import
 
+import importlib
+
 from .model import Model
 from .model_server import ModelServer
 from .inference_client import InferenceServerClient
 from .protocol.infer_type import InferRequest, InferInput, InferResponse, InferOutput
-from .model_repository import ModelRepository
+from .model_repository import MemoryAwareModelRepository, ModelRepository
 from .constants import constants
 from .utils import utils
 
-# import client apis into kserve package
-from .api.kserve_client import KServeClient
-from .constants import constants
+# The SDK client, the ApiClient and the CRD models are imported on first use (PEP 562), so that model
+# servers don't pay the import time of the Kubernetes client.
+_LAZY_IMPORTS = {
+    # client apis
+    "KServeClient": ".api.kserve_client",
+    # ApiClient
+    "ApiClient": ".api_client",
+    "Configuration": ".configuration",
+    "OpenApiException": ".exceptions",
+    "ApiTypeError": ".exceptions",
+    "ApiValueError": ".exceptions",
+    "ApiKeyError": ".exceptions",
+    "ApiException": ".exceptions",
+    # v1alpha1 models
+    "V1alpha1BuiltInAdapter": ".models.v1alpha1_built_in_adapter",
+    "V1alpha1ClusterServingRuntime": ".models.v1alpha1_cluster_serving_runtime",
+    "V1alpha1ClusterServingRuntimeList": ".models.v1alpha1_cluster_serving_runtime_list",
+    "V1alpha1Container": ".models.v1alpha1_container",
+    "V1alpha1InferenceGraph": ".models.v1alpha1_inference_graph",
+    "V1alpha1InferenceGraphList": ".models.v1alpha1_inference_graph_list",
+    "V1alpha1InferenceGraphSpec": ".models.v1alpha1_inference_graph_spec",
+    "V1alpha1InferenceGraphStatus": ".models.v1alpha1_inference_graph_status",
+    "V1alpha1InferenceRouter": ".models.v1alpha1_inference_router",
+    "V1alpha1InferenceStep": ".models.v1alpha1_inference_step",
+    "V1alpha1InferenceTarget": ".models.v1alpha1_inference_target",
+    "V1alpha1ModelSpec": ".models.v1alpha1_model_spec",
+    "V1alpha1ServingRuntime": ".models.v1alpha1_serving_runtime",
+    "V1alpha1ServingRuntimeList": ".models.v1alpha1_serving_runtime_list",
+    "V1alpha1ServingRuntimePodSpec": ".models.v1alpha1_serving_runtime_pod_spec",
+    "V1alpha1ServingRuntimeSpec": ".models.v1alpha1_serving_runtime_spec",
+    "V1alpha1StorageHelper": ".models.v1alpha1_storage_helper",
+    "V1alpha1SupportedModelFormat": ".models.v1alpha1_supported_model_format",
+    "V1alpha1TrainedModel": ".models.v1alpha1_trained_model",
+    "V1alpha1TrainedModelList": ".models.v1alpha1_trained_model_list",
+    "V1alpha1TrainedModelSpec": ".models.v1alpha1_trained_model_spec",
+    # v1beta1 models
+    "KnativeAddressable": ".models.knative_addressable",
+    "KnativeCondition": ".models.knative_condition",
+    "KnativeURL": ".models.knative_url",
+    "KnativeVolatileTime": ".models.knative_volatile_time",
+    "NetUrlUserinfo": ".models.net_url_userinfo",
+    "V1beta1ARTExplainerSpec": ".models.v1beta1_art_explainer_spec",
+    "V1beta1Batcher": ".models.v1beta1_batcher",
+    "V1beta1ComponentExtensionSpec": ".models.v1beta1_component_extension_spec",
+    "V1beta1ComponentStatusSpec": ".models.v1beta1_component_status_spec",
+    "V1beta1CustomExplainer": ".models.v1beta1_custom_explainer",
+    "V1beta1CustomPredictor": ".models.v1beta1_custom_predictor",
+    "V1beta1CustomTransformer": ".models.v1beta1_custom_transformer",
+    "V1beta1DeployConfig": ".models.v1beta1_deploy_config",
+    "V1beta1ExplainerConfig": ".models.v1beta1_explainer_config",
+    "V1beta1ExplainerExtensionSpec": ".models.v1beta1_explainer_extension_spec",
+    "V1beta1ExplainerSpec": ".models.v1beta1_explainer_spec",
+    "V1beta1ExplainersConfig": ".models.v1beta1_explainers_config",
+    "V1beta1InferenceService": ".models.v1beta1_inference_service",
+    "V1beta1InferenceServiceList": ".models.v1beta1_inference_service_list",
+    "V1beta1InferenceServiceSpec": ".models.v1beta1_inference_service_spec",
+    "V1beta1InferenceServiceStatus": ".models.v1beta1_inference_service_status",
+    "V1beta1InferenceServicesConfig": ".models.v1beta1_inference_services_config",
+    "V1beta1IngressConfig": ".models.v1beta1_ingress_config",
+    "V1beta1LightGBMSpec": ".models.v1beta1_light_gbm_spec",
+    "V1beta1LoggerSpec": ".models.v1beta1_logger_spec",
+    "V1beta1ModelFormat": ".models.v1beta1_model_format",
+    "V1beta1ModelSpec": ".models.v1beta1_model_spec",
+    "V1beta1ONNXRuntimeSpec": ".models.v1beta1_onnx_runtime_spec",
+    "V1beta1PMMLSpec": ".models.v1beta1_pmml_spec",
+    "V1beta1PaddleServerSpec": ".models.v1beta1_paddle_server_spec",
+    "V1beta1PodSpec": ".models.v1beta1_pod_spec",
+    "V1beta1PredictorConfig": ".models.v1beta1_predictor_config",
+    "V1beta1PredictorExtensionSpec": ".models.v1beta1_predictor_extension_spec",
+    "V1beta1PredictorProtocols": ".models.v1beta1_predictor_protocols",
+    "V1beta1PredictorSpec": ".models.v1beta1_predictor_spec",
+    "V1beta1PredictorsConfig": ".models.v1beta1_predictors_config",
+    "V1beta1SKLearnSpec": ".models.v1beta1_sk_learn_spec",
+    "V1beta1TFServingSpec": ".models.v1beta1_tf_serving_spec",
+    "V1beta1TorchServeSpec": ".models.v1beta1_torch_serve_spec",
+    "V1beta1TransformerConfig": ".models.v1beta1_transformer_config",
+    "V1beta1TransformerSpec": ".models.v1beta1_transformer_spec",
+    "V1beta1TransformersConfig": ".models.v1beta1_transformers_config",
+    "V1beta1TritonSpec": ".models.v1beta1_triton_spec",
+    "V1beta1XGBoostSpec": ".models.v1beta1_xg_boost_spec",
+    "V1beta1StorageSpec": ".models.v1beta1_storage_spec",
+}
+
 
-# import ApiClient
-from .api_client import ApiClient
-from .configuration import Configuration
-from .exceptions import OpenApiException
-from .exceptions import ApiTypeError
-from .exceptions import ApiValueError
-from .exceptions import ApiKeyError
-from .exceptions import ApiException
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# import v1alpha1 models into kserve packages
-from .models.v1alpha1_built_in_adapter import V1alpha1BuiltInAdapter
-from .models.v1alpha1_cluster_serving_runtime import V1alpha1ClusterServingRuntime
-from .models.v1alpha1_cluster_serving_runtime_list import (
-    V1alpha1ClusterServingRuntimeList,
-)
-from .models.v1alpha1_container import V1alpha1Container
-from .models.v1alpha1_inference_graph import V1alpha1InferenceGraph
-from .models.v1alpha1_inference_graph_list import V1alpha1InferenceGraphList
-from .models.v1alpha1_inference_graph_spec import V1alpha1InferenceGraphSpec
-from .models.v1alpha1_inference_graph_status import V1alpha1InferenceGraphStatus
-from .models.v1alpha1_inference_router import V1alpha1InferenceRouter
-from .models.v1alpha1_inference_step import V1alpha1InferenceStep
-from .models.v1alpha1_inference_target import V1alpha1InferenceTarget
-from .models.v1alpha1_model_spec import V1alpha1ModelSpec
-from .models.v1alpha1_serving_runtime import V1alpha1ServingRuntime
-from .models.v1alpha1_serving_runtime_list import V1alpha1ServingRuntimeList
-from .models.v1alpha1_serving_runtime_pod_spec import V1alpha1ServingRuntimePodSpec
-from .models.v1alpha1_serving_runtime_spec import V1alpha1ServingRuntimeSpec
-from .models.v1alpha1_storage_helper import V1alpha1StorageHelper
-from .models.v1alpha1_supported_model_format import V1alpha1SupportedModelFormat
-from .models.v1alpha1_trained_model import V1alpha1TrainedModel
-from .models.v1alpha1_trained_model_list import V1alpha1TrainedModelList
-from .models.v1alpha1_trained_model_spec import V1alpha1TrainedModelSpec
 
-# import v1beta1 models into sdk package
-from .models.knative_addressable import KnativeAddressable
-from .models.knative_condition import KnativeCondition
-from .models.knative_url import KnativeURL
-from .models.knative_volatile_time import KnativeVolatileTime
-from .models.net_url_userinfo import NetUrlUserinfo
-from .models.v1beta1_art_explainer_spec import V1beta1ARTExplainerSpec
-from .models.v1beta1_batcher import V1beta1Batcher
-from .models.v1beta1_component_extension_spec import V1beta1ComponentExtensionSpec
-from .models.v1beta1_component_status_spec import V1beta1ComponentStatusSpec
-from .models.v1beta1_custom_explainer import V1beta1CustomExplainer
-from .models.v1beta1_custom_predictor import V1beta1CustomPredictor
-from .models.v1beta1_custom_transformer import V1beta1CustomTransformer
-from .models.v1beta1_deploy_config import V1beta1DeployConfig
-from .models.v1beta1_explainer_config import V1beta1ExplainerConfig
-from .models.v1beta1_explainer_extension_spec import V1beta1ExplainerExtensionSpec
-from .models.v1beta1_explainer_spec import V1beta1ExplainerSpec
-from .models.v1beta1_explainers_config import V1beta1ExplainersConfig
-from .models.v1beta1_inference_service import V1beta1InferenceService
-from .models.v1beta1_inference_service_list import V1beta1InferenceServiceList
-from .models.v1beta1_inference_service_spec import V1beta1InferenceServiceSpec
-from .models.v1beta1_inference_service_status import V1beta1InferenceServiceStatus
-from .models.v1beta1_inference_services_config import V1beta1InferenceServicesConfig
-from .models.v1beta1_ingress_config import V1beta1IngressConfig
-from .models.v1beta1_light_gbm_spec import V1beta1LightGBMSpec
-from .models.v1beta1_logger_spec import V1beta1LoggerSpec
-from .models.v1beta1_model_format import V1beta1ModelFormat
-from .models.v1beta1_model_spec import V1beta1ModelSpec
-from .models.v1beta1_onnx_runtime_spec import V1beta1ONNXRuntimeSpec
-from .models.v1beta1_pmml_spec import V1beta1PMMLSpec
-from .models.v1beta1_paddle_server_spec import V1beta1PaddleServerSpec
-from .models.v1beta1_pod_spec import V1beta1PodSpec
-from .models.v1beta1_predictor_config import V1beta1PredictorConfig
-from .models.v1beta1_predictor_extension_spec import V1beta1PredictorExtensionSpec
-from .models.v1beta1_predictor_protocols import V1beta1PredictorProtocols
-from .models.v1beta1_predictor_spec import V1beta1PredictorSpec
-from .models.v1beta1_predictors_config import V1beta1PredictorsConfig
-from .models.v1beta1_sk_learn_spec import V1beta1SKLearnSpec
-from .models.v1beta1_tf_serving_spec import V1beta1TFServingSpec
-from .models.v1beta1_torch_serve_spec import V1beta1TorchServeSpec
-from .models.v1beta1_transformer_config import V1beta1TransformerConfig
-from .models.v1beta1_transformer_spec import V1beta1TransformerSpec
-from .models.v1beta1_transformers_config import V1beta1TransformersConfig
-from .models.v1beta1_triton_spec import V1beta1TritonSpec
-from .models.v1beta1_xg_boost_spec import V1beta1XGBoostSpec
-from .models.v1beta1_storage_spec import V1beta1StorageSpec
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
@@ -0,0 +1,150 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from .constants.constants import QUEUE_TIMEOUT_HEADER
+from .errors import InvalidInput, ModelOverloaded
+from .metrics import REQUEST_IN_FLIGHT, REQUEST_QUEUE_DEPTH, get_labels
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        model_name: str,
+        max_concurrency: Optional[int] = None,
+        max_queue_depth: Optional[int] = None,
+    ):
+        """Limits the number of in-flight inference requests of a model.
+
+        Up to ``max_concurrency`` requests run at the same time, the next ones wait in a FIFO queue holding at
+        most ``max_queue_depth`` requests. Requests arriving when the queue is full, or waiting longer than
+        their queue timeout, are shed with ``ModelOverloaded`` instead of adding to the latency of the others.
+
+        Args:
+            model_name: The name of the model, used for the error messages and the metric labels.
+            max_concurrency: The max number of requests running at the same time. Unlimited if not set.
+            max_queue_depth: The max number of requests waiting to run. Unbounded if not set.
+        """
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        prom_labels = get_labels(model_name)
+        self._in_flight_gauge = REQUEST_IN_FLIGHT.labels(**prom_labels)
+        self._queue_depth_gauge = REQUEST_QUEUE_DEPTH.labels(**prom_labels)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests admitted and not yet completed."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests waiting to be admitted."""
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def admit(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """Wait for the request to be admitted and hold its slot for the duration of the block.
+
+        Args:
+            timeout: The max time in seconds the request waits in the queue. Unlimited if not set.
+
+        Raises:
+            ModelOverloaded: If the queue is full or the request waited longer than the timeout.
+        """
+        await self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, timeout: Optional[float] = None):
+        if self.max_concurrency is None or (
+            self._in_flight < self.max_concurrency and not self._waiters
+        ):
+            self._in_flight += 1
+            self._in_flight_gauge.set(self._in_flight)
+            return
+        if (
+            self.max_queue_depth is not None
+            and len(self._waiters) >= self.max_queue_depth
+        ):
+            raise ModelOverloaded(
+                self.model_name,
+                f"{len(self._waiters)} requests are already waiting in the queue.",
+            )
+        if timeout is not None and timeout <= 0:
+            raise ModelOverloaded(
+                self.model_name, "The request deadline expired before it was queued."
+            )
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queue_depth_gauge.set(len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the request timed out or was cancelled, pass it on.
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._queue_depth_gauge.set(len(self._waiters))
+            if isinstance(e, asyncio.TimeoutError):
+                raise ModelOverloaded(
+                    self.model_name,
+                    f"The request waited in the queue for longer than {timeout * 1000:.0f} ms.",
+                )
+            raise
+
+    def release(self):
+        # Hand the slot over to the oldest waiting request, the in-flight count doesn't change.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            self._queue_depth_gauge.set(len(self._waiters))
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+        self._in_flight_gauge.set(self._in_flight)
+
+
+def get_queue_timeout(headers: Optional[Dict[str, str]]) -> Optional[float]:
+    """Get the max time in seconds a request may wait for admission from the request headers.
+
+    Args:
+        headers: Request headers.
+
+    Returns:
+        The queue timeout in seconds, or None if the header is not set.
+
+    Raises:
+        InvalidInput: If the header value is not a number.
+    """
+    if not headers:
+        return None
+    value = headers.get(QUEUE_TIMEOUT_HEADER)
+    if value is None:
+        return None
+    try:
+        return float(value) / 1000
+    except ValueError:
+        raise InvalidInput(
+            f"invalid {QUEUE_TIMEOUT_HEADER} header: {value} is not a number"
+        )
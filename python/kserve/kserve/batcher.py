@@ -0,0 +1,354 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from .errors import InferenceError
+from .logging import logger
+from .metrics import BATCH_QUEUE_HIST_TIME, BATCH_SIZE_HIST, get_labels
+from .protocol.infer_type import (
+    InferInput,
+    InferOutput,
+    InferRequest,
+    InferResponse,
+    to_http_parameters,
+)
+from .utils.utils import generate_uuid
+
+BatchPayload = Union[Dict, InferRequest]
+BatchHandler = Callable[
+    [BatchPayload, Optional[Dict[str, str]]], Awaitable[Union[Dict, InferResponse]]
+]
+
+# The headers which change how a payload is interpreted, only requests with the same values are batched
+# together. The other headers, e.g. the tracing and proxy headers, are ignored.
+BATCH_KEY_HEADERS = ("content-type", "ce-specversion", "ce-datacontenttype")
+
+
+class _PendingRequest:
+    def __init__(
+        self,
+        payload: BatchPayload,
+        headers: Optional[Dict[str, str]],
+        batch_size: int,
+        future: asyncio.Future,
+    ):
+        self.payload = payload
+        self.headers = headers
+        self.batch_size = batch_size
+        self.future = future
+        self.enqueue_time = time.time()
+
+
+class DynamicBatcher:
+    def __init__(
+        self,
+        model_name: str,
+        handler: BatchHandler,
+        max_batch_size: int,
+        max_latency_ms: float,
+    ):
+        """Coalesces concurrent predict requests for a model into a single batched call.
+
+        Requests are queued until ``max_batch_size`` instances have accumulated or the oldest queued request
+        has waited for ``max_latency_ms``. The queued inputs are then concatenated along the first (batch)
+        dimension, the handler is invoked once and the outputs are split back to each caller.
+        Only requests with the same input names, datatypes, trailing dimensions and parameters are
+        batched together; payloads that can't be batched are passed to the handler as-is. The requests of a
+        batch must also have the same ``BATCH_KEY_HEADERS``; the handler gets the headers of the first
+        request of the batch.
+
+        Args:
+            model_name: The name of the model, used for the metric labels.
+            handler: The coroutine function running the inference for a (batched) payload.
+            max_batch_size: The max number of instances in a batch.
+            max_latency_ms: The max time in milliseconds a request waits for the batch to fill up.
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self._handler = handler
+        self._pending: List[_PendingRequest] = []
+        self._pending_size = 0
+        self._pending_key: Optional[Tuple] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(
+        self, payload: BatchPayload, headers: Optional[Dict[str, str]] = None
+    ) -> Union[Dict, InferResponse]:
+        """Queue the payload for the next batch and wait for its share of the batched result.
+
+        Args:
+            payload: The decoded request body, a v1 ``Dict`` or an ``InferRequest``.
+            headers: Request headers.
+
+        Returns:
+            The inference result for this payload.
+        """
+        batch_key = get_batch_key(payload, headers)
+        if batch_key is None:
+            return await self._handler(payload, headers)
+        key, batch_size = batch_key
+        if batch_size >= self.max_batch_size:
+            return await self._handler(payload, headers)
+
+        if self._pending and (
+            key != self._pending_key
+            or self._pending_size + batch_size > self.max_batch_size
+        ):
+            self._flush()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_PendingRequest(payload, headers, batch_size, future))
+        self._pending_key = key
+        self._pending_size += batch_size
+        if self._pending_size >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_latency_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = []
+        self._pending_size = 0
+        self._pending_key = None
+        task = asyncio.ensure_future(self._run_batch(batch))
+        # Keep a reference to the task so that it is not garbage collected before completion.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[_PendingRequest]):
+        prom_labels = get_labels(self.model_name)
+        start = time.time()
+        for request in batch:
+            BATCH_QUEUE_HIST_TIME.labels(**prom_labels).observe(
+                start - request.enqueue_time
+            )
+        sizes = [request.batch_size for request in batch]
+        BATCH_SIZE_HIST.labels(**prom_labels).observe(sum(sizes))
+        try:
+            if len(batch) == 1:
+                results = [await self._handler(batch[0].payload, batch[0].headers)]
+            else:
+                payloads = [request.payload for request in batch]
+                response = await self._handler(
+                    merge_payloads(payloads), batch[0].headers
+                )
+                results = split_response(response, payloads, sizes)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        logger.debug(
+            f"model {self.model_name} ran a batch of {len(batch)} requests "
+            f"with {sum(sizes)} instances"
+        )
+        for request, result in zip(batch, results):
+            if not request.future.done():
+                request.future.set_result(result)
+
+
+def get_batch_key(
+    payload: BatchPayload, headers: Optional[Dict[str, str]] = None
+) -> Optional[Tuple[Tuple, int]]:
+    """Get the batch compatibility key and the number of instances of a payload.
+
+    Args:
+        payload: The decoded request body.
+        headers: Request headers.
+
+    Returns:
+        A tuple of the compatibility key and the batch size, or None if the payload can't be batched.
+    """
+    if isinstance(payload, InferRequest):
+        if not payload.inputs:
+            return None
+        batch_size = None
+        inputs_key = []
+        for infer_input in payload.inputs:
+            shape = list(infer_input.shape)
+            if len(shape) == 0 or (batch_size is not None and shape[0] != batch_size):
+                return None
+            batch_size = shape[0]
+            inputs_key.append(
+                (
+                    infer_input.name,
+                    infer_input.datatype,
+                    tuple(shape[1:]),
+                    infer_input._raw_data is not None,
+                    _parameters_key(infer_input.parameters),
+                )
+            )
+        if batch_size <= 0:
+            return None
+        key = (
+            "v2",
+            payload.model_name,
+            payload.from_grpc,
+            payload.use_binary_outputs,
+            _parameters_key(payload.parameters),
+            tuple(inputs_key),
+            _headers_key(headers),
+        )
+        return key, batch_size
+    if (
+        isinstance(payload, dict)
+        and list(payload.keys()) == ["instances"]
+        and isinstance(payload["instances"], list)
+        and len(payload["instances"]) > 0
+    ):
+        return ("v1", _headers_key(headers)), len(payload["instances"])
+    return None
+
+
+def _headers_key(headers: Optional[Dict[str, str]]) -> Tuple:
+    values = {name.lower(): value for name, value in (headers or {}).items()}
+    return tuple(values.get(name) for name in BATCH_KEY_HEADERS)
+
+
+def _parameters_key(parameters) -> Tuple:
+    if not parameters:
+        return ()
+    params = to_http_parameters(parameters)
+    params.pop("binary_data_size", None)
+    return tuple(sorted((key, repr(val)) for key, val in params.items()))
+
+
+def merge_payloads(payloads: List[BatchPayload]) -> BatchPayload:
+    """Concatenate compatible payloads along the batch dimension.
+
+    Args:
+        payloads: The payloads sharing the same batch key.
+
+    Returns:
+        The merged payload.
+    """
+    first = payloads[0]
+    if isinstance(first, dict):
+        instances = []
+        for payload in payloads:
+            instances.extend(payload["instances"])
+        return {"instances": instances}
+
+    infer_inputs = []
+    for i, first_input in enumerate(first.inputs):
+        tensor = np.concatenate(
+            [payload.inputs[i].as_numpy() for payload in payloads], axis=0
+        )
+        infer_input = InferInput(
+            name=first_input.name,
+            shape=list(tensor.shape),
+            datatype=first_input.datatype,
+            parameters=dict(first_input.parameters) if first_input.parameters else None,
+        )
+        infer_input.set_data_from_numpy(
+            tensor, binary_data=first_input._raw_data is not None
+        )
+        infer_inputs.append(infer_input)
+    return InferRequest(
+        model_name=first.model_name,
+        infer_inputs=infer_inputs,
+        request_id=first.id,
+        raw_inputs=(
+            [infer_input._raw_data for infer_input in infer_inputs]
+            if first.use_binary_outputs
+            else None
+        ),
+        from_grpc=first.from_grpc,
+        parameters=first.parameters,
+    )
+
+
+def split_response(
+    response: Union[Dict, InferResponse],
+    payloads: List[BatchPayload],
+    sizes: List[int],
+) -> List[Union[Dict, InferResponse]]:
+    """Split a batched response back to the requests it was created from.
+
+    Args:
+        response: The response of the batched inference.
+        payloads: The original payloads in batch order.
+        sizes: The number of instances of each payload.
+
+    Returns:
+        A list with one response per payload.
+
+    Raises:
+        InferenceError: If the response can't be split along the batch dimension.
+    """
+    total = sum(sizes)
+    offsets = np.cumsum(sizes)[:-1]
+    if isinstance(response, dict):
+        predictions = response.get("predictions")
+        if not isinstance(predictions, list) or len(predictions) != total:
+            raise InferenceError(
+                f"cannot split batched response: expected {total} predictions"
+            )
+        results = []
+        start = 0
+        for size in sizes:
+            results.append(
+                {**response, "predictions": predictions[start : start + size]}
+            )
+            start += size
+        return results
+
+    if not isinstance(response, InferResponse):
+        raise InferenceError(
+            f"cannot split batched response of type {type(response).__name__}"
+        )
+    outputs_per_request: List[List[InferOutput]] = [[] for _ in payloads]
+    for output in response.outputs:
+        tensor = output.as_numpy()
+        if tensor.ndim == 0 or tensor.shape[0] != total:
+            raise InferenceError(
+                f"cannot split batched output {output.name} with shape {list(tensor.shape)}: "
+                f"expected batch dimension of {total}"
+            )
+        for i, chunk in enumerate(np.split(tensor, offsets)):
+            infer_output = InferOutput(
+                name=output.name,
+                shape=list(chunk.shape),
+                datatype=output.datatype,
+                parameters=dict(output.parameters) if output.parameters else None,
+            )
+            infer_output.set_data_from_numpy(
+                chunk, binary_data=payloads[i].use_binary_outputs
+            )
+            outputs_per_request[i].append(infer_output)
+    return [
+        InferResponse(
+            response_id=payload.id if payload.id else generate_uuid(),
+            model_name=response.model_name,
+            infer_outputs=outputs,
+            model_version=response.model_version,
+            from_grpc=response.from_grpc,
+            parameters=response.parameters,
+        )
+        for payload, outputs in zip(payloads, outputs_per_request)
+    ]
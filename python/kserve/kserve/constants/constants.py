@@ -66,6 +66,13 @@ GRPC_CONTENT_DATATYPE_MAPPINGS = {
     "FP64": "fp64_contents",
     "BYTES": "bytes_contents",
 }
+# REST binary tensor data extension header
+INFERENCE_CONTENT_LENGTH_HEADER = "inference-header-content-length"
+# Max time in milliseconds a request waits for admission when the model is at its max concurrency
+QUEUE_TIMEOUT_HEADER = "x-kserve-queue-timeout-ms"
+# Set to true to skip the response cache for a request
+CACHE_BYPASS_HEADER = "x-kserve-cache-bypass"
+
 # K8S status key constants
 OBSERVED_GENERATION = "observedGeneration"
 
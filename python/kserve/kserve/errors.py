@@ -88,6 +88,22 @@ class ModelNotReady(RuntimeError):
         return self.error_msg
 
 
+class ModelOverloaded(RuntimeError):
+    """
+    Exception class indicating the model can't accept more requests.
+    HTTP Servers should return HTTP_503 (Service Unavailable), gRPC servers RESOURCE_EXHAUSTED.
+    """
+
+    def __init__(self, model_name: str, detail: str = None):
+        self.model_name = model_name
+        self.error_msg = f"Model with name {self.model_name} is overloaded."
+        if detail:
+            self.error_msg = self.error_msg + " " + detail
+
+    def __str__(self):
+        return self.error_msg
+
+
 async def exception_handler(_, exc):
     logger.error("Exception:", exc_info=exc)
     return JSONResponse(
@@ -132,3 +148,10 @@ async def not_implemented_error_handler(_, exc):
     return JSONResponse(
         status_code=HTTPStatus.NOT_IMPLEMENTED, content={"error": str(exc)}
     )
+
+
+async def model_overloaded_handler(_, exc):
+    logger.warning(str(exc))
+    return JSONResponse(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE, content={"error": str(exc)}
+    )
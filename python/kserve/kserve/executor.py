@@ -0,0 +1,146 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from .errors import ModelOverloaded
+from .logging import logger
+
+# The models served by the process pools, looked up by name in the forked worker processes
+# so that the model object doesn't need to be pickled for every call.
+_process_models: Dict[str, Any] = {}
+
+
+class ExecutionPolicy(str, Enum):
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+def set_default_executor(max_workers: int):
+    """Set a thread pool of ``max_workers`` threads as the default executor of the running event loop.
+
+    The synchronous handlers of the models with the ``thread`` policy run in this pool unless they set their
+    own number of workers.
+
+    Args:
+        max_workers: The max number of threads of the pool.
+    """
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kserve-asyncio")
+    )
+
+
+def _run_model_handler(model_name: str, handler_name: str, *args):
+    return getattr(_process_models[model_name], handler_name)(*args)
+
+
+class HandlerExecutor:
+    def __init__(
+        self,
+        model: Any,
+        policy: ExecutionPolicy = ExecutionPolicy.THREAD,
+        max_workers: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+    ):
+        """Runs the synchronous handlers of a model according to its execution policy.
+
+        With the ``inline`` policy the handlers run on the event loop. With the ``thread`` policy they run in a
+        thread pool, the event loop default executor unless ``max_workers`` is set. With the ``process`` policy
+        they run in a pool of forked processes, each holding a copy of the model, so the handler arguments and
+        results must be picklable. When ``max_queue_size`` calls are already queued or running, the new calls
+        are rejected with ``ModelOverloaded``.
+
+        Args:
+            model: The model whose handlers are executed.
+            policy: The execution policy.
+            max_workers: The max number of threads or processes of the pool.
+            max_queue_size: The max number of calls queued or running in the pool. Unbounded if not set.
+        """
+        self.model = model
+        self.policy = ExecutionPolicy(policy)
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """The number of calls queued or running in the pool."""
+        return self._pending
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self._executor is None:
+            if self.policy == ExecutionPolicy.PROCESS:
+                # The workers are forked on demand and inherit the registered model.
+                _process_models[self.model.name] = self.model
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                )
+            elif self.max_workers is not None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"{self.model.name}-handler",
+                )
+        return self._executor
+
+    async def run(self, handler_name: str, *args) -> Any:
+        """Run a synchronous handler of the model.
+
+        Args:
+            handler_name: The name of the model method, e.g. ``predict``.
+            args: The handler arguments.
+
+        Returns:
+            The handler result.
+
+        Raises:
+            ModelOverloaded: If the queue of the pool is full.
+        """
+        if self.policy == ExecutionPolicy.INLINE:
+            return getattr(self.model, handler_name)(*args)
+        if self.max_queue_size is not None and self._pending >= self.max_queue_size:
+            raise ModelOverloaded(
+                self.model.name,
+                f"{self._pending} requests are already queued for execution.",
+            )
+        if self.policy == ExecutionPolicy.PROCESS:
+            call = functools.partial(
+                _run_model_handler, self.model.name, handler_name, *args
+            )
+        else:
+            call = functools.partial(getattr(self.model, handler_name), *args)
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        """Shut down the pool without waiting for the running calls."""
+        if self._executor is not None:
+            logger.info(
+                f"Shutting down the handler executor of model {self.model.name}"
+            )
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if _process_models.get(self.model.name) is self.model:
+            del _process_models[self.model.name]
@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from prometheus_client import Histogram
+from prometheus_client import Counter, Gauge, Histogram
 from pydantic import BaseModel
 
 PROM_LABELS = ["model_name"]
@@ -28,6 +28,67 @@ PREDICT_HIST_TIME = Histogram(
 EXPLAIN_HIST_TIME = Histogram(
     "request_explain_seconds", "explain request latency", PROM_LABELS
 )
+BATCH_SIZE_HIST = Histogram(
+    "request_batch_size",
+    "number of instances in a dynamically batched predict call",
+    PROM_LABELS,
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+BATCH_QUEUE_HIST_TIME = Histogram(
+    "request_batch_queue_seconds",
+    "time a request waits in the dynamic batching queue",
+    PROM_LABELS,
+)
+REQUEST_IN_FLIGHT = Gauge(
+    "request_in_flight",
+    "number of inference requests admitted and not yet completed",
+    PROM_LABELS,
+)
+REQUEST_QUEUE_DEPTH = Gauge(
+    "request_queue_depth",
+    "number of inference requests waiting for admission",
+    PROM_LABELS,
+)
+RESPONSE_CACHE_HITS = Counter(
+    "response_cache_hits",
+    "number of inference requests served from the response cache",
+    PROM_LABELS,
+)
+RESPONSE_CACHE_MISSES = Counter(
+    "response_cache_misses",
+    "number of cacheable inference requests not found in the response cache",
+    PROM_LABELS,
+)
+MODEL_WARMUP_SECONDS = Gauge(
+    "model_warmup_seconds",
+    "duration of the last warmup of the model before it was served",
+    PROM_LABELS,
+)
+MODEL_WARMUP_FAILURES = Counter(
+    "model_warmup_failures",
+    "number of failed warmups of the model",
+    PROM_LABELS,
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "model_load_seconds",
+    "duration of the last load of the model from the model repository",
+    PROM_LABELS,
+)
+MODEL_RESIDENT_BYTES = Gauge(
+    "model_resident_bytes",
+    "resident memory of the model loaded on demand by a memory aware model repository",
+    PROM_LABELS,
+)
+MODEL_EVICTIONS = Counter(
+    "model_evictions",
+    "number of times the model was unloaded to keep the loaded models within the memory budget",
+    PROM_LABELS,
+)
+MODEL_LOAD_FAILURES = Counter(
+    "model_load_failures",
+    "number of failed loads of the model from the model repository",
+    PROM_LABELS,
+)
 
 
 class LLMStats(BaseModel):
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import inspect
 import time
 from abc import ABC
@@ -20,14 +21,21 @@ from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 import grpc
 import httpx
+import numpy as np
 import orjson
 from cloudevents.http import CloudEvent
 from httpx import HTTPStatusError
 
+from .admission import AdmissionController
+from .batcher import DynamicBatcher
+from .constants.constants import INFERENCE_CONTENT_LENGTH_HEADER
 from .errors import InvalidInput
+from .executor import ExecutionPolicy, HandlerExecutor
 from .logging import logger, trace_logger
 from .metrics import (
     EXPLAIN_HIST_TIME,
+    MODEL_WARMUP_FAILURES,
+    MODEL_WARMUP_SECONDS,
     POST_HIST_TIME,
     PRE_HIST_TIME,
     PREDICT_HIST_TIME,
@@ -35,7 +43,8 @@ from .metrics import (
 )
 from .protocol.grpc import grpc_predict_v2_pb2_grpc
 from .protocol.grpc.grpc_predict_v2_pb2 import ModelInferRequest, ModelInferResponse
-from .protocol.infer_type import InferRequest, InferResponse
+from .protocol.infer_type import InferInput, InferRequest, InferResponse
+from .utils.numpy_codec import to_np_dtype
 
 PREDICTOR_URL_FORMAT = "{0}://{1}/v1/models/{2}:predict"
 EXPLAINER_URL_FORMAT = "{0}://{1}/v1/models/{2}:explain"
@@ -69,6 +78,16 @@ class BaseKServeModel(ABC):
         """
         return self.ready
 
+    def get_resident_bytes(self) -> Optional[int]:
+        """
+        The memory used by the loaded model, which ``MemoryAwareModelRepository`` keeps within its memory
+        budget. Override it when the model knows its size, e.g. from the size of its weights.
+
+        Returns:
+            The size in bytes, or None to let the repository measure the growth of the process memory.
+        """
+        return None
+
     def stop(self):
         """Stop handler can be overridden to perform model teardown"""
         pass
@@ -101,6 +120,7 @@ class PredictorConfig:
         predictor_protocol: str = PredictorProtocol.REST_V1.value,
         predictor_use_ssl: bool = False,
         predictor_request_timeout_seconds: int = 600,
+        predictor_grpc_use_typed_contents: bool = False,
     ):
         """The configuration for the http call to the predictor
 
@@ -109,11 +129,14 @@ class PredictorConfig:
             predictor_protocol: The inference protocol used for predictor http call
             predictor_use_ssl: Enable using ssl for http connection to the predictor
             predictor_request_timeout_seconds: The request timeout seconds for the predictor http call
+            predictor_grpc_use_typed_contents: Send the gRPC inputs in the typed contents fields
+                                               instead of raw_input_contents
         """
         self.predictor_host = predictor_host
         self.predictor_protocol = predictor_protocol
         self.predictor_use_ssl = predictor_use_ssl
         self.predictor_request_timeout_seconds = predictor_request_timeout_seconds
+        self.predictor_grpc_use_typed_contents = predictor_grpc_use_typed_contents
 
 
 class Model(BaseKServeModel):
@@ -146,10 +169,45 @@ class Model(BaseKServeModel):
             else 600
         )
         self.use_ssl = predictor_config.predictor_use_ssl if predictor_config else False
+        self.grpc_use_typed_contents = (
+            predictor_config.predictor_grpc_use_typed_contents
+            if predictor_config
+            else False
+        )
         self.explainer_host = None
         self._http_client_instance = None
         self._grpc_client_stub = None
         self.enable_latency_logging = False
+        # Dynamic batching is disabled unless max_batch_size is set to a value greater than 1.
+        self.max_batch_size: Optional[int] = None
+        self.max_latency_ms: float = 5
+        self._batcher: Optional[DynamicBatcher] = None
+        # Synchronous handlers run in a thread pool unless another execution policy is set.
+        self.execution_policy: Optional[ExecutionPolicy] = None
+        self.max_execution_workers: Optional[int] = None
+        self.max_execution_queue_size: Optional[int] = None
+        self._executor: Optional[HandlerExecutor] = None
+        # Admission control is disabled unless max_concurrency is set.
+        self.max_concurrency: Optional[int] = None
+        self.max_queue_depth: Optional[int] = None
+        self._admission_controller: Optional[AdmissionController] = None
+        # The warmup requests run through the handlers before the model is served, see warmup().
+        self.warmup_inputs: Optional[List[Union[Dict, InferRequest]]] = None
+        self.enable_warmup: Optional[bool] = None
+        self.warmup_iterations: int = 1
+
+    @property
+    def admission_controller(self) -> Optional[AdmissionController]:
+        """The admission controller limiting the in-flight requests, or None if max_concurrency is not set."""
+        if self.max_concurrency is None:
+            return None
+        if self._admission_controller is None:
+            self._admission_controller = AdmissionController(
+                self.name,
+                max_concurrency=self.max_concurrency,
+                max_queue_depth=self.max_queue_depth,
+            )
+        return self._admission_controller
 
     async def __call__(
         self,
@@ -167,6 +225,32 @@ class Model(BaseKServeModel):
         Returns:
             Response output from preprocess -> predict/generate/explain -> postprocess
         """
+        if (
+            verb == InferenceVerb.PREDICT
+            and self.max_batch_size is not None
+            and self.max_batch_size > 1
+        ):
+            return await self._get_batcher().submit(body, headers)
+        return await self._infer(body, verb, headers)
+
+    def _get_batcher(self) -> DynamicBatcher:
+        if self._batcher is None:
+            self._batcher = DynamicBatcher(
+                self.name,
+                lambda payload, headers: self._infer(
+                    payload, InferenceVerb.PREDICT, headers
+                ),
+                max_batch_size=self.max_batch_size,
+                max_latency_ms=self.max_latency_ms,
+            )
+        return self._batcher
+
+    async def _infer(
+        self,
+        body: Union[Dict, CloudEvent, InferRequest],
+        verb: InferenceVerb = InferenceVerb.PREDICT,
+        headers: Dict[str, str] = None,
+    ) -> Union[Dict, InferResponse, List[str]]:
         request_id = headers.get("x-request-id", "N.A.") if headers else "N.A."
 
         # latency vars
@@ -178,41 +262,25 @@ class Model(BaseKServeModel):
 
         with PRE_HIST_TIME.labels(**prom_labels).time():
             start = time.time()
-            payload = (
-                await self.preprocess(body, headers)
-                if inspect.iscoroutinefunction(self.preprocess)
-                else self.preprocess(body, headers)
-            )
+            payload = await self._run_handler("preprocess", body, headers)
             preprocess_ms = get_latency_ms(start, time.time())
         payload = self.validate(payload)
         if verb == InferenceVerb.EXPLAIN:
             with EXPLAIN_HIST_TIME.labels(**prom_labels).time():
                 start = time.time()
-                response = (
-                    (await self.explain(payload, headers))
-                    if inspect.iscoroutinefunction(self.explain)
-                    else self.explain(payload, headers)
-                )
+                response = await self._run_handler("explain", payload, headers)
                 explain_ms = get_latency_ms(start, time.time())
         elif verb == InferenceVerb.PREDICT:
             with PREDICT_HIST_TIME.labels(**prom_labels).time():
                 start = time.time()
-                response = (
-                    (await self.predict(payload, headers))
-                    if inspect.iscoroutinefunction(self.predict)
-                    else self.predict(payload, headers)
-                )
+                response = await self._run_handler("predict", payload, headers)
                 predict_ms = get_latency_ms(start, time.time())
         else:
             raise NotImplementedError
 
         with POST_HIST_TIME.labels(**prom_labels).time():
             start = time.time()
-            response = (
-                await self.postprocess(response, headers)
-                if inspect.iscoroutinefunction(self.postprocess)
-                else self.postprocess(response, headers)
-            )
+            response = await self._run_handler("postprocess", response, headers)
             postprocess_ms = get_latency_ms(start, time.time())
 
         if self.enable_latency_logging is True:
@@ -224,6 +292,33 @@ class Model(BaseKServeModel):
 
         return response
 
+    async def _run_handler(self, handler_name: str, *args) -> Any:
+        handler = getattr(self, handler_name)
+        if inspect.iscoroutinefunction(handler):
+            return await handler(*args)
+        # Synchronous handlers run according to the execution policy, off the event loop by default.
+        return await self._get_executor().run(handler_name, *args)
+
+    def _get_executor(self) -> HandlerExecutor:
+        if self._executor is None:
+            self._executor = HandlerExecutor(
+                self,
+                policy=self.execution_policy or ExecutionPolicy.THREAD,
+                max_workers=self.max_execution_workers,
+                max_queue_size=self.max_execution_queue_size,
+            )
+        return self._executor
+
+    def stop(self):
+        """Stop handler can be overridden to perform model teardown"""
+        self._shutdown_executor()
+
+    def _shutdown_executor(self):
+        # Also called by the model repository when the model is unloaded, for the models overriding stop.
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     @property
     def _http_client(self):
         if self._http_client_instance is None:
@@ -276,6 +371,81 @@ class Model(BaseKServeModel):
         self.ready = True
         return self.ready
 
+    def get_warmup_requests(self) -> List[Union[Dict, InferRequest]]:
+        """Get the requests the model is warmed up with, can be overridden to provide samples of real traffic.
+
+        Returns:
+            The ``warmup_inputs`` if set, otherwise requests synthesized from ``get_input_types`` when
+            ``enable_warmup`` is set, one zero filled tensor per input. An empty list disables the warmup.
+        """
+        if self.warmup_inputs:
+            return self.warmup_inputs
+        if not self.enable_warmup:
+            return []
+        input_types = self.get_input_types()
+        if not input_types:
+            return []
+        infer_inputs = []
+        for input_type in input_types:
+            # Dynamic dimensions are warmed up with a size of 1.
+            shape = [dim if dim > 0 else 1 for dim in input_type.get("shape", [1])]
+            datatype = input_type["datatype"]
+            if datatype == "BYTES":
+                data = np.full(shape, b"", dtype=np.object_)
+            else:
+                data = np.zeros(shape, dtype=to_np_dtype(datatype))
+            infer_input = InferInput(
+                name=input_type["name"], shape=shape, datatype=datatype
+            )
+            infer_input.set_data_from_numpy(data, binary_data=False)
+            infer_inputs.append(infer_input)
+        return [
+            InferRequest(
+                model_name=self.name, infer_inputs=infer_inputs, request_id="warmup"
+            )
+        ]
+
+    async def warmup(self) -> Optional[float]:
+        """Run the warmup requests through ``preprocess``, ``predict`` and ``postprocess``, so that the JIT
+        compilation, the lazy initialization and the first allocations don't add to the latency of the first
+        requests. The model is not ready while it warms up, a failed warmup is logged and counted in
+        ``model_warmup_failures`` and doesn't prevent the model from being served.
+
+        Returns:
+            The warmup duration in seconds, or None if the model has no warmup requests.
+        """
+        requests = self.get_warmup_requests()
+        if not requests:
+            return None
+        ready = self.ready
+        self.ready = False
+        start = time.perf_counter()
+        try:
+            for _ in range(self.warmup_iterations):
+                for request in requests:
+                    # The handlers may modify the request, each run gets its own copy.
+                    payload = await self._run_handler(
+                        "preprocess", copy.deepcopy(request), {}
+                    )
+                    payload = self.validate(payload)
+                    response = await self._run_handler("predict", payload, {})
+                    await self._run_handler("postprocess", response, {})
+        except Exception as e:
+            duration = time.perf_counter() - start
+            MODEL_WARMUP_FAILURES.labels(**get_labels(self.name)).inc()
+            logger.warning(
+                f"Warmup of model {self.name} failed after {duration:.3f} seconds: {e}"
+            )
+            return duration
+        finally:
+            self.ready = ready
+        duration = time.perf_counter() - start
+        MODEL_WARMUP_SECONDS.labels(**get_labels(self.name)).set(duration)
+        logger.info(
+            f"Model {self.name} warmed up with {len(requests)} requests in {duration:.3f} seconds"
+        )
+        return duration
+
     def get_input_types(self) -> List[Dict]:
         # Override this function to return appropriate input format expected by your model.
         # Refer https://kserve.github.io/website/0.9/modelserving/inference_api/#model-metadata-response-json-object
@@ -326,7 +496,7 @@ class Model(BaseKServeModel):
 
     async def _http_predict(
         self, payload: Union[Dict, InferRequest], headers: Dict[str, str] = None
-    ) -> Dict:
+    ) -> Union[Dict, InferResponse]:
         protocol = "https" if self.use_ssl else "http"
         predict_url = PREDICTOR_URL_FORMAT.format(
             protocol, self.predictor_host, self.name
@@ -345,8 +515,8 @@ class Model(BaseKServeModel):
             if "x-b3-traceid" in headers:
                 predict_headers["x-b3-traceid"] = headers["x-b3-traceid"]
         if isinstance(payload, InferRequest):
-            payload = payload.to_rest()
-        data = orjson.dumps(payload)
+            payload = payload.to_rest(numpy_data=True)
+        data = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
 
         try:
             response = await self._http_client.post(
@@ -375,6 +545,11 @@ class Model(BaseKServeModel):
                     error_message = error_message["error"]
             message = message.format(response, error_message=error_message)
             raise HTTPStatusError(message, request=response.request, response=response)
+        if INFERENCE_CONTENT_LENGTH_HEADER in response.headers:
+            return InferResponse.from_bytes(
+                response.content,
+                int(response.headers[INFERENCE_CONTENT_LENGTH_HEADER]),
+            )
         return orjson.loads(response.content)
 
     async def _grpc_predict(
@@ -383,7 +558,7 @@ class Model(BaseKServeModel):
         headers: Dict[str, str] = None,
     ) -> ModelInferResponse:
         if isinstance(payload, InferRequest):
-            payload = payload.to_grpc()
+            payload = payload.to_grpc(use_typed_contents=self.grpc_use_typed_contents)
         async_result = await self._grpc_client.ModelInfer(
             request=payload,
             timeout=self.timeout,
@@ -420,6 +595,8 @@ class Model(BaseKServeModel):
             return InferResponse.from_grpc(res)
         else:
             res = await self._http_predict(payload, headers)
+            if isinstance(res, InferResponse):
+                return res
             # return an InferResponse if this is REST V2, otherwise just return the dictionary
             return (
                 InferResponse.from_rest(self.name, res)
@@ -450,7 +627,9 @@ class Model(BaseKServeModel):
             protocol, self.explainer_host, self.name
         )
         response = await self._http_client.post(
-            url=explain_url, timeout=self.timeout, content=orjson.dumps(payload)
+            url=explain_url,
+            timeout=self.timeout,
+            content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
         )
 
         response.raise_for_status()
@@ -12,14 +12,36 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import concurrent.futures
+import functools
 import os
-from typing import Dict, Optional, Union
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Optional, Set, Union
 
-from ray.serve.handle import DeploymentHandle
+import psutil
 
-from .model import BaseKServeModel
+from .logging import logger
+from .metrics import (
+    MODEL_EVICTIONS,
+    MODEL_LOAD_FAILURES,
+    MODEL_LOAD_SECONDS,
+    MODEL_RESIDENT_BYTES,
+    get_labels,
+)
+from .model import BaseKServeModel, Model
+from .response_cache import ResponseCache
+from .utils import utils
+
+if TYPE_CHECKING:
+    from ray.serve.handle import DeploymentHandle
 
 MODEL_MOUNT_DIRS = "/mnt/models"
+MODEL_LOAD_WORKERS_ENV = "MODEL_LOAD_WORKERS"
+MODEL_MEMORY_BUDGET_ENV = "MODEL_MEMORY_BUDGET_BYTES"
 
 
 class ModelRepository:
@@ -31,27 +53,180 @@ class ModelRepository:
         https://github.com/triton-inference-server/server/blob/main/docs/protocol/extension_model_repository.md
     """
 
-    def __init__(self, models_dir: str = MODEL_MOUNT_DIRS):
-        self.models: Dict[str, Union[BaseKServeModel, DeploymentHandle]] = {}
+    def __init__(
+        self, models_dir: str = MODEL_MOUNT_DIRS, load_workers: Optional[int] = None
+    ):
+        """
+        Args:
+            models_dir: The directory with a subdirectory per model.
+            load_workers: The maximum number of models loaded concurrently by ``load_models``.
+                Default: the ``MODEL_LOAD_WORKERS`` environment variable, or ``min(32, cpu_count + 4)``.
+        """
+        # The models are replaced rather than modified when a model is added or removed, so that the
+        # requests iterating over them are not affected by the models being loaded in the background.
+        self.models: Dict[str, Union[BaseKServeModel, "DeploymentHandle"]] = {}
         self.models_dir = models_dir
+        # The cached responses of a model are invalidated when it is updated or unloaded.
+        self.response_cache: Optional[ResponseCache] = None
+        if load_workers is None:
+            load_workers = int(
+                os.getenv(MODEL_LOAD_WORKERS_ENV, min(32, utils.cpu_count() + 4))
+            )
+        self.load_workers = load_workers
+        # The load time in seconds and the load error of the models loaded by load_models.
+        self.load_times: Dict[str, float] = {}
+        self.load_errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load_futures: Dict[str, concurrent.futures.Future] = {}
+        # The on-demand loads in progress, shared by the requests waiting for the same model.
+        self._pending_loads: Dict[str, asyncio.Future] = {}
+        # Called with every model loaded by the repository before it is served, the model server uses it to
+        # apply its settings and warm up the model.
+        self.prepare_model: Optional[Callable[[BaseKServeModel], None]] = None
 
-    def load_models(self):
-        for name in os.listdir(self.models_dir):
-            d = os.path.join(self.models_dir, name)
-            if os.path.isdir(d):
-                self.load_model(name)
+    def load_models(self, wait: bool = True) -> Dict[str, bool]:
+        """Load the models of the models directory concurrently.
+
+        The models are loaded by ``load_model`` on a pool of ``load_workers`` threads. A model is served as
+        soon as it is loaded, and a model failing to load is reported without affecting the others.
+
+        Args:
+            wait: Whether to wait for all the models to be loaded. Otherwise the models keep loading in the
+                background, and ``wait_for_models`` waits for them.
+
+        Returns:
+            Dict[str, bool]: Whether each model is ready, if the models were waited for.
+        """
+        names = sorted(
+            name
+            for name in os.listdir(self.models_dir)
+            if os.path.isdir(os.path.join(self.models_dir, name))
+        )
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(self.load_workers, len(names) or 1)),
+            thread_name_prefix="kserve-model-load",
+        )
+        for name in names:
+            self._load_futures[name] = executor.submit(self._timed_load_model, name)
+        # The queued loads still run after the executor is shut down.
+        executor.shutdown(wait=False)
+        logger.info(
+            f"Loading {len(names)} models with {self.load_workers} workers from {self.models_dir}"
+        )
+        if not wait:
+            return {}
+        return self.wait_for_models()
+
+    def wait_for_models(self) -> Dict[str, bool]:
+        """Wait for the models loaded in the background by ``load_models``.
+
+        Returns:
+            Dict[str, bool]: Whether each model is ready.
+        """
+        results = {
+            name: future.result() for name, future in list(self._load_futures.items())
+        }
+        if self.load_errors:
+            logger.error(
+                f"{len(self.load_errors)} of {len(results)} models failed to load: "
+                f"{', '.join(sorted(self.load_errors))}"
+            )
+        return results
+
+    def _timed_load_model(self, name: str) -> bool:
+        start = time.perf_counter()
+        try:
+            ready = bool(self.load_model(name))
+        except Exception as e:
+            logger.error(f"Failed to load model {name}: {e}", exc_info=True)
+            self.load_errors[name] = str(e)
+            ready = False
+        else:
+            if not ready:
+                self.load_errors[name] = "model is not ready after loading"
+        duration = time.perf_counter() - start
+        self.load_times[name] = duration
+        MODEL_LOAD_SECONDS.labels(**get_labels(name)).set(duration)
+        if ready:
+            self.load_errors.pop(name, None)
+            logger.info(f"Loaded model {name} in {duration:.3f} seconds")
+        else:
+            MODEL_LOAD_FAILURES.labels(**get_labels(name)).inc()
+        return ready
 
     def set_models_dir(self, models_dir):  # used for unit tests
         self.models_dir = models_dir
 
     def get_model(
         self, name: str
-    ) -> Optional[Union[BaseKServeModel, DeploymentHandle]]:
+    ) -> Optional[Union[BaseKServeModel, "DeploymentHandle"]]:
         return self.models.get(name, None)
 
-    def get_models(self) -> Dict[str, Union[BaseKServeModel, DeploymentHandle]]:
+    def get_models(self) -> Dict[str, Union[BaseKServeModel, "DeploymentHandle"]]:
         return self.models
 
+    def has_model(self, name: str) -> bool:
+        """Whether the model is served by the repository, whether or not it is loaded."""
+        return name in self.models
+
+    async def get_or_load_model(
+        self, name: str
+    ) -> Optional[Union[BaseKServeModel, "DeploymentHandle"]]:
+        """Get a model for a request, loading it first if it is not ready.
+
+        The model is loaded on the default executor of the event loop, and the concurrent requests for a
+        model being loaded wait for the same load.
+
+        Args:
+            name: The model name.
+
+        Returns:
+            The model, or None if the repository doesn't have the model.
+        """
+        model = self.get_model(name)
+        if isinstance(model, BaseKServeModel) and not self.is_model_ready(name):
+            await self._load_once(name, functools.partial(self._load_in_place, model))
+        return model
+
+    @asynccontextmanager
+    async def use_model(
+        self, name: str
+    ) -> AsyncIterator[Optional[Union[BaseKServeModel, "DeploymentHandle"]]]:
+        """Get a model for a request like ``get_or_load_model``, and hold it until the request is done.
+
+        Args:
+            name: The model name.
+
+        Yields:
+            The model, or None if the repository doesn't have the model.
+        """
+        yield await self.get_or_load_model(name)
+
+    def _load_in_place(self, model: BaseKServeModel) -> bool:
+        model.load()
+        if model.ready:
+            self._prepare(model)
+        return model.ready
+
+    def _prepare(self, model: BaseKServeModel):
+        if self.prepare_model is not None:
+            self.prepare_model(model)
+
+    async def _load_once(self, name: str, load: Callable[[], bool]) -> bool:
+        pending = self._pending_loads.get(name)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = asyncio.ensure_future(loop.run_in_executor(None, load))
+            self._pending_loads[name] = pending
+
+            def done(_):
+                if self._pending_loads.get(name) is pending:
+                    del self._pending_loads[name]
+
+            pending.add_done_callback(done)
+        # A cancelled request doesn't cancel the load the other requests are waiting for.
+        return await asyncio.shield(pending)
+
     def is_model_ready(self, name: str):
         model = self.get_model(name)
         if not model:
@@ -63,10 +238,20 @@ class ModelRepository:
             return True
 
     def update(self, model: BaseKServeModel):
-        self.models[model.name] = model
+        self._prepare(model)
+        self._set_model(model.name, model)
+
+    def update_handle(self, name: str, model_handle: "DeploymentHandle"):
+        self._set_model(name, model_handle)
 
-    def update_handle(self, name: str, model_handle: DeploymentHandle):
-        self.models[name] = model_handle
+    def _set_model(self, name: str, model: Union[BaseKServeModel, "DeploymentHandle"]):
+        with self._lock:
+            self.models = {**self.models, name: model}
+        self._invalidate_cache(name)
+
+    def _invalidate_cache(self, name: str):
+        if self.response_cache is not None:
+            self.response_cache.invalidate(name)
 
     def load(self, name: str) -> bool:
         pass
@@ -77,8 +262,200 @@ class ModelRepository:
     def unload(self, name: str):
         if name in self.models:
             model = self.models[name]
-            if callable(getattr(model, "stop", None)):
-                model.stop()
-            del self.models[name]
+            try:
+                if callable(getattr(model, "stop", None)):
+                    model.stop()
+            finally:
+                # The handler executor of the models overriding stop without calling it is shut down too.
+                if isinstance(model, Model):
+                    model._shutdown_executor()
+            with self._lock:
+                self.models = {k: v for k, v in self.models.items() if k != name}
+            self._invalidate_cache(name)
         else:
             raise KeyError(f"model {name} does not exist")
+
+
+class MemoryAwareModelRepository(ModelRepository):
+    """Model repository which keeps the loaded models within a memory budget.
+
+    A model is loaded on its first request, by the factory it was registered with or by ``load_model``
+    for a model directory of the models directory. The resident size of a model is the size reported by
+    its ``get_resident_bytes``, otherwise the growth of the resident memory of the process while it loads,
+    so the loads are serialized. The growth underestimates a model loaded after others were unloaded, as
+    the freed memory is rarely returned to the OS, the models should report their size when they can.
+    When the loaded models exceed the memory budget, the least recently used models without requests in
+    flight are unloaded; they are loaded again on their next request. The models added with ``update`` are
+    not accounted and never unloaded.
+    """
+
+    def __init__(
+        self,
+        models_dir: str = MODEL_MOUNT_DIRS,
+        memory_budget_bytes: Optional[int] = None,
+        load_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            models_dir: The directory with a subdirectory per model.
+            memory_budget_bytes: The resident size of the loaded models above which models are unloaded.
+                Default: the ``MODEL_MEMORY_BUDGET_BYTES`` environment variable, otherwise no budget.
+            load_workers: The maximum number of models loaded concurrently by ``load_models``.
+        """
+        super().__init__(models_dir, load_workers)
+        if memory_budget_bytes is None:
+            memory_budget_bytes = int(os.getenv(MODEL_MEMORY_BUDGET_ENV, 0)) or None
+        self.memory_budget_bytes = memory_budget_bytes
+        # The resident size of the models loaded on demand, from the least to the most recently used.
+        self.model_sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._factories: Dict[str, Callable[[], BaseKServeModel]] = {}
+        self._load_lock = threading.Lock()
+        self._resident_lock = threading.Lock()
+        # The number of requests holding each model, see use_model, and the models being unloaded.
+        self._in_flight: Dict[str, int] = {}
+        self._evicting: Set[str] = set()
+
+    def register(self, name: str, factory: Callable[[], BaseKServeModel]):
+        """Register a model loaded on its first request.
+
+        Args:
+            name: The model name.
+            factory: Creates the model, which is then loaded with its ``load`` method.
+        """
+        self._factories[name] = factory
+
+    def has_model(self, name: str) -> bool:
+        return (
+            name in self.models or name in self._factories or self._is_model_dir(name)
+        )
+
+    def _is_model_dir(self, name: str) -> bool:
+        # The model name comes from the request, only a subdirectory of the models directory is a model.
+        if not name or name in (".", "..") or os.path.basename(name) != name:
+            return False
+        if os.path.altsep is not None and os.path.altsep in name:
+            return False
+        return os.path.isdir(os.path.join(self.models_dir, name))
+
+    def is_model_ready(self, name: str):
+        # The models which are not loaded are ready to be loaded by their next request.
+        if name not in self.models:
+            return self.has_model(name)
+        return super().is_model_ready(name)
+
+    async def get_or_load_model(
+        self, name: str
+    ) -> Optional[Union[BaseKServeModel, "DeploymentHandle"]]:
+        model = await self._acquire(name)
+        if model is not None:
+            self._release(name)
+        return model
+
+    @asynccontextmanager
+    async def use_model(
+        self, name: str
+    ) -> AsyncIterator[Optional[Union[BaseKServeModel, "DeploymentHandle"]]]:
+        # The model is not unloaded while a request holds it.
+        model = await self._acquire(name)
+        try:
+            yield model
+        finally:
+            if model is not None:
+                self._release(name)
+
+    async def _acquire(
+        self, name: str
+    ) -> Optional[Union[BaseKServeModel, "DeploymentHandle"]]:
+        while True:
+            model = self.get_model(name)
+            if (
+                model is None
+                or not super().is_model_ready(name)
+                or name in self._evicting
+            ):
+                if not self.has_model(name):
+                    return None
+                await self._load_once(
+                    name, functools.partial(self._load_resident, name)
+                )
+                model = self.get_model(name)
+                if model is None:
+                    return None
+            with self._resident_lock:
+                # The model was evicted by another load after it was loaded, it is loaded again.
+                if name in self._evicting or self.get_model(name) is not model:
+                    continue
+                if name in self.model_sizes:
+                    self.model_sizes.move_to_end(name)
+                self._in_flight[name] = self._in_flight.get(name, 0) + 1
+                return model
+
+    def _release(self, name: str):
+        with self._resident_lock:
+            self._in_flight[name] -= 1
+            if self._in_flight[name] == 0:
+                del self._in_flight[name]
+
+    def _load_resident(self, name: str) -> bool:
+        # The models are evicted under the load lock, so a model being unloaded is loaded again after it.
+        with self._load_lock:
+            process = psutil.Process()
+            rss = process.memory_info().rss
+            model = self.get_model(name)
+            if name in self._factories:
+                model = self._factories[name]()
+                if model.load():
+                    self.update(model)
+            elif isinstance(model, BaseKServeModel):
+                self._load_in_place(model)
+            else:
+                self.load_model(name)
+                model = self.get_model(name)
+            if model is None or not super().is_model_ready(name):
+                return False
+            size = None
+            if isinstance(model, BaseKServeModel):
+                size = model.get_resident_bytes()
+            if size is None:
+                size = max(0, process.memory_info().rss - rss)
+            with self._resident_lock:
+                self.model_sizes[name] = size
+            MODEL_RESIDENT_BYTES.labels(**get_labels(name)).set(size)
+            logger.info(f"Loaded model {name} on demand, resident size {size} bytes")
+            self._evict(keep=name)
+        return True
+
+    def _evict(self, keep: str):
+        if not self.memory_budget_bytes:
+            return
+        evicted = []
+        with self._resident_lock:
+            total = sum(self.model_sizes.values())
+            for name in list(self.model_sizes):
+                if total <= self.memory_budget_bytes:
+                    break
+                # The models with requests in flight are skipped, they can be evicted by a later load.
+                if name == keep or self._in_flight.get(name):
+                    continue
+                total -= self.model_sizes.pop(name)
+                self._evicting.add(name)
+                evicted.append(name)
+        if total > self.memory_budget_bytes:
+            logger.warning(
+                f"The loaded models use {total} bytes, over the memory budget of {self.memory_budget_bytes} "
+                "bytes, the models in use are not unloaded"
+            )
+        for name in evicted:
+            logger.info(f"Unloading least recently used model {name}")
+            MODEL_EVICTIONS.labels(**get_labels(name)).inc()
+            try:
+                self.unload(name)
+            finally:
+                with self._resident_lock:
+                    self._evicting.discard(name)
+
+    def unload(self, name: str):
+        with self._resident_lock:
+            self.model_sizes.pop(name, None)
+        MODEL_RESIDENT_BYTES.labels(**get_labels(name)).set(0)
+        super().unload(name)
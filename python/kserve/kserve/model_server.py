@@ -14,28 +14,37 @@
 
 import argparse
 import asyncio
-import concurrent.futures
 import multiprocessing
 import signal
 import socket
 import sys
+import threading
 from multiprocessing import Process
-from typing import Any, Callable, Dict, List, Optional, Union
-
-from ray import serve as rayserve
-from ray.serve.api import Deployment
-from ray.serve.handle import DeploymentHandle
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
 
 from . import logging
+from .executor import ExecutionPolicy, set_default_executor
 from .logging import logger
-from .model import BaseKServeModel
+from .model import BaseKServeModel, Model
 from .model_repository import ModelRepository
 from .protocol.dataplane import DataPlane
-from .protocol.grpc.server import GRPCServer
+from .protocol.grpc.server import (
+    GRPC_COMPRESSION_ALGORITHMS,
+    GRPC_SHUTDOWN_GRACE_SECONDS,
+    MAX_GRPC_MESSAGE_LENGTH,
+    GRPCProcess,
+    GRPCServer,
+)
+from .protocol.grpc.servicer import MAX_STREAM_CONCURRENT_REQUESTS
 from .protocol.model_repository_extension import ModelRepositoryExtension
 from .protocol.rest.server import UvicornServer
+from .response_cache import ResponseCache
 from .utils import utils
 
+if TYPE_CHECKING:
+    from ray.serve.api import Deployment
+    from ray.serve.handle import DeploymentHandle
+
 DEFAULT_HTTP_PORT = 8080
 DEFAULT_GRPC_PORT = 8081
 
@@ -59,7 +68,7 @@ parser.add_argument(
     "--workers",
     default=1,
     type=int,
-    help="The number of uvicorn workers for multi-processing.",
+    help="The number of uvicorn and gRPC workers for multi-processing.",
 )
 parser.add_argument(
     "--max_threads",
@@ -79,6 +88,52 @@ parser.add_argument(
     type=lambda x: utils.strtobool(x),
     help="Enable gRPC for the model server.",
 )
+parser.add_argument(
+    "--grpc_use_typed_contents",
+    default=False,
+    type=lambda x: utils.strtobool(x),
+    help="Return the gRPC outputs in the typed contents fields instead of raw_output_contents "
+    "when the request doesn't use raw_input_contents.",
+)
+parser.add_argument(
+    "--grpc_max_message_length",
+    default=MAX_GRPC_MESSAGE_LENGTH,
+    type=int,
+    help="The max size in bytes of the messages received or sent by the gRPC server, -1 for unlimited.",
+)
+parser.add_argument(
+    "--grpc_max_concurrent_rpcs",
+    default=None,
+    type=int,
+    help="The max number of concurrent RPCs handled by the gRPC server. "
+    "The RPCs over the limit are rejected with RESOURCE_EXHAUSTED. Unlimited when not set.",
+)
+parser.add_argument(
+    "--grpc_keepalive_time_ms",
+    default=None,
+    type=int,
+    help="The period in milliseconds after which the gRPC server sends a keepalive ping on the transport.",
+)
+parser.add_argument(
+    "--grpc_keepalive_timeout_ms",
+    default=None,
+    type=int,
+    help="The time in milliseconds the gRPC server waits for the keepalive ping acknowledgement.",
+)
+parser.add_argument(
+    "--grpc_compression",
+    default=None,
+    type=str,
+    choices=list(GRPC_COMPRESSION_ALGORITHMS.keys()),
+    help="The default compression algorithm of the gRPC responses.",
+)
+parser.add_argument(
+    "--grpc_max_stream_concurrent_requests",
+    default=MAX_STREAM_CONCURRENT_REQUESTS,
+    type=int,
+    help="The max number of requests of a gRPC ModelStreamInfer stream running at once. "
+    "The next requests of the stream are read when one of them completes.",
+)
 parser.add_argument(
     "--enable_docs_url",
     default=False,
@@ -91,6 +146,88 @@ parser.add_argument(
     type=lambda x: utils.strtobool(x),
     help="Enable a log line per request with preprocess/predict/postprocess latency metrics.",
 )
+parser.add_argument(
+    "--max_batch_size",
+    default=None,
+    type=int,
+    help="The max number of instances coalesced into a single predict call by dynamic batching. "
+    "Dynamic batching is disabled when not set.",
+)
+parser.add_argument(
+    "--max_batch_latency_ms",
+    default=5,
+    type=float,
+    help="The max time in milliseconds a request waits for a dynamic batch to fill up.",
+)
+parser.add_argument(
+    "--execution_policy",
+    default=ExecutionPolicy.THREAD.value,
+    type=str,
+    choices=[policy.value for policy in ExecutionPolicy],
+    help="Where the synchronous preprocess/predict/postprocess handlers of the models run: "
+    "inline on the event loop, in a thread pool or in a process pool.",
+)
+parser.add_argument(
+    "--max_execution_workers",
+    default=None,
+    type=int,
+    help="The max number of threads or processes running the synchronous handlers of a model. "
+    "The thread policy uses the asyncio default executor when not set.",
+)
+parser.add_argument(
+    "--max_execution_queue_size",
+    default=None,
+    type=int,
+    help="The max number of handler calls queued or running for a model. "
+    "The requests over the limit are rejected with 503 or RESOURCE_EXHAUSTED. Unbounded when not set.",
+)
+parser.add_argument(
+    "--max_concurrency",
+    default=None,
+    type=int,
+    help="The max number of inference requests running at the same time for a model. "
+    "Admission control is disabled when not set.",
+)
+parser.add_argument(
+    "--max_queue_depth",
+    default=None,
+    type=int,
+    help="The max number of inference requests waiting for admission when a model is at its max concurrency. "
+    "The requests over the limit, or waiting longer than the x-kserve-queue-timeout-ms header or the gRPC "
+    "deadline, are rejected with 503 or RESOURCE_EXHAUSTED. Unbounded when not set.",
+)
+parser.add_argument(
+    "--enable_response_cache",
+    default=False,
+    type=lambda x: utils.strtobool(x),
+    help="Enable the in-memory cache of the inference responses, keyed on the model and the request inputs. "
+    "A request skips the cache when the x-kserve-cache-bypass header is true.",
+)
+parser.add_argument(
+    "--response_cache_max_entries",
+    default=1024,
+    type=int,
+    help="The max number of responses in the response cache.",
+)
+parser.add_argument(
+    "--response_cache_max_bytes",
+    default=64 * 1024 * 1024,
+    type=int,
+    help="The max estimated size in bytes of the responses in the response cache.",
+)
+parser.add_argument(
+    "--response_cache_ttl_seconds",
+    default=60,
+    type=float,
+    help="The time in seconds a response is kept in the response cache.",
+)
+parser.add_argument(
+    "--enable_warmup",
+    default=False,
+    type=lambda x: utils.strtobool(x),
+    help="Warm up the models which don't declare warmup inputs with requests synthesized from their input "
+    "types before the server starts serving.",
+)
 parser.add_argument(
     "--configure_logging",
     default=True,
@@ -146,6 +283,12 @@ parser.add_argument(
     type=lambda x: utils.strtobool(x),
     help="Use ssl for the http connection to the predictor.",
 )
+parser.add_argument(
+    "--predictor_grpc_use_typed_contents",
+    default=False,
+    type=lambda x: utils.strtobool(x),
+    help="Send the gRPC inputs to the predictor in the typed contents fields instead of raw_input_contents.",
+)
 parser.add_argument(
     "--predictor_request_timeout_seconds",
     default=600,
@@ -165,20 +308,49 @@ class ModelServer:
         max_asyncio_workers: int = args.max_asyncio_workers,
         registered_models: ModelRepository = None,
         enable_grpc: bool = args.enable_grpc,
+        grpc_use_typed_contents: bool = args.grpc_use_typed_contents,
+        grpc_max_message_length: int = args.grpc_max_message_length,
+        grpc_max_concurrent_rpcs: Optional[int] = args.grpc_max_concurrent_rpcs,
+        grpc_keepalive_time_ms: Optional[int] = args.grpc_keepalive_time_ms,
+        grpc_keepalive_timeout_ms: Optional[int] = args.grpc_keepalive_timeout_ms,
+        grpc_compression: Optional[str] = args.grpc_compression,
+        grpc_max_stream_concurrent_requests: int = args.grpc_max_stream_concurrent_requests,
         enable_docs_url: bool = args.enable_docs_url,
         enable_latency_logging: bool = args.enable_latency_logging,
         access_log_format: str = args.access_log_format,
+        max_batch_size: Optional[int] = args.max_batch_size,
+        max_batch_latency_ms: float = args.max_batch_latency_ms,
+        execution_policy: str = args.execution_policy,
+        max_execution_workers: Optional[int] = args.max_execution_workers,
+        max_execution_queue_size: Optional[int] = args.max_execution_queue_size,
+        max_concurrency: Optional[int] = args.max_concurrency,
+        max_queue_depth: Optional[int] = args.max_queue_depth,
+        enable_response_cache: bool = args.enable_response_cache,
+        response_cache_max_entries: int = args.response_cache_max_entries,
+        response_cache_max_bytes: int = args.response_cache_max_bytes,
+        response_cache_ttl_seconds: float = args.response_cache_ttl_seconds,
+        enable_warmup: bool = args.enable_warmup,
     ):
         """KServe ModelServer Constructor
 
         Args:
             http_port: HTTP port. Default: ``8080``.
             grpc_port: GRPC port. Default: ``8081``.
-            workers: Number of uvicorn workers. Default: ``1``.
+            workers: Number of uvicorn and gRPC worker processes. Default: ``1``.
             max_threads: Max number of gRPC processing threads. Default: ``4``
             max_asyncio_workers: Max number of AsyncIO threads. Default: ``None``
             registered_models: Model repository with registered models.
             enable_grpc: Whether to turn on grpc server. Default: ``True``
+            grpc_use_typed_contents: Whether to return the gRPC outputs in the typed contents fields instead of
+                                     raw_output_contents for requests using typed contents. Default: ``False``.
+            grpc_max_message_length: Max size in bytes of the gRPC messages, -1 for unlimited. Default: ``8388608``.
+            grpc_max_concurrent_rpcs: Max number of concurrent gRPC RPCs. Default: ``None`` (unlimited).
+            grpc_keepalive_time_ms: Period in milliseconds of the gRPC keepalive pings. Default: ``None``.
+            grpc_keepalive_timeout_ms: Timeout in milliseconds of the gRPC keepalive pings. Default: ``None``.
+            grpc_compression: Default compression of the gRPC responses, ``none``, ``gzip`` or ``deflate``.
+                              Default: ``None``.
+            grpc_max_stream_concurrent_requests: Max number of requests of a gRPC ModelStreamInfer stream running
+                                                 at once. Default: ``64``.
             enable_docs_url: Whether to turn on ``/docs`` Swagger UI. Default: ``False``.
             enable_latency_logging: Whether to log latency metric. Default: ``True``.
             access_log_format: Format to set for the access log (provided by asgi-logger). Default: ``None``.
@@ -187,6 +359,25 @@ class ModelServer:
                                ASGI specs that don't describe how access logging should be implemented in detail
                                (please refer to this Uvicorn
                                [github issue](https://github.com/encode/uvicorn/issues/527) for more info).
+            max_batch_size: Max number of instances coalesced into one predict call by dynamic batching.
+                            Default: ``None`` (dynamic batching disabled).
+            max_batch_latency_ms: Max time in milliseconds a request waits for a dynamic batch. Default: ``5``.
+            execution_policy: Where the synchronous model handlers run, ``inline``, ``thread`` or ``process``.
+                              Default: ``thread``.
+            max_execution_workers: Max number of threads or processes running the synchronous handlers of a model.
+                                   Default: ``None`` (the asyncio default executor for the thread policy).
+            max_execution_queue_size: Max number of handler calls queued or running for a model.
+                                      Default: ``None`` (unbounded).
+            max_concurrency: Max number of inference requests running at the same time for a model.
+                             Default: ``None`` (admission control disabled).
+            max_queue_depth: Max number of inference requests waiting for admission for a model.
+                             Default: ``None`` (unbounded).
+            enable_response_cache: Whether to cache the inference responses in memory. Default: ``False``.
+            response_cache_max_entries: Max number of cached responses. Default: ``1024``.
+            response_cache_max_bytes: Max estimated size in bytes of the cached responses. Default: ``64MiB``.
+            response_cache_ttl_seconds: Time in seconds a response stays cached. Default: ``60``.
+            enable_warmup: Whether to warm up the models without warmup inputs with requests synthesized from
+                           their input types. Default: ``False``.
         """
         self.registered_models = (
             ModelRepository() if registered_models is None else registered_models
@@ -197,17 +388,52 @@ class ModelServer:
         self.max_threads = max_threads
         self.max_asyncio_workers = max_asyncio_workers
         self.enable_grpc = enable_grpc
+        self.grpc_use_typed_contents = grpc_use_typed_contents
         self.enable_docs_url = enable_docs_url
         self.enable_latency_logging = enable_latency_logging
+        self.max_batch_size = max_batch_size
+        self.max_batch_latency_ms = max_batch_latency_ms
+        self.execution_policy = ExecutionPolicy(execution_policy)
+        self.max_execution_workers = max_execution_workers
+        self.max_execution_queue_size = max_execution_queue_size
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.enable_warmup = enable_warmup
+        # The models loaded by the repository are configured and warmed up before they are served.
+        self.registered_models.prepare_model = self._prepare_model
+        # The loop running the servers, the models loaded before it runs are warmed up before the servers start.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._warmup_lock = threading.Lock()
+        self._pending_warmups: List[Model] = []
+        if enable_response_cache:
+            self.registered_models.response_cache = ResponseCache(
+                max_entries=response_cache_max_entries,
+                max_bytes=response_cache_max_bytes,
+                ttl_seconds=response_cache_ttl_seconds,
+            )
         self.dataplane = DataPlane(model_registry=self.registered_models)
         self.model_repository_extension = ModelRepositoryExtension(
             model_registry=self.registered_models
         )
         self._grpc_server = None
+        self._grpc_processes: List[GRPCProcess] = []
         self._rest_server = None
-        if self.enable_grpc:
+        self._grpc_server_kwargs = dict(
+            use_typed_contents=self.grpc_use_typed_contents,
+            max_message_length=grpc_max_message_length,
+            max_concurrent_rpcs=grpc_max_concurrent_rpcs,
+            keepalive_time_ms=grpc_keepalive_time_ms,
+            keepalive_timeout_ms=grpc_keepalive_timeout_ms,
+            compression=grpc_compression,
+            max_stream_concurrent_requests=grpc_max_stream_concurrent_requests,
+        )
+        # With multiple workers the gRPC servers run in the worker processes created on start.
+        if self.enable_grpc and self.workers == 1:
             self._grpc_server = GRPCServer(
-                grpc_port, self.dataplane, self.model_repository_extension
+                grpc_port,
+                self.dataplane,
+                self.model_repository_extension,
+                **self._grpc_server_kwargs,
             )
         if args.configure_logging:
             # If the logger does not have any handlers, then the logger is not configured.
@@ -218,7 +444,7 @@ class ModelServer:
         self._custom_exception_handler = None
 
     def start(
-        self, models: Union[List[BaseKServeModel], Dict[str, Deployment]]
+        self, models: Union[List[BaseKServeModel], Dict[str, "Deployment"]]
     ) -> None:
         """Start the model server with a set of registered models.
 
@@ -228,13 +454,20 @@ class ModelServer:
         if isinstance(models, list):
             for model in models:
                 if isinstance(model, BaseKServeModel):
+                    # The model is configured by _prepare_model when it is registered.
                     self.register_model(model)
-                    # pass whether to log request latency into the model
-                    model.enable_latency_logging = self.enable_latency_logging
                 else:
                     raise RuntimeError("Model type should be 'BaseKServeModel'")
         elif isinstance(models, dict):
-            if all([isinstance(v, Deployment) for v in models.values()]):
+            if all(
+                [
+                    utils.lazy_isinstance(v, "ray.serve.api", "Deployment")
+                    for v in models.values()
+                ]
+            ):
+                # Ray is only imported when Ray Serve deployments are registered.
+                from ray import serve as rayserve
+
                 # TODO: make this port number a variable
                 rayserve.start(
                     detached=True, http_options={"host": "0.0.0.0", "port": 9071}
@@ -252,9 +485,6 @@ class ModelServer:
             # formula as suggest in https://bugs.python.org/issue35279
             self.max_asyncio_workers = min(32, utils.cpu_count() + 4)
         logger.info(f"Setting max asyncio worker threads as {self.max_asyncio_workers}")
-        asyncio.get_event_loop().set_default_executor(
-            concurrent.futures.ThreadPoolExecutor(max_workers=self.max_asyncio_workers)
-        )
 
         async def serve():
             logger.info(f"Starting uvicorn with {self.workers} workers")
@@ -286,15 +516,10 @@ class ModelServer:
                 )
                 await self._rest_server.run()
             else:
-                # Since py38 MacOS/Windows defaults to use spawn for starting multiprocessing.
-                # https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods
-                # Spawn does not work with FastAPI/uvicorn in multiprocessing mode, use fork for multiprocessing
-                # https://github.com/tiangolo/fastapi/issues/1586
                 serversocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 serversocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                 serversocket.bind(("0.0.0.0", self.http_port))
                 serversocket.listen(5)
-                multiprocessing.set_start_method("fork")
                 self._rest_server = UvicornServer(
                     self.http_port,
                     [serversocket],
@@ -307,17 +532,106 @@ class ModelServer:
                     access_log_format=self.access_log_format,
                 )
                 for _ in range(self.workers):
-                    p = Process(target=self._rest_server.run_sync)
+                    p = Process(
+                        target=self._rest_server.run_sync,
+                        args=(self.max_asyncio_workers,),
+                    )
                     p.start()
 
+        async def serve_grpc():
+            if self.workers == 1:
+                await self._grpc_server.start(self.max_threads)
+                return
+            logger.info(f"Starting gRPC server with {self.workers} workers")
+            self._grpc_processes = [
+                GRPCProcess(
+                    self.grpc_port,
+                    self.max_threads,
+                    self.dataplane,
+                    self.model_repository_extension,
+                    **self._grpc_server_kwargs,
+                )
+                for _ in range(self.workers)
+            ]
+            for process in self._grpc_processes:
+                process.start()
+            # Keep the parent process alive as long as the gRPC workers are serving.
+            await asyncio.gather(*[process.wait() for process in self._grpc_processes])
+
         async def servers_task():
+            # asyncio.run creates a new event loop, the pool must be set on the loop running the servers.
+            set_default_executor(self.max_asyncio_workers)
+            # The servers only start listening once the models are warmed up.
+            await self._warmup_models()
             servers = [serve()]
             if self.enable_grpc:
-                servers.append(self._grpc_server.start(self.max_threads))
+                servers.append(serve_grpc())
             await asyncio.gather(*servers)
 
+        if self.workers > 1:
+            # Since py38 MacOS/Windows defaults to use spawn for starting multiprocessing.
+            # https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods
+            # Spawn does not work with FastAPI/uvicorn in multiprocessing mode, use fork for multiprocessing
+            # https://github.com/tiangolo/fastapi/issues/1586
+            # The gRPC workers also rely on fork to get a copy of the loaded models.
+            multiprocessing.set_start_method("fork")
+            # The models still loading in the background would not be copied to the worker processes.
+            self.registered_models.wait_for_models()
         asyncio.run(servers_task())
 
+    def _configure_model(self, model: Model):
+        """Apply the server wide batching, execution, admission and warmup settings the model doesn't configure itself."""
+        if model.max_batch_size is None:
+            model.max_batch_size = self.max_batch_size
+            model.max_latency_ms = self.max_batch_latency_ms
+        if model.execution_policy is None:
+            model.execution_policy = self.execution_policy
+            model.max_execution_workers = self.max_execution_workers
+            model.max_execution_queue_size = self.max_execution_queue_size
+        if model.max_concurrency is None:
+            model.max_concurrency = self.max_concurrency
+            model.max_queue_depth = self.max_queue_depth
+        if model.enable_warmup is None:
+            model.enable_warmup = self.enable_warmup
+
+    def _prepare_model(self, model: BaseKServeModel):
+        """Configure and warm up a model loaded by the repository, before the repository serves it."""
+        # pass whether to log request latency into the model
+        model.enable_latency_logging = self.enable_latency_logging
+        if not isinstance(model, Model):
+            return
+        # models can configure their own batching and execution, otherwise use the server wide settings
+        self._configure_model(model)
+        with self._warmup_lock:
+            loop = self._loop
+            if loop is None:
+                # The servers are not started yet, they warm up the model before they start listening.
+                self._pending_warmups.append(model)
+                return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            # Loaded on the event loop by the repository extension, which warms up the model itself.
+            return
+        # The models are loaded in worker threads, the warmup runs on the loop running the servers.
+        asyncio.run_coroutine_threadsafe(model.warmup(), loop).result()
+
+    async def _warmup_models(self):
+        # The models loaded from now on are warmed up on this loop by _prepare_model.
+        with self._warmup_lock:
+            self._loop = asyncio.get_running_loop()
+            pending, self._pending_warmups = self._pending_warmups, []
+        models = {id(model): model for model in pending}
+        # The models loaded before the model server was created were not configured yet.
+        for model in self.registered_models.get_models().values():
+            if isinstance(model, Model):
+                self._configure_model(model)
+                models[id(model)] = model
+        for model in models.values():
+            await model.warmup()
+
     async def stop(self, sig: Optional[int] = None):
         """Stop the instances of REST and gRPC model servers.
 
@@ -331,9 +645,35 @@ class ModelServer:
         if self._grpc_server:
             logger.info("Stopping the grpc server")
             await self._grpc_server.stop(sig)
+        if self._grpc_processes:
+            logger.info("Stopping the grpc server workers")
+            await self._stop_grpc_processes()
         for model_name in list(self.registered_models.get_models().keys()):
             self.registered_models.unload(model_name)
 
+    async def _stop_grpc_processes(self):
+        """Sends SIGTERM to the gRPC workers so that they drain the in-flight RPCs, and kills the
+        workers which are still running after the shutdown grace period."""
+        for process in self._grpc_processes:
+            process.stop()
+        # Leave the workers a little more time than the grace period of their server.
+        timeout = GRPC_SHUTDOWN_GRACE_SECONDS + 5
+        _, pending = await asyncio.wait(
+            [asyncio.ensure_future(process.wait()) for process in self._grpc_processes],
+            timeout=timeout,
+        )
+        for task in pending:
+            task.cancel()
+        killed = []
+        for process in self._grpc_processes:
+            if process.is_alive():
+                logger.warning(
+                    f"gRPC worker {process.pid} did not shut down in {timeout} seconds, killing it"
+                )
+                process.kill()
+                killed.append(process)
+        await asyncio.gather(*[process.wait() for process in killed])
+
     def register_exception_handler(
         self,
         handler: Callable[[asyncio.events.AbstractEventLoop, Dict[str, Any]], None],
@@ -362,7 +702,7 @@ class ModelServer:
         loop.run_until_complete(self.stop())
         loop.default_exception_handler(context)
 
-    def register_model_handle(self, name: str, model_handle: DeploymentHandle):
+    def register_model_handle(self, name: str, model_handle: "DeploymentHandle"):
         """Register a model handle to the model server.
 
         Args:
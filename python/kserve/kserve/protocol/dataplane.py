@@ -13,24 +13,32 @@
 # limitations under the License.
 
 import time
+from contextlib import asynccontextmanager
 from importlib import metadata
-from typing import Dict, Optional, Tuple, Union
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional, Tuple, Union
 
 import cloudevents.exceptions as ce
 import orjson
 
 from cloudevents.http import CloudEvent, from_http
 from cloudevents.sdk.converters.util import has_binary_headers
-from ray.serve.handle import DeploymentHandle
 
+from ..admission import get_queue_timeout
 from ..constants import constants
 from ..errors import InvalidInput, ModelNotFound
 from ..logging import logger
 from ..model import InferenceVerb, Model
 from ..model_repository import ModelRepository
-from ..utils.utils import create_response_cloudevent, is_structured_cloudevent
+from ..response_cache import get_cache_key
+from ..utils.utils import (
+    create_response_cloudevent,
+    is_structured_cloudevent,
+    lazy_isinstance,
+)
 from .infer_type import InferRequest, InferResponse
-from .rest.openai import OpenAIModel
+
+if TYPE_CHECKING:
+    from ray.serve.handle import DeploymentHandle
 
 JSON_HEADERS = [
     "application/json",
@@ -44,7 +52,18 @@ JSON_HEADERS = [
 # ref https://github.com/ray-project/ray/pull/37817
 # On Ray 2.10, it now returns DeploymentHandle:
 # https://docs.ray.io/en/latest/serve/api/index.html#deployment-handles
-ModelHandleType = Union[Model, DeploymentHandle]
+ModelHandleType = Union[Model, "DeploymentHandle"]
+
+
+def _is_deployment_handle(model) -> bool:
+    # Ray is only imported when Ray Serve deployments are registered.
+    return lazy_isinstance(model, "ray.serve.handle", "DeploymentHandle")
+
+
+def _is_openai_model(model) -> bool:
+    return lazy_isinstance(
+        model, "kserve.protocol.rest.openai.openai_model", "OpenAIModel"
+    )
 
 
 class DataPlane:
@@ -85,6 +104,43 @@ class DataPlane:
             model.load()
         return model
 
+    async def get_model_async(self, name: str) -> ModelHandleType:
+        """Get the model instance with the given name like ``get_model``, but a model which is not ready is
+        loaded by the model repository without blocking the event loop.
+
+        Args:
+            name (str): Model name.
+
+        Returns:
+            ModelHandleType: Instance of the model.
+
+        Raises:
+            ModelNotFound: exception if model is not found
+        """
+        model = await self._model_registry.get_or_load_model(name)
+        if model is None:
+            raise ModelNotFound(name)
+        return model
+
+    @asynccontextmanager
+    async def use_model(self, name: str) -> AsyncIterator[ModelHandleType]:
+        """Get the model instance with the given name like ``get_model_async``, and hold it while the request runs,
+        so that the model repository doesn't unload it.
+
+        Args:
+            name (str): Model name.
+
+        Yields:
+            ModelHandleType: Instance of the model.
+
+        Raises:
+            ModelNotFound: exception if model is not found
+        """
+        async with self._model_registry.use_model(name) as model:
+            if model is None:
+                raise ModelNotFound(name)
+            yield model
+
     @staticmethod
     def get_binary_cloudevent(
         body: Union[str, bytes, None], headers: Dict[str, str]
@@ -182,7 +238,7 @@ class DataPlane:
         # TODO: model versioning is not supported yet
         model = self.get_model_from_registry(model_name)
 
-        if isinstance(model, DeploymentHandle):
+        if _is_deployment_handle(model):
             input_types = await model.get_input_types.remote()
             output_types = await model.get_output_types.remote()
         else:
@@ -219,7 +275,7 @@ class DataPlane:
         Raises:
             ModelNotFound: exception if model is not found
         """
-        if self._model_registry.get_model(model_name) is None:
+        if not self._model_registry.has_model(model_name):
             raise ModelNotFound(model_name)
 
         return self._model_registry.is_model_ready(model_name)
@@ -287,14 +343,15 @@ class DataPlane:
         # if we received a cloudevent, then also return a cloudevent
         is_cloudevent = False
         is_binary_cloudevent = False
-        if isinstance(response, InferResponse):
-            response = response.to_rest()
         if headers:
             if has_binary_headers(headers):
                 is_cloudevent = True
                 is_binary_cloudevent = True
             if headers.get("content-type", "") == "application/cloudevents+json":
                 is_cloudevent = True
+        if isinstance(response, InferResponse):
+            # The REST server serializes numpy arrays with orjson, the CloudEvent encoder can't.
+            response = response.to_rest(numpy_data=not is_cloudevent)
         if is_cloudevent:
             response_headers, response = create_response_cloudevent(
                 model_name, response, req_attributes, is_binary_cloudevent
@@ -329,19 +386,34 @@ class DataPlane:
 
         Raises:
             InvalidInput: An error when the body bytes can't be decoded as JSON.
+            ModelOverloaded: An error when the model is at its max concurrency and the request can't be queued
+                or waited in the queue for longer than its queue timeout.
 
         .. _CloudEvent: https://cloudevents.io/
         """
         # call model locally or remote model workers
-        model = self.get_model(model_name)
-        if isinstance(model, OpenAIModel):
-            error_msg = f"Model {model_name} is of type OpenAIModel. It does not support the infer method."
-            raise InvalidInput(reason=error_msg)
-        if isinstance(model, DeploymentHandle):
-            response = await model.remote(request, headers=headers)
-        else:
-            response = await model(request, headers=headers)
-        return response, headers
+        async with self.use_model(model_name) as model:
+            if _is_openai_model(model):
+                error_msg = f"Model {model_name} is of type OpenAIModel. It does not support the infer method."
+                raise InvalidInput(reason=error_msg)
+            response_cache = self._model_registry.response_cache
+            cache_key = None
+            if response_cache is not None and isinstance(model, Model):
+                cache_key = get_cache_key(model_name, request, headers)
+                if cache_key is not None:
+                    response = response_cache.get(cache_key, request)
+                    if response is not None:
+                        return response, headers
+            if _is_deployment_handle(model):
+                response = await model.remote(request, headers=headers)
+            elif isinstance(model, Model) and model.admission_controller is not None:
+                async with model.admission_controller.admit(get_queue_timeout(headers)):
+                    response = await model(request, headers=headers)
+            else:
+                response = await model(request, headers=headers)
+            if cache_key is not None:
+                response_cache.put(cache_key, response)
+            return response, headers
 
     async def explain(
         self,
@@ -363,14 +435,14 @@ class DataPlane:
             InvalidInput: An error when the body bytes can't be decoded as JSON.
         """
         # call model locally or remote model workers
-        model = self.get_model(model_name)
-        if isinstance(model, OpenAIModel):
-            logger.warning(
-                f"Model {model_name} is of type OpenAIModel. It does not support the explain method."
-                " A request exercised this path and will cause a server crash."
-            )
-        if isinstance(model, DeploymentHandle):
-            response = await model.remote(request, verb=InferenceVerb.EXPLAIN)
-        else:
-            response = await model(request, verb=InferenceVerb.EXPLAIN)
-        return response, headers
+        async with self.use_model(model_name) as model:
+            if _is_openai_model(model):
+                logger.warning(
+                    f"Model {model_name} is of type OpenAIModel. It does not support the explain method."
+                    " A request exercised this path and will cause a server crash."
+                )
+            if _is_deployment_handle(model):
+                response = await model.remote(request, verb=InferenceVerb.EXPLAIN)
+            else:
+                response = await model(request, verb=InferenceVerb.EXPLAIN)
+            return response, headers
@@ -182,6 +182,14 @@ class ModelReadyResponse(_message.Message):
     ready: bool
     def __init__(self, ready: bool = ...) -> None: ...
 
+class ModelStreamInferResponse(_message.Message):
+    __slots__ = ["error_message", "infer_response"]
+    ERROR_MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    INFER_RESPONSE_FIELD_NUMBER: _ClassVar[int]
+    error_message: str
+    infer_response: ModelInferResponse
+    def __init__(self, error_message: _Optional[str] = ..., infer_response: _Optional[_Union[ModelInferResponse, _Mapping]] = ...) -> None: ...
+
 class RepositoryModelLoadRequest(_message.Message):
     __slots__ = ["model_name"]
     MODEL_NAME_FIELD_NUMBER: _ClassVar[int]
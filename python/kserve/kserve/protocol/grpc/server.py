@@ -14,8 +14,11 @@
 
 import asyncio
 import multiprocessing
+import signal
 from concurrent import futures
+from typing import List, Optional, Tuple
 
+import grpc
 from grpc import aio
 
 from kserve.logging import logger
@@ -24,9 +27,16 @@ from kserve.protocol.model_repository_extension import ModelRepositoryExtension
 
 from . import grpc_predict_v2_pb2_grpc
 from .interceptors import LoggingInterceptor
-from .servicer import InferenceServicer
+from .servicer import MAX_STREAM_CONCURRENT_REQUESTS, InferenceServicer
 
 MAX_GRPC_MESSAGE_LENGTH = 8388608
+GRPC_SHUTDOWN_GRACE_SECONDS = 10
+
+GRPC_COMPRESSION_ALGORITHMS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
 
 
 class GRPCServer:
@@ -35,24 +45,81 @@ class GRPCServer:
         port: int,
         data_plane: DataPlane,
         model_repository_extension: ModelRepositoryExtension,
+        use_typed_contents: bool = False,
+        max_message_length: int = MAX_GRPC_MESSAGE_LENGTH,
+        max_concurrent_rpcs: Optional[int] = None,
+        keepalive_time_ms: Optional[int] = None,
+        keepalive_timeout_ms: Optional[int] = None,
+        compression: Optional[str] = None,
+        reuse_port: bool = False,
+        max_stream_concurrent_requests: int = MAX_STREAM_CONCURRENT_REQUESTS,
     ):
+        """The gRPC server.
+
+        Args:
+            port: The port listened to by the server.
+            data_plane: The DataPlane running the inference.
+            model_repository_extension: The model repository extension.
+            use_typed_contents: Return the outputs in the typed contents fields for typed requests.
+            max_message_length: The max size in bytes of a received or sent message, -1 for unlimited.
+            max_concurrent_rpcs: The max number of concurrent RPCs, the server rejects the RPCs
+                                 over the limit with RESOURCE_EXHAUSTED. Unlimited if not set.
+            keepalive_time_ms: The period in milliseconds after which a keepalive ping is sent on the transport.
+            keepalive_timeout_ms: The time in milliseconds the server waits for the keepalive ping
+                                  acknowledgement before closing the transport.
+            compression: The default compression algorithm of the responses, "none", "gzip" or "deflate".
+                         Requests are decompressed according to the algorithm chosen by each client.
+            reuse_port: Bind the port with SO_REUSEPORT, so that several server processes share the same port.
+            max_stream_concurrent_requests: The max number of requests of a ModelStreamInfer stream running at once.
+        """
         self._port = port
         self._data_plane = data_plane
         self._model_repository_extension = model_repository_extension
+        self._use_typed_contents = use_typed_contents
+        self._max_message_length = max_message_length
+        self._max_concurrent_rpcs = max_concurrent_rpcs
+        self._keepalive_time_ms = keepalive_time_ms
+        self._keepalive_timeout_ms = keepalive_timeout_ms
+        if compression is not None and compression not in GRPC_COMPRESSION_ALGORITHMS:
+            raise ValueError(
+                f"Unsupported gRPC compression '{compression}', "
+                f"expected one of {list(GRPC_COMPRESSION_ALGORITHMS.keys())}"
+            )
+        self._compression = compression
+        self._reuse_port = reuse_port
+        self._max_stream_concurrent_requests = max_stream_concurrent_requests
         self._server = None
 
+    def _server_options(self) -> List[Tuple[str, int]]:
+        options = [
+            ("grpc.max_message_length", self._max_message_length),
+            ("grpc.max_send_message_length", self._max_message_length),
+            ("grpc.max_receive_message_length", self._max_message_length),
+            ("grpc.so_reuseport", 1 if self._reuse_port else 0),
+        ]
+        if self._keepalive_time_ms is not None:
+            options.append(("grpc.keepalive_time_ms", self._keepalive_time_ms))
+        if self._keepalive_timeout_ms is not None:
+            options.append(("grpc.keepalive_timeout_ms", self._keepalive_timeout_ms))
+        return options
+
     async def start(self, max_workers):
         inference_servicer = InferenceServicer(
-            self._data_plane, self._model_repository_extension
+            self._data_plane,
+            self._model_repository_extension,
+            use_typed_contents=self._use_typed_contents,
+            max_stream_concurrent_requests=self._max_stream_concurrent_requests,
         )
         self._server = aio.server(
             futures.ThreadPoolExecutor(max_workers=max_workers),
             interceptors=(LoggingInterceptor(),),
-            options=[
-                ("grpc.max_message_length", MAX_GRPC_MESSAGE_LENGTH),
-                ("grpc.max_send_message_length", MAX_GRPC_MESSAGE_LENGTH),
-                ("grpc.max_receive_message_length", MAX_GRPC_MESSAGE_LENGTH),
-            ],
+            options=self._server_options(),
+            maximum_concurrent_rpcs=self._max_concurrent_rpcs,
+            compression=(
+                GRPC_COMPRESSION_ALGORITHMS[self._compression]
+                if self._compression
+                else None
+            ),
         )
         grpc_predict_v2_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(
             inference_servicer, self._server
@@ -66,7 +133,7 @@ class GRPCServer:
 
     async def stop(self, sig: int = None):
         logger.info("Waiting for gRPC server shutdown")
-        await self._server.stop(grace=10)
+        await self._server.stop(grace=GRPC_SHUTDOWN_GRACE_SECONDS)
         logger.info("gRPC server shutdown complete")
 
 
@@ -78,19 +145,68 @@ class GRPCProcess(multiprocessing.Process):
         max_threads: int,
         data_plane: DataPlane,
         model_repository_extension: ModelRepositoryExtension,
+        **server_kwargs,
     ):
+        """Runs a GRPCServer in a child process. The processes share the port with SO_REUSEPORT, so that the
+        kernel load balances the connections between them. A process shuts down its server gracefully on SIGTERM.
+
+        Args:
+            port: The port listened to by the server.
+            max_threads: The max number of gRPC processing threads.
+            data_plane: The DataPlane running the inference.
+            model_repository_extension: The model repository extension.
+            server_kwargs: The additional options passed to the GRPCServer.
+        """
         super().__init__()
         self._data_plane = data_plane
         self._model_repository_extension = model_repository_extension
         self._port = port
         self._max_threads = max_threads
+        self._server_kwargs = server_kwargs
         self._server = None
+        self._exited: Optional[asyncio.Future] = None
 
     def stop(self):
-        self._server.stop()
+        """Asks the child process to shut down its server gracefully."""
+        if self.is_alive():
+            self.terminate()
+
+    async def wait(self) -> Optional[int]:
+        """Waits for the child process to exit without blocking a thread in join. The sentinel of the process
+        becomes readable when it exits, so the exit is watched by the event loop. Several coroutines may wait
+        for the same process.
+
+        Returns:
+            The exit code of the process.
+        """
+        if self._exited is None:
+            loop = asyncio.get_running_loop()
+            exited = self._exited = loop.create_future()
+
+            def on_exit():
+                loop.remove_reader(self.sentinel)
+                # Reaps the exited process.
+                self.join()
+                if not exited.done():
+                    exited.set_result(self.exitcode)
+
+            loop.add_reader(self.sentinel, on_exit)
+        return await asyncio.shield(self._exited)
 
     def run(self):
+        asyncio.run(self._serve())
+
+    async def _serve(self):
         self._server = GRPCServer(
-            self._port, self._data_plane, self._model_repository_extension
+            self._port,
+            self._data_plane,
+            self._model_repository_extension,
+            reuse_port=True,
+            **self._server_kwargs,
         )
-        asyncio.run(self._server.start(self._max_threads))
+        loop = asyncio.get_running_loop()
+        for sig in [signal.SIGINT, signal.SIGTERM]:
+            loop.add_signal_handler(
+                sig, lambda s=sig: asyncio.create_task(self._server.stop(s))
+            )
+        await self._server.start(self._max_threads)
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+from typing import AsyncIterator, Dict
 
 from . import grpc_predict_v2_pb2 as pb
 from . import grpc_predict_v2_pb2_grpc
@@ -20,9 +22,14 @@ from kserve.protocol.dataplane import DataPlane
 from kserve.protocol.model_repository_extension import ModelRepositoryExtension
 from kserve.utils.utils import to_headers
 
-from grpc import ServicerContext
+from grpc import ServicerContext, StatusCode
 
-from ...errors import InvalidInput
+from ...constants.constants import QUEUE_TIMEOUT_HEADER
+from ...errors import InvalidInput, ModelOverloaded
+from ...logging import logger
+
+# The default max number of requests of a ModelStreamInfer stream running at once.
+MAX_STREAM_CONCURRENT_REQUESTS = 64
 
 
 class InferenceServicer(grpc_predict_v2_pb2_grpc.GRPCInferenceServiceServicer):
@@ -31,10 +38,25 @@ class InferenceServicer(grpc_predict_v2_pb2_grpc.GRPCInferenceServiceServicer):
         self,
         data_plane: DataPlane,
         model_repository_extension: ModelRepositoryExtension,
+        use_typed_contents: bool = False,
+        max_stream_concurrent_requests: int = MAX_STREAM_CONCURRENT_REQUESTS,
     ):
+        """The gRPC inference servicer.
+
+        Args:
+            data_plane: The DataPlane running the inference.
+            model_repository_extension: The model repository extension.
+            use_typed_contents: Return the outputs in the typed contents fields when the request
+                                doesn't use raw_input_contents, instead of always using raw_output_contents.
+            max_stream_concurrent_requests: The max number of requests of a ModelStreamInfer stream which are
+                                            running or waiting for their response to be sent. The next requests
+                                            of the stream are not read until one of them completes.
+        """
         super().__init__()
         self._data_plane = data_plane
         self._mode_repository_extension = model_repository_extension
+        self._use_typed_contents = use_typed_contents
+        self._max_stream_concurrent_requests = max_stream_concurrent_requests
 
     @classmethod
     def validate_grpc_request(cls, request: pb.ModelInferRequest):
@@ -113,15 +135,93 @@ class InferenceServicer(grpc_predict_v2_pb2_grpc.GRPCInferenceServiceServicer):
         self, request: pb.ModelInferRequest, context: ServicerContext
     ) -> pb.ModelInferResponse:
         headers = to_headers(context)
+        time_remaining = context.time_remaining()
+        if time_remaining is not None and QUEUE_TIMEOUT_HEADER not in headers:
+            # The request can't wait for admission beyond the gRPC deadline.
+            headers[QUEUE_TIMEOUT_HEADER] = str(time_remaining * 1000)
+        try:
+            return await self._infer(request, headers)
+        except ModelOverloaded as e:
+            await context.abort(StatusCode.RESOURCE_EXHAUSTED, str(e))
+
+    async def ModelStreamInfer(
+        self,
+        request_iterator: AsyncIterator[pb.ModelInferRequest],
+        context: ServicerContext,
+    ) -> AsyncIterator[pb.ModelStreamInferResponse]:
+        """Runs the inference requests received on the stream concurrently and streams back one
+        response per request as soon as it completes. The failure of a request is reported in the
+        error_message of its response and does not close the stream.
+        """
+        headers = to_headers(context)
+        responses: asyncio.Queue = asyncio.Queue()
+        # Held by each request from when it is read until its response is sent, so that a client streaming
+        # requests faster than they are served is pushed back by the flow control of the stream.
+        in_flight = asyncio.Semaphore(self._max_stream_concurrent_requests)
+
+        async def stream_infer(request: pb.ModelInferRequest):
+            try:
+                response = pb.ModelStreamInferResponse(
+                    infer_response=await self._infer(request, headers)
+                )
+            except Exception as e:
+                logger.error(
+                    f"Stream inference failed for model {request.model_name}: {e}"
+                )
+                response = pb.ModelStreamInferResponse(
+                    error_message=str(e),
+                    infer_response=pb.ModelInferResponse(
+                        id=request.id, model_name=request.model_name
+                    ),
+                )
+            await responses.put(response)
+
+        async def read_requests():
+            tasks = set()
+            try:
+                async for request in request_iterator:
+                    await in_flight.acquire()
+                    task = asyncio.ensure_future(stream_infer(request))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                # Signals the end of the stream.
+                await responses.put(None)
+
+        reader = asyncio.ensure_future(read_requests())
+        try:
+            while True:
+                response = await responses.get()
+                if response is None:
+                    break
+                yield response
+                in_flight.release()
+            # Propagates the errors of the request stream.
+            await reader
+        finally:
+            reader.cancel()
+
+    async def _infer(
+        self, request: pb.ModelInferRequest, headers: Dict[str, str]
+    ) -> pb.ModelInferResponse:
         self.validate_grpc_request(request)
         infer_request = InferRequest.from_grpc(request)
+        if not self._use_typed_contents:
+            # Let the model produce raw outputs, so they are returned in raw_output_contents without conversion.
+            infer_request.use_binary_outputs = True
         response_body, _ = await self._data_plane.infer(
             request=infer_request, headers=headers, model_name=request.model_name
         )
         if isinstance(response_body, pb.ModelInferResponse):
             return response_body
         elif isinstance(response_body, InferResponse):
-            return response_body.to_grpc()
+            return response_body.to_grpc(
+                use_typed_contents=self._use_typed_contents
+                and not infer_request.use_binary_outputs
+            )
         else:
             return pb.ModelInferResponse(
                 id=response_body["id"],
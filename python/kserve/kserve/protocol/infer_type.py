@@ -13,10 +13,10 @@
 # limitations under the License.
 
 import struct
-from typing import Optional, List, Dict, Union
+from typing import TYPE_CHECKING, Optional, List, Dict, Tuple, Union
 
 import numpy as np
-import pandas as pd
+import orjson
 import uuid
 
 from google.protobuf.internal.containers import MessageMap
@@ -31,6 +31,13 @@ from ..protocol.grpc.grpc_predict_v2_pb2 import (
 )
 from ..utils.numpy_codec import to_np_dtype, from_np_dtype
 
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow
+
+
+_BYTES_LENGTH_PREFIX = struct.Struct("<I")
+
 
 def serialize_byte_tensor(input_tensor: np.ndarray) -> np.ndarray:
     """
@@ -39,6 +46,8 @@ def serialize_byte_tensor(input_tensor: np.ndarray) -> np.ndarray:
     numpy will remove trailing zeros at the end of byte sequence and because
     of this it should be avoided.
 
+    The length prefixes and the elements are interleaved and joined with a single copy.
+
     Args:
         input_tensor : np.array
             The bytes tensor to serialize.
@@ -60,29 +69,24 @@ def serialize_byte_tensor(input_tensor: np.ndarray) -> np.ndarray:
     if (input_tensor.dtype != np.object_) and (input_tensor.dtype.type != np.bytes_):
         raise InferenceError("cannot serialize bytes tensor: invalid datatype")
 
-    flattened_ls = []
     # 'C' order is row-major.
-    for obj in np.nditer(input_tensor, flags=["refs_ok"], order="C"):
+    elements = input_tensor.ravel(order="C").tolist()
+    if input_tensor.dtype == np.object_:
         # If directly passing bytes to BYTES type,
         # don't convert it to str as Python will encode the
         # bytes which may distort the meaning
-        if input_tensor.dtype == np.object_:
-            if type(obj.item()) == bytes:
-                s = obj.item()
-            else:
-                s = str(obj.item()).encode("utf-8")
-        else:
-            s = obj.item()
-        flattened_ls.append(struct.pack("<I", len(s)))
-        flattened_ls.append(s)
-    flattened = b"".join(flattened_ls)
-    flattened_array = np.asarray(flattened, dtype=np.object_)
-    if not flattened_array.flags["C_CONTIGUOUS"]:
-        flattened_array = np.ascontiguousarray(flattened_array, dtype=np.object_)
-    return flattened_array
+        elements = [
+            obj if type(obj) is bytes else str(obj).encode("utf-8") for obj in elements
+        ]
+    parts = [b""] * (2 * len(elements))
+    parts[::2] = map(_BYTES_LENGTH_PREFIX.pack, map(len, elements))
+    parts[1::2] = elements
+    return np.asarray(b"".join(parts), dtype=np.object_)
 
 
-def deserialize_bytes_tensor(encoded_tensor: bytes) -> np.ndarray:
+def deserialize_bytes_tensor(
+    encoded_tensor: Union[bytes, memoryview], as_memoryview: bool = False
+) -> np.ndarray:
     """
     Deserializes an encoded bytes tensor into a
     numpy array of dtype of python objects
@@ -92,21 +96,95 @@ def deserialize_bytes_tensor(encoded_tensor: bytes) -> np.ndarray:
             The encoded bytes tensor where each element
             has its length in first 4 bytes followed by
             the content
+        as_memoryview : bool
+            Whether to return memoryview slices over the encoded tensor
+            instead of copying each element into a new bytes object.
     Returns:
         string_tensor : np.array
             The 1-D numpy array of type object containing the
             deserialized bytes in row-major form.
+    Raises:
+        InvalidInput If an element length exceeds the encoded tensor.
     """
-    strs = list()
-    offset = 0
-    val_buf = encoded_tensor
-    while offset < len(val_buf):
-        length = struct.unpack_from("<I", val_buf, offset)[0]
-        offset += 4
-        sb = struct.unpack_from("<{}s".format(length), val_buf, offset)[0]
-        offset += length
-        strs.append(sb)
-    return np.array(strs, dtype=np.object_)
+    view = memoryview(encoded_tensor).cast("B")
+    buffer = (
+        view
+        if as_memoryview
+        else encoded_tensor if type(encoded_tensor) is bytes else view.tobytes()
+    )
+    prefix_size = _BYTES_LENGTH_PREFIX.size
+    total_length = len(view)
+    elements = _split_fixed_length_elements(view, buffer)
+    if elements is None:
+        # The offsets of elements of different lengths depend on all the previous length prefixes.
+        unpack_length = _BYTES_LENGTH_PREFIX.unpack_from
+        elements = []
+        append = elements.append
+        offset = 0
+        while offset < total_length:
+            start = offset + prefix_size
+            offset = start + unpack_length(view, offset)[0]
+            append(buffer[start:offset])
+        if offset > total_length:
+            raise InvalidInput(
+                f"invalid bytes tensor: element length exceeds the {total_length} bytes of the tensor"
+            )
+    strs = np.empty(len(elements), dtype=np.object_)
+    strs[:] = elements
+    return strs
+
+
+def _split_fixed_length_elements(
+    view: memoryview, buffer: Union[bytes, memoryview]
+) -> Optional[List]:
+    """
+    Split an encoded bytes tensor whose elements all have the same length. The length prefixes are
+    checked at once with a strided view instead of being unpacked one by one. Returns None if the
+    elements have different lengths.
+    """
+    prefix_size = _BYTES_LENGTH_PREFIX.size
+    total_length = len(view)
+    if total_length < prefix_size:
+        return None
+    length = _BYTES_LENGTH_PREFIX.unpack_from(view, 0)[0]
+    stride = length + prefix_size
+    if total_length % stride != 0:
+        return None
+    prefixes = np.ndarray(
+        (total_length // stride,), dtype="<u4", buffer=view, strides=(stride,)
+    )
+    if not (prefixes == length).all():
+        return None
+    return [
+        buffer[start : start + length]
+        for start in range(prefix_size, total_length, stride)
+    ]
+
+
+def _bytes_tensor_to_str_list(tensor: np.ndarray) -> List[str]:
+    """
+    Decodes the elements of a bytes tensor as UTF-8 strings in row-major order.
+
+    :param tensor: The bytes tensor of dtype np.object_ or np.bytes_.
+    :return: The flat list of strings.
+    :raises InferenceError: if an element can't be decoded using UTF-8.
+    """
+    elements = tensor.ravel(order="C").tolist()
+    try:
+        # We need to convert the object to string using utf-8,
+        # if we want to use the binary_data=False. JSON requires
+        # the input to be a UTF-8 string.
+        if tensor.dtype == np.object_:
+            return [
+                str(obj, encoding="utf-8") if type(obj) is bytes else str(obj)
+                for obj in elements
+            ]
+        return [str(obj, encoding="utf-8") for obj in elements]
+    except UnicodeDecodeError as e:
+        raise InferenceError(
+            f'Failed to encode "{e.object}" using UTF-8. Please use binary_data=True, if'
+            " you want to pass a byte array."
+        )
 
 
 class InferInput:
@@ -266,29 +344,10 @@ class InferInput:
                 self._parameters.pop("binary_data_size", None)
             self._raw_data = None
             if self._datatype == "BYTES":
-                self._data = []
-                try:
-                    if input_tensor.size > 0:
-                        for obj in np.nditer(
-                            input_tensor, flags=["refs_ok"], order="C"
-                        ):
-                            # We need to convert the object to string using utf-8,
-                            # if we want to use the binary_data=False. JSON requires
-                            # the input to be a UTF-8 string.
-                            if input_tensor.dtype == np.object_:
-                                if type(obj.item()) == bytes:
-                                    self._data.append(str(obj.item(), encoding="utf-8"))
-                                else:
-                                    self._data.append(str(obj.item()))
-                            else:
-                                self._data.append(str(obj.item(), encoding="utf-8"))
-                except UnicodeDecodeError:
-                    raise InferenceError(
-                        f'Failed to encode "{obj.item()}" using UTF-8. Please use binary_data=True, if'
-                        " you want to pass a byte array."
-                    )
+                self._data = _bytes_tensor_to_str_list(input_tensor)
             else:
-                self._data = [val.item() for val in input_tensor.flatten()]
+                # The array is kept as is, it is converted to a list only if the JSON encoder needs one.
+                self._data = input_tensor
         else:
             self._data = None
             if self._datatype == "BYTES":
@@ -304,6 +363,10 @@ class InferInput:
             else:
                 self._parameters["binary_data_size"] = len(self._raw_data)
 
+    def __getstate__(self):
+        # Used when the object is sent to a process pool.
+        return _picklable_state(self.__dict__.copy())
+
     def __eq__(self, other):
         if not isinstance(other, InferInput):
             return False
@@ -315,7 +378,7 @@ class InferInput:
             return False
         if self.parameters != other.parameters:
             return False
-        if self.data != other.data:
+        if not _data_equal(self.data, other.data):
             return False
         return True
 
@@ -381,6 +444,12 @@ class InferRequest:
             self._use_raw_outputs = True
             for i, raw_input in enumerate(raw_inputs):
                 self.inputs[i]._raw_data = raw_input
+        if parameters and "binary_data_output" in parameters:
+            # REST clients request the outputs in binary format with the binary_data_output parameter.
+            binary_data_output = parameters["binary_data_output"]
+            if isinstance(binary_data_output, InferParameter):
+                binary_data_output = binary_data_output.bool_param
+            self._use_raw_outputs = binary_data_output is True
 
     @property
     def use_binary_outputs(self) -> bool:
@@ -390,15 +459,27 @@ class InferRequest:
         """
         return self._use_raw_outputs
 
+    @use_binary_outputs.setter
+    def use_binary_outputs(self, use_binary_outputs: bool):
+        self._use_raw_outputs = use_binary_outputs
+
     @classmethod
     def from_grpc(cls, request: ModelInferRequest):
-        """The class method to construct the InferRequest from a ModelInferRequest"""
+        """The class method to construct the InferRequest from a ModelInferRequest.
+        When the request uses raw_input_contents, the typed contents are not decoded and
+        the inputs keep the raw bytes, which are read with zero-copy numpy views.
+        """
+        use_raw_contents = len(request.raw_input_contents) > 0
         infer_inputs = [
             InferInput(
                 name=input_tensor.name,
                 shape=list(input_tensor.shape),
                 datatype=input_tensor.datatype,
-                data=get_content(input_tensor.datatype, input_tensor.contents),
+                data=(
+                    None
+                    if use_raw_contents
+                    else get_content(input_tensor.datatype, input_tensor.contents)
+                ),
                 parameters=input_tensor.parameters,
             )
             for input_tensor in request.inputs
@@ -412,9 +493,72 @@ class InferRequest:
             parameters=request.parameters,
         )
 
-    def to_rest(self) -> Dict:
+    @classmethod
+    def from_bytes(
+        cls, req_bytes: bytes, json_length: int, model_name: str
+    ) -> "InferRequest":
+        """The class method to construct the InferRequest from a REST request body using the binary tensor
+        data extension. The body starts with a JSON header of ``json_length`` bytes, followed by the raw
+        data of each input which specifies the ``binary_data_size`` parameter, in the order of the inputs.
+        The raw data is not copied, the inputs keep a memoryview over the request body.
+
+        Args:
+            req_bytes: The request body.
+            json_length: The length of the JSON header, as sent in the `Inference-Header-Content-Length` header.
+            model_name: The name of the model.
+
+        Returns:
+            The InferRequest object.
+
+        Raises:
+            InvalidInput: If the JSON header or the binary tensor data is malformed.
+        """
+        header, raw_tensors = _decode_binary_body(req_bytes, json_length, "inputs")
+        infer_request = cls.from_rest(model_name, header)
+        for infer_input, raw_tensor in zip(infer_request.inputs, raw_tensors):
+            infer_input._raw_data = raw_tensor
+        return infer_request
+
+    @classmethod
+    def from_rest(cls, model_name: str, request: Dict) -> "InferRequest":
+        """The class method to construct the InferRequest object from a decoded v2 REST request.
+        The request schema is checked without walking the elements of the tensor data.
+
+        Args:
+            model_name: The name of the model.
+            request: The v2 REST request decoded from JSON.
+
+        Returns:
+            The InferRequest object.
+
+        Raises:
+            InvalidInput: If the request does not follow the v2 REST request schema.
+        """
+        _validate_rest_body(request, "inputs")
+        infer_inputs = [
+            InferInput(
+                name=input_tensor["name"],
+                shape=input_tensor["shape"],
+                datatype=input_tensor["datatype"],
+                data=input_tensor.get("data", None),
+                parameters=input_tensor.get("parameters", None) or {},
+            )
+            for input_tensor in request["inputs"]
+        ]
+        return cls(
+            request_id=request.get("id", None),
+            model_name=model_name,
+            infer_inputs=infer_inputs,
+            parameters=request.get("parameters", None),
+        )
+
+    def to_rest(self, numpy_data: bool = False) -> Dict:
         """Converts the InferRequest object to v2 REST InferRequest Dict.
 
+        Args:
+            numpy_data: Keep the numeric tensor data as numpy arrays instead of converting it to lists.
+                The dict must then be serialized with orjson and the ``OPT_SERIALIZE_NUMPY`` option.
+
         Returns:
             The InferRequest Dict converted from InferRequest object.
         """
@@ -432,11 +576,7 @@ class InferRequest:
                 infer_input_dict["parameters"] = to_http_parameters(
                     infer_input.parameters
                 )
-            if isinstance(infer_input.data, np.ndarray):
-                infer_input.set_data_from_numpy(infer_input.data, binary_data=False)
-                infer_input_dict["data"] = infer_input.data
-            else:
-                infer_input_dict["data"] = infer_input.data
+            infer_input_dict["data"] = _to_rest_data(infer_input, numpy_data)
             infer_inputs.append(infer_input_dict)
         infer_request = {
             "id": self.id if self.id else str(uuid.uuid4()),
@@ -446,17 +586,57 @@ class InferRequest:
             infer_request["parameters"] = to_http_parameters(self.parameters)
         return infer_request
 
-    def to_grpc(self) -> ModelInferRequest:
+    def to_bytes(self) -> Tuple[bytes, int]:
+        """Converts the InferRequest object to a v2 REST request body using the binary tensor data extension.
+        The data of all the inputs is sent as raw bytes after the JSON header.
+
+        Returns:
+            The request body and the length of its JSON header.
+        """
+        infer_inputs = []
+        raw_tensors = []
+        for infer_input in self.inputs:
+            raw_tensor = _to_raw_data(infer_input)
+            parameters = (
+                to_http_parameters(infer_input.parameters)
+                if infer_input.parameters
+                else {}
+            )
+            parameters["binary_data_size"] = len(raw_tensor)
+            infer_inputs.append(
+                {
+                    "name": infer_input.name,
+                    "shape": infer_input.shape,
+                    "datatype": infer_input.datatype,
+                    "parameters": parameters,
+                }
+            )
+            raw_tensors.append(raw_tensor)
+        header = {
+            "id": self.id if self.id else str(uuid.uuid4()),
+            "inputs": infer_inputs,
+        }
+        if self.parameters:
+            header["parameters"] = to_http_parameters(self.parameters)
+        return _encode_binary_body(header, raw_tensors)
+
+    def to_grpc(self, use_typed_contents: bool = False) -> ModelInferRequest:
         """Converts the InferRequest object to gRPC ModelInferRequest type.
 
+        Args:
+            use_typed_contents: Send the input data in the typed contents fields instead of
+                                raw_input_contents. Inputs with FP16 datatype are always sent as raw contents.
+
         Returns:
             The ModelInferResponse gRPC type converted from InferRequest object.
         """
         infer_inputs = []
         raw_input_contents = []
+        # raw_input_contents can't be mixed with typed contents, FP16 has no typed contents field.
+        use_raw_contents = not use_typed_contents or any(
+            infer_input.datatype == "FP16" for infer_input in self.inputs
+        )
         for infer_input in self.inputs:
-            if isinstance(infer_input.data, np.ndarray):
-                infer_input.set_data_from_numpy(infer_input.data, binary_data=True)
             infer_input_dict = {
                 "name": infer_input.name,
                 "shape": infer_input.shape,
@@ -466,23 +646,10 @@ class InferRequest:
                 infer_input_dict["parameters"] = to_grpc_parameters(
                     infer_input.parameters
                 )
-            if infer_input._raw_data is not None:
-                raw_input_contents.append(infer_input._raw_data)
+            if use_raw_contents:
+                raw_input_contents.append(bytes(_to_raw_data(infer_input)))
             else:
-                if not isinstance(infer_input.data, List):
-                    raise InvalidInput("input data is not a List")
-                infer_input_dict["contents"] = {}
-                data_key = GRPC_CONTENT_DATATYPE_MAPPINGS.get(
-                    infer_input.datatype, None
-                )
-                if data_key is not None:
-                    infer_input._data = [
-                        bytes(val, "utf-8") if isinstance(val, str) else val
-                        for val in infer_input.data
-                    ]  # str to byte conversion for grpc proto
-                    infer_input_dict["contents"][data_key] = infer_input.data
-                else:
-                    raise InvalidInput("invalid input datatype")
+                infer_input_dict["contents"] = _to_grpc_contents(infer_input, "input")
             infer_inputs.append(infer_input_dict)
 
         return ModelInferRequest(
@@ -493,22 +660,91 @@ class InferRequest:
             parameters=to_grpc_parameters(self.parameters) if self.parameters else None,
         )
 
-    def as_dataframe(self) -> pd.DataFrame:
-        """Decode the tensor inputs as pandas dataframe.
+    @property
+    def content_type(self) -> str:
+        """The content_type request parameter, e.g. ``pd`` for the pandas dataframe inputs.
+
+        Returns:
+            The content type, or an empty string if it is not set.
+        """
+        if not self.parameters or "content_type" not in self.parameters:
+            return ""
+        content_type = self.parameters["content_type"]
+        if isinstance(content_type, InferParameter):
+            # for v2 grpc, we get InferParameter obj eg: {"content_type": string_param: "pd"}
+            return str(content_type.string_param)
+        # for v2 http, we get string eg: {"content_type": "pd"}
+        return content_type
+
+    def as_dataframe(self) -> "pd.DataFrame":
+        """Decode the tensor inputs as pandas dataframe, one column per input.
 
         Returns:
             The inference input data as pandas dataframe
         """
-        dfs = []
-        for input in self.inputs:
-            input_data = input.data
-            if input.datatype == "BYTES":
-                input_data = [
-                    str(val, "utf-8") if isinstance(val, bytes) else val
-                    for val in input.data
-                ]
-            dfs.append(pd.DataFrame(input_data, columns=[input.name]))
-        return pd.concat(dfs, axis=1)
+        import pandas as pd
+
+        columns = {}
+        for infer_input in self.inputs:
+            if infer_input.datatype == "BYTES":
+                columns[infer_input.name] = _bytes_tensor_to_str_list(
+                    infer_input.as_numpy()
+                )
+            else:
+                columns[infer_input.name] = infer_input.as_numpy().reshape(-1)
+        return pd.DataFrame(columns, copy=False)
+
+    def as_arrow_table(self) -> "pyarrow.Table":
+        """Decode the tensor inputs as a pyarrow Table.
+
+        With the ``arrow`` content type the request has a single BYTES input holding an Arrow IPC stream,
+        which is read without copying the record batches. Otherwise each input becomes a column and the
+        numeric inputs are wrapped without copying.
+
+        Returns:
+            The inference input data as pyarrow Table.
+
+        Raises:
+            InvalidInput: If the Arrow IPC stream is missing or invalid.
+        """
+        pa = _import_pyarrow()
+        if self.content_type != "arrow":
+            arrays = []
+            for infer_input in self.inputs:
+                if infer_input.datatype == "BYTES":
+                    arrays.append(
+                        pa.array(
+                            _bytes_tensor_to_str_list(infer_input.as_numpy()),
+                            type=pa.string(),
+                        )
+                    )
+                else:
+                    arrays.append(pa.array(infer_input.as_numpy().reshape(-1)))
+            return pa.Table.from_arrays(
+                arrays, names=[infer_input.name for infer_input in self.inputs]
+            )
+
+        if len(self.inputs) != 1 or self.inputs[0].datatype != "BYTES":
+            raise InvalidInput(
+                "arrow content requires a single BYTES input holding an Arrow IPC stream"
+            )
+        infer_input = self.inputs[0]
+        if infer_input._raw_data is not None:
+            elements = deserialize_bytes_tensor(
+                infer_input._raw_data, as_memoryview=True
+            )
+        else:
+            elements = infer_input.data or []
+        if len(elements) != 1 or not isinstance(
+            elements[0], (bytes, bytearray, memoryview)
+        ):
+            raise InvalidInput(
+                "arrow content requires a single binary element holding an Arrow IPC stream"
+            )
+        try:
+            return pa.ipc.open_stream(pa.py_buffer(elements[0])).read_all()
+        except pa.ArrowInvalid as e:
+            raise InvalidInput(f"invalid Arrow IPC stream: {e}")
 
     def get_input_by_name(self, name: str) -> Optional[InferInput]:
         """Find an input Tensor in the InferenceRequest that has the given name
@@ -525,6 +761,10 @@ class InferRequest:
                 return infer_input
         return None
 
+    def __getstate__(self):
+        # Used when the object is sent to a process pool.
+        return _picklable_state(self.__dict__.copy())
+
     def __eq__(self, other):
         if not isinstance(other, InferRequest):
             return False
@@ -699,29 +939,10 @@ class InferOutput:
                 self._parameters.pop("binary_data_size", None)
             self._raw_data = None
             if self._datatype == "BYTES":
-                self._data = []
-                try:
-                    if output_tensor.size > 0:
-                        for obj in np.nditer(
-                            output_tensor, flags=["refs_ok"], order="C"
-                        ):
-                            # We need to convert the object to string using utf-8,
-                            # if we want to use the binary_data=False. JSON requires
-                            # the input to be a UTF-8 string.
-                            if output_tensor.dtype == np.object_:
-                                if type(obj.item()) == bytes:
-                                    self._data.append(str(obj.item(), encoding="utf-8"))
-                                else:
-                                    self._data.append(str(obj.item()))
-                            else:
-                                self._data.append(str(obj.item(), encoding="utf-8"))
-                except UnicodeDecodeError:
-                    raise InferenceError(
-                        f'Failed to encode "{obj.item()}" using UTF-8. Please use binary_data=True, if'
-                        " you want to pass a byte array."
-                    )
+                self._data = _bytes_tensor_to_str_list(output_tensor)
             else:
-                self._data = [val.item() for val in output_tensor.flatten()]
+                # The array is kept as is, it is converted to a list only if the JSON encoder needs one.
+                self._data = output_tensor
         else:
             self._data = None
             if self._datatype == "BYTES":
@@ -737,6 +958,10 @@ class InferOutput:
             else:
                 self._parameters["binary_data_size"] = len(self._raw_data)
 
+    def __getstate__(self):
+        # Used when the object is sent to a process pool.
+        return _picklable_state(self.__dict__.copy())
+
     def __eq__(self, other):
         if not isinstance(other, InferOutput):
             return False
@@ -748,7 +973,7 @@ class InferOutput:
             return False
         if self.parameters != other.parameters:
             return False
-        if self.data != other.data:
+        if not _data_equal(self.data, other.data):
             return False
         return True
 
@@ -795,13 +1020,21 @@ class InferResponse:
 
     @classmethod
     def from_grpc(cls, response: ModelInferResponse) -> "InferResponse":
-        """The class method to construct the InferResponse object from gRPC message type."""
+        """The class method to construct the InferResponse object from gRPC message type.
+        When the response uses raw_output_contents, the typed contents are not decoded and
+        the outputs keep the raw bytes, which are read with zero-copy numpy views.
+        """
+        use_raw_contents = len(response.raw_output_contents) > 0
         infer_outputs = [
             InferOutput(
                 name=output.name,
                 shape=list(output.shape),
                 datatype=output.datatype,
-                data=get_content(output.datatype, output.contents),
+                data=(
+                    None
+                    if use_raw_contents
+                    else get_content(output.datatype, output.contents)
+                ),
                 parameters=output.parameters,
             )
             for output in response.outputs
@@ -824,7 +1057,7 @@ class InferResponse:
                 name=output["name"],
                 shape=list(output["shape"]),
                 datatype=output["datatype"],
-                data=output["data"],
+                data=output.get("data", None),
                 parameters=output.get("parameters", None),
             )
             for output in response["outputs"]
@@ -837,9 +1070,36 @@ class InferResponse:
             infer_outputs=infer_outputs,
         )
 
-    def to_rest(self) -> Dict:
+    @classmethod
+    def from_bytes(cls, res_bytes: bytes, json_length: int) -> "InferResponse":
+        """The class method to construct the InferResponse object from a REST response body using the binary
+        tensor data extension. The raw output data is not copied, the outputs keep a memoryview over the body.
+
+        Args:
+            res_bytes: The response body.
+            json_length: The length of the JSON header, as sent in the `Inference-Header-Content-Length` header.
+
+        Returns:
+            The InferResponse object.
+
+        Raises:
+            InvalidInput: If the JSON header or the binary tensor data is malformed.
+        """
+        header, raw_tensors = _decode_binary_body(res_bytes, json_length, "outputs")
+        if not isinstance(header.get("model_name", None), str):
+            raise InvalidInput('Expected "model_name" to be a string')
+        infer_response = cls.from_rest(header["model_name"], header)
+        for infer_output, raw_tensor in zip(infer_response.outputs, raw_tensors):
+            infer_output._raw_data = raw_tensor
+        return infer_response
+
+    def to_rest(self, numpy_data: bool = False) -> Dict:
         """Converts the InferResponse object to v2 REST InferResponse dict.
 
+        Args:
+            numpy_data: Keep the numeric tensor data as numpy arrays instead of converting it to lists.
+                The dict must then be serialized with orjson and the ``OPT_SERIALIZE_NUMPY`` option.
+
         Returns:
             The InferResponse Dict.
         """
@@ -854,13 +1114,7 @@ class InferResponse:
                 infer_output_dict["parameters"] = to_http_parameters(
                     infer_output.parameters
                 )
-            if isinstance(infer_output.data, np.ndarray):
-                infer_output.set_data_from_numpy(infer_output.data, binary_data=False)
-                infer_output_dict["data"] = infer_output.data
-            elif isinstance(infer_output._raw_data, bytes):
-                infer_output_dict["data"] = infer_output.as_numpy().tolist()
-            else:
-                infer_output_dict["data"] = infer_output.data
+            infer_output_dict["data"] = _to_rest_data(infer_output, numpy_data)
             infer_outputs.append(infer_output_dict)
         res = {
             "id": self.id,
@@ -872,27 +1126,58 @@ class InferResponse:
             res["parameters"] = to_http_parameters(self.parameters)
         return res
 
-    def to_grpc(self) -> ModelInferResponse:
+    def to_bytes(self) -> Tuple[bytes, int]:
+        """Converts the InferResponse object to a v2 REST response body using the binary tensor data extension.
+        The data of all the outputs is sent as raw bytes after the JSON header.
+
+        Returns:
+            The response body and the length of its JSON header.
+        """
+        infer_outputs = []
+        raw_tensors = []
+        for infer_output in self.outputs:
+            raw_tensor = _to_raw_data(infer_output)
+            parameters = (
+                to_http_parameters(infer_output.parameters)
+                if infer_output.parameters
+                else {}
+            )
+            parameters["binary_data_size"] = len(raw_tensor)
+            infer_outputs.append(
+                {
+                    "name": infer_output.name,
+                    "shape": infer_output.shape,
+                    "datatype": infer_output.datatype,
+                    "parameters": parameters,
+                }
+            )
+            raw_tensors.append(raw_tensor)
+        header = {
+            "id": self.id,
+            "model_name": self.model_name,
+            "model_version": self.model_version,
+            "outputs": infer_outputs,
+        }
+        if self.parameters:
+            header["parameters"] = to_http_parameters(self.parameters)
+        return _encode_binary_body(header, raw_tensors)
+
+    def to_grpc(self, use_typed_contents: bool = False) -> ModelInferResponse:
         """Converts the InferResponse object to gRPC ModelInferResponse type.
 
+        Args:
+            use_typed_contents: Send the output data in the typed contents fields instead of
+                                raw_output_contents. Outputs are always sent as raw contents if
+                                the response contains an output with FP16 datatype.
+
         Returns:
             The ModelInferResponse gRPC message.
         """
         infer_outputs = []
         raw_output_contents = []
-        use_raw_outputs = False
-        # If FP16 datatype is present in the outputs use raw outputs.
-        if _contains_fp16_datatype(self):
-            use_raw_outputs = True
+        # raw_output_contents can't be mixed with typed contents, FP16 has no typed contents field.
+        use_raw_contents = not use_typed_contents or _contains_fp16_datatype(self)
         for infer_output in self.outputs:
-            if (
-                use_raw_outputs
-                and infer_output.data
-                and isinstance(infer_output.data, list)
-            ):
-                infer_output.data = infer_output.as_numpy()
-            if isinstance(infer_output.data, np.ndarray):
-                infer_output.set_data_from_numpy(infer_output.data, binary_data=True)
             infer_output_dict = {
                 "name": infer_output.name,
                 "shape": infer_output.shape,
@@ -902,23 +1187,12 @@ class InferResponse:
                 infer_output_dict["parameters"] = to_grpc_parameters(
                     infer_output.parameters
                 )
-            if infer_output._raw_data is not None:
-                raw_output_contents.append(infer_output._raw_data)
+            if use_raw_contents:
+                raw_output_contents.append(bytes(_to_raw_data(infer_output)))
             else:
-                if not isinstance(infer_output.data, List):
-                    raise InvalidInput("output data is not a List")
-                infer_output_dict["contents"] = {}
-                data_key = GRPC_CONTENT_DATATYPE_MAPPINGS.get(
-                    infer_output.datatype, None
+                infer_output_dict["contents"] = _to_grpc_contents(
+                    infer_output, "output"
                 )
-                if data_key is not None:
-                    infer_output._data = [
-                        bytes(val, "utf-8") if isinstance(val, str) else val
-                        for val in infer_output.data
-                    ]  # str to byte conversion for grpc proto
-                    infer_output_dict["contents"][data_key] = infer_output.data
-                else:
-                    raise InvalidInput("to_grpc: invalid output datatype")
             infer_outputs.append(infer_output_dict)
 
         return ModelInferResponse(
@@ -946,6 +1220,10 @@ class InferResponse:
                 return infer_output
         return None
 
+    def __getstate__(self):
+        # Used when the object is sent to a process pool.
+        return _picklable_state(self.__dict__.copy())
+
     def __eq__(self, other):
         if not isinstance(other, InferResponse):
             return False
@@ -1023,3 +1301,224 @@ def _contains_fp16_datatype(infer_response: InferResponse) -> bool:
         if infer_output.datatype == "FP16":
             return True
     return False
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise InferenceError(
+            "The arrow content type requires the pyarrow package, install it with kserve[arrow]."
+        )
+    return pyarrow
+
+
+def _picklable_state(state: Dict) -> Dict:
+    """
+    Converts the gRPC parameter maps and the memoryviews of a data model state to picklable types.
+    The gRPC parameters are converted to their REST representation.
+
+    :param state: A copy of the object attributes.
+    :return: The picklable state.
+    """
+    for key, val in state.items():
+        if isinstance(val, MessageMap):
+            state[key] = to_http_parameters(val)
+        elif isinstance(val, memoryview):
+            state[key] = val.tobytes()
+    return state
+
+
+def _to_raw_data(tensor: Union[InferInput, InferOutput]) -> Union[bytes, memoryview]:
+    """
+    Gets the raw bytes of an inference input or output, serializing its data if it is not in binary format.
+
+    :param tensor: An InferInput or InferOutput object.
+    :return: The raw tensor data.
+    """
+    if tensor._raw_data is not None:
+        return tensor._raw_data
+    np_array = tensor.as_numpy()
+    if tensor.datatype == "BYTES":
+        serialized = serialize_byte_tensor(np_array)
+        return serialized.item() if serialized.size > 0 else b""
+    return np_array.tobytes()
+
+
+def _to_grpc_contents(
+    tensor: Union[InferInput, InferOutput], tensor_kind: str
+) -> Dict[str, List]:
+    """
+    Gets the gRPC typed contents of an inference input or output.
+
+    :param tensor: An InferInput or InferOutput object.
+    :param tensor_kind: "input" or "output", used in the error messages.
+    :return: The InferTensorContents fields as a dict.
+    :raises InvalidInput: if the tensor data is not a list or the datatype has no typed contents field.
+    """
+    data_key = GRPC_CONTENT_DATATYPE_MAPPINGS.get(tensor.datatype, None)
+    if data_key is None:
+        raise InvalidInput(f"to_grpc: invalid {tensor_kind} datatype")
+    if tensor._raw_data is not None or isinstance(tensor.data, np.ndarray):
+        data = tensor.as_numpy().ravel().tolist()
+    elif isinstance(tensor.data, List):
+        data = tensor.data
+        if len(data) > 0 and isinstance(data[0], List):
+            data = tensor.as_numpy().ravel().tolist()
+    else:
+        raise InvalidInput(f"{tensor_kind} data is not a List")
+    if tensor.datatype == "BYTES":
+        # str to byte conversion for grpc proto
+        data = [bytes(val, "utf-8") if isinstance(val, str) else val for val in data]
+    return {data_key: data}
+
+
+def _to_rest_data(
+    tensor: Union[InferInput, InferOutput], numpy_data: bool = False
+) -> Union[List, np.ndarray]:
+    """
+    Gets the data of an inference input or output for the v2 REST JSON body.
+
+    :param tensor: An InferInput or InferOutput object.
+    :param numpy_data: Whether to return the numeric data as numpy arrays.
+    :return: The tensor data as a list, or as a numpy array if numpy_data is set.
+    """
+    data = tensor.data
+    if isinstance(data, np.ndarray):
+        if tensor.datatype == "BYTES":
+            return _bytes_tensor_to_str_list(data)
+        return data.ravel() if numpy_data else data.ravel().tolist()
+    if tensor._raw_data is not None:
+        if numpy_data and tensor.datatype != "BYTES":
+            return tensor.as_numpy()
+        return _raw_data_to_list(tensor)
+    return data
+
+
+def _data_equal(data, other) -> bool:
+    if isinstance(data, np.ndarray) or isinstance(other, np.ndarray):
+        if data is None or other is None:
+            return False
+        return np.array_equal(np.asarray(data).ravel(), np.asarray(other).ravel())
+    return data == other
+
+
+def _raw_data_to_list(tensor: Union[InferInput, InferOutput]) -> List:
+    """
+    Decodes the raw bytes of an inference input or output as a JSON serializable list.
+
+    :param tensor: An InferInput or InferOutput object holding raw data.
+    :return: The tensor data as a nested list.
+    """
+    np_array = tensor.as_numpy()
+    if tensor.datatype == "BYTES":
+        return _bytes_tensor_to_str_list(np_array)
+    return np_array.tolist()
+
+
+def _encode_binary_body(header: Dict, raw_tensors: List[bytes]) -> Tuple[bytes, int]:
+    """
+    Encodes a REST body with the binary tensor data extension.
+
+    :param header: The JSON header of the request or response.
+    :param raw_tensors: The raw data of the tensors in the order they appear in the header.
+    :return: The body and the length of the JSON header.
+    """
+    json_header = orjson.dumps(header)
+    return b"".join([json_header, *raw_tensors]), len(json_header)
+
+
+def _decode_binary_body(
+    body: bytes, json_length: int, key: str
+) -> Tuple[Dict, List[Optional[memoryview]]]:
+    """
+    Decodes a REST body with the binary tensor data extension.
+
+    :param body: The request or response body.
+    :param json_length: The length of the JSON header.
+    :param key: The key of the tensors in the JSON header, "inputs" or "outputs".
+    :return: The JSON header and the raw data of each tensor, None for tensors sent as JSON data.
+    :raises InvalidInput: if the header or the binary tensor data is malformed.
+    """
+    if json_length < 0 or json_length > len(body):
+        raise InvalidInput(
+            f"invalid inference header content length {json_length} for a body of {len(body)} bytes"
+        )
+    try:
+        header = orjson.loads(memoryview(body)[:json_length])
+    except orjson.JSONDecodeError as e:
+        raise InvalidInput(f"Unrecognized request format: {e}")
+    _validate_rest_body(header, key)
+    binary_data = memoryview(body)[json_length:]
+    raw_tensors = []
+    offset = 0
+    for tensor in header[key]:
+        parameters = tensor.get("parameters", None)
+        binary_data_size = parameters.get("binary_data_size") if parameters else None
+        if binary_data_size is None:
+            raw_tensors.append(None)
+            continue
+        if not isinstance(binary_data_size, int) or binary_data_size < 0:
+            raise InvalidInput(f"invalid binary_data_size {binary_data_size}")
+        if offset + binary_data_size > len(binary_data):
+            raise InvalidInput(
+                f"binary_data_size {binary_data_size} exceeds the remaining {len(binary_data) - offset} bytes"
+            )
+        raw_tensors.append(binary_data[offset : offset + binary_data_size])
+        offset += binary_data_size
+    if offset != len(binary_data):
+        raise InvalidInput(
+            f"unexpected {len(binary_data) - offset} bytes of binary data after the last tensor"
+        )
+    return header, raw_tensors
+
+
+def _validate_parameters(parameters, location: str):
+    if parameters is None:
+        return
+    if not isinstance(parameters, dict):
+        raise InvalidInput(f'Expected "{location}" to be an object')
+    for key, val in parameters.items():
+        if not isinstance(val, (str, bool, int, float)):
+            raise InvalidInput(
+                f'Expected "{location}.{key}" to be a string, number or boolean'
+            )
+
+
+def _validate_rest_body(body: Dict, key: str):
+    """
+    Checks a decoded v2 REST request or response against the inference protocol schema. Only the structure
+    of the tensors is checked, the elements of the tensor data are not walked.
+
+    :param body: The decoded v2 REST request or response.
+    :param key: The key of the tensors, "inputs" or "outputs".
+    :raises InvalidInput: if the body does not follow the schema.
+    """
+    if not isinstance(body, dict):
+        raise InvalidInput("Expected the inference body to be an object")
+    tensors = body.get(key, None)
+    if not isinstance(tensors, list):
+        raise InvalidInput(f'Expected "{key}" to be a list')
+    request_id = body.get("id", None)
+    if request_id is not None and not isinstance(request_id, str):
+        raise InvalidInput('Expected "id" to be a string')
+    _validate_parameters(body.get("parameters", None), "parameters")
+    for i, tensor in enumerate(tensors):
+        location = f"{key}[{i}]"
+        if not isinstance(tensor, dict):
+            raise InvalidInput(f'Expected "{location}" to be an object')
+        if not isinstance(tensor.get("name", None), str):
+            raise InvalidInput(f'Expected "{location}.name" to be a string')
+        if not isinstance(tensor.get("datatype", None), str):
+            raise InvalidInput(f'Expected "{location}.datatype" to be a string')
+        shape = tensor.get("shape", None)
+        if not isinstance(shape, list) or not all(type(dim) is int for dim in shape):
+            raise InvalidInput(f'Expected "{location}.shape" to be a list of integers')
+        parameters = tensor.get("parameters", None)
+        _validate_parameters(parameters, f"{location}.parameters")
+        if "data" in tensor:
+            if not isinstance(tensor["data"], list):
+                raise InvalidInput(f'Expected "{location}.data" to be a list')
+        elif not parameters or "binary_data_size" not in parameters:
+            raise InvalidInput(f'Missing "{location}.data"')
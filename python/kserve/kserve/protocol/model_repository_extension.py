@@ -17,6 +17,7 @@ import sys
 from typing import Dict, List, Optional
 
 from ..errors import ModelNotFound, ModelNotReady
+from ..model import Model
 from ..model_repository import ModelRepository
 
 
@@ -90,6 +91,9 @@ class ModelRepositoryExtension:
                 model_name, f"Error type: {ex_type} error msg: {ex_value}"
             )
 
+        model = self._model_registry.get_model(model_name)
+        if isinstance(model, Model):
+            await model.warmup()
         if not self._model_registry.is_model_ready(model_name):
             raise ModelNotReady(model_name)
 
@@ -12,23 +12,60 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .openai_model import (
-    ChatPrompt,
-    CompletionRequest,
-    ChatCompletionRequest,
-    OpenAIModel,
-)
+import importlib
+from typing import TYPE_CHECKING
+
+# The OpenAI types are a large set of pydantic models, they are only imported when used.
+_LAZY_IMPORTS = {
+    "OpenAIModel": ".openai_model",
+    "ChatPrompt": ".openai_model",
+    "CompletionRequest": ".openai_model",
+    "ChatCompletionRequest": ".openai_model",
+    "EmbeddingRequest": ".openai_model",
+    "OpenAIEncoderModel": ".openai_model",
+    "create_embedding_response": ".openai_model",
+    "OpenAIProxyModel": ".openai_proxy_model",
+    "OpenAIChatAdapterModel": ".openai_chat_adapter_model",
+    "ChatCompletionRequestMessage": ".types",
+}
+
+if TYPE_CHECKING:
+    from .openai_chat_adapter_model import OpenAIChatAdapterModel
+    from .openai_model import (
+        ChatCompletionRequest,
+        ChatPrompt,
+        CompletionRequest,
+        EmbeddingRequest,
+        OpenAIEncoderModel,
+        OpenAIModel,
+        create_embedding_response,
+    )
+    from .openai_proxy_model import OpenAIProxyModel
+    from .types import ChatCompletionRequestMessage
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
 
-from .openai_proxy_model import OpenAIProxyModel
-from .openai_chat_adapter_model import OpenAIChatAdapterModel
-from .types import ChatCompletionRequestMessage
 
 __all__ = [
     "OpenAIModel",
+    "OpenAIEncoderModel",
     "OpenAIChatAdapterModel",
     "OpenAIProxyModel",
     "ChatPrompt",
     "CompletionRequest",
     "ChatCompletionRequest",
     "ChatCompletionRequestMessage",
+    "EmbeddingRequest",
+    "create_embedding_response",
 ]
@@ -18,16 +18,21 @@ from fastapi import FastAPI
 
 from ....model import Model
 from ....model_repository import ModelRepository
+from ....utils.utils import lazy_isinstance
 
 
 def get_open_ai_models(repository: ModelRepository) -> List[Model]:
     """Retrieve all models in the repository that implement the OpenAI interface"""
-    from .openai_model import OpenAIModel
-
+    # The OpenAI types are not imported by the servers without OpenAI models.
     return [
         model
         for _, model in repository.get_models().items()
-        if isinstance(model, OpenAIModel)
+        if lazy_isinstance(
+            model, "kserve.protocol.rest.openai.openai_model", "OpenAIModel"
+        )
+        or lazy_isinstance(
+            model, "kserve.protocol.rest.openai.openai_model", "OpenAIEncoderModel"
+        )
     ]
 
 
@@ -44,5 +49,5 @@ def maybe_register_openai_endpoints(app: FastAPI, model_registry: ModelRepositor
     for model in open_ai_models:
         openai_model_registry.update(model)
 
-    # Add the OpenAI completion and chat completion endpoints.
+    # Add the OpenAI completion, chat completion and embeddings endpoints.
     register_openai_endpoints(app, OpenAIDataPlane(openai_model_registry))
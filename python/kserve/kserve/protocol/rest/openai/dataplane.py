@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import AsyncIterator, Union, List
+from typing import Any, AsyncIterator, Dict, Union, List
 
 from fastapi import Response
 from starlette.datastructures import Headers
@@ -28,9 +28,21 @@ from kserve.protocol.rest.openai.types.openapi import CreateCompletionRequest
 from kserve.protocol.rest.openai.types.openapi import (
     CreateCompletionResponse as Completion,
 )
+from kserve.protocol.rest.openai.types.openapi import (
+    CreateEmbeddingRequest,
+    CreateEmbeddingResponse,
+)
 
+from ....admission import get_queue_timeout
+from ....model import Model
 from ...dataplane import DataPlane
-from .openai_model import ChatCompletionRequest, CompletionRequest, OpenAIModel
+from .openai_model import (
+    ChatCompletionRequest,
+    CompletionRequest,
+    EmbeddingRequest,
+    OpenAIEncoderModel,
+    OpenAIModel,
+)
 
 
 class OpenAIDataPlane(DataPlane):
@@ -56,16 +68,16 @@ class OpenAIDataPlane(DataPlane):
         Raises:
             InvalidInput: An error when the body bytes can't be decoded as JSON.
         """
-        model = self.get_model(model_name)
-        if not isinstance(model, OpenAIModel):
-            raise RuntimeError(f"Model {model_name} does not support completion")
+        async with self.use_model(model_name) as model:
+            if not isinstance(model, OpenAIModel):
+                raise RuntimeError(f"Model {model_name} does not support completion")
 
-        completion_request = CompletionRequest(
-            request_id=headers.get("x-request-id", None),
-            params=request,
-            context={"headers": dict(headers), "response": response},
-        )
-        return await model.create_completion(completion_request)
+            completion_request = CompletionRequest(
+                request_id=headers.get("x-request-id", None),
+                params=request,
+                context={"headers": dict(headers), "response": response},
+            )
+            return await model.create_completion(completion_request)
 
     async def create_chat_completion(
         self,
@@ -87,26 +99,61 @@ class OpenAIDataPlane(DataPlane):
         Raises:
             InvalidInput: An error when the body bytes can't be decoded as JSON.
         """
-        model = self.get_model(model_name)
-        if not isinstance(model, OpenAIModel):
-            raise RuntimeError(f"Model {model_name} does not support chat completion")
-
-        completion_request = ChatCompletionRequest(
-            request_id=headers.get("x-request-id", None),
-            params=request,
-            # We pass the response object in the context so it can be used to set response headers or a custom status code
-            context={"headers": dict(headers), "response": response},
-        )
-        return await model.create_chat_completion(completion_request)
-
-    async def models(self) -> List[OpenAIModel]:
+        async with self.use_model(model_name) as model:
+            if not isinstance(model, OpenAIModel):
+                raise RuntimeError(
+                    f"Model {model_name} does not support chat completion"
+                )
+
+            completion_request = ChatCompletionRequest(
+                request_id=headers.get("x-request-id", None),
+                params=request,
+                # We pass the response object in the context so it can be used to set response headers or a custom status code
+                context={"headers": dict(headers), "response": response},
+            )
+            return await model.create_chat_completion(completion_request)
+
+    async def create_embedding(
+        self,
+        model_name: str,
+        request: CreateEmbeddingRequest,
+        headers: Headers,
+        response: Response,
+    ) -> Union[CreateEmbeddingResponse, Dict[str, Any]]:
+        """Embed the provided inputs.
+
+        Args:
+            model_name (str): Model name.
+            request (CreateEmbeddingRequest): Params to create the embeddings.
+            headers: (Headers): Request headers.
+            response: (Response): FastAPI response object
+
+        Returns:
+            response: An embeddings response.
+        """
+        async with self.use_model(model_name) as model:
+            if not isinstance(model, OpenAIEncoderModel):
+                raise RuntimeError(f"Model {model_name} does not support embeddings")
+
+            embedding_request = EmbeddingRequest(
+                request_id=headers.get("x-request-id", None),
+                params=request,
+                context={"headers": dict(headers), "response": response},
+            )
+            # The embeddings are admitted like the predict requests of the model.
+            if isinstance(model, Model) and model.admission_controller is not None:
+                async with model.admission_controller.admit(get_queue_timeout(headers)):
+                    return await model.create_embedding(embedding_request)
+            return await model.create_embedding(embedding_request)
+
+    async def models(self) -> List[Union[OpenAIModel, OpenAIEncoderModel]]:
         """Retrieve a list of models
 
         Returns:
-            response: A list of OpenAIModel instances
+            response: A list of OpenAIModel and OpenAIEncoderModel instances
         """
         return [
             model
             for model in self.model_registry.get_models().values()
-            if isinstance(model, OpenAIModel)
+            if isinstance(model, (OpenAIModel, OpenAIEncoderModel))
         ]
@@ -19,12 +19,14 @@ import time
 
 from fastapi import APIRouter, FastAPI, Request, Response
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from pydantic import TypeAdapter, ValidationError
 from starlette.responses import StreamingResponse
 
 from kserve.protocol.rest.openai.types.openapi import (
     CreateChatCompletionRequest,
     CreateCompletionRequest,
+    CreateEmbeddingRequest,
     ListModelsResponse,
     Model,
 )
@@ -41,6 +43,7 @@ if len(OPENAI_ROUTE_PREFIX) > 0 and not OPENAI_ROUTE_PREFIX.startswith("/"):
 
 CreateCompletionRequestAdapter = TypeAdapter(CreateCompletionRequest)
 ChatCompletionRequestAdapter = TypeAdapter(CreateChatCompletionRequest)
+EmbeddingRequestAdapter = TypeAdapter(CreateEmbeddingRequest)
 
 
 class OpenAIEndpoints:
@@ -137,6 +140,42 @@ class OpenAIEndpoints:
         else:
             return completion
 
+    async def create_embedding(
+        self,
+        raw_request: Request,
+        request_body: CreateEmbeddingRequest,
+        response: Response,
+    ) -> Response:
+        """Create embedding handler.
+
+        Args:
+            raw_request (Request): fastapi request object,
+            request_body (CreateEmbeddingRequest): Embedding params body.
+
+        Returns:
+            Response: Embeddings response object.
+        """
+        try:
+            params = EmbeddingRequestAdapter.validate_python(request_body)
+        except ValidationError as e:
+            raise RequestValidationError(errors=e.errors())
+        model_name = params.model
+        model_ready = self.dataplane.model_ready(model_name)
+
+        if not model_ready:
+            raise ModelNotReady(model_name)
+
+        embeddings = await self.dataplane.create_embedding(
+            model_name=model_name,
+            request=params,
+            headers=raw_request.headers,
+            response=response,
+        )
+        if isinstance(embeddings, dict):
+            # Serialized with orjson directly, the numpy embeddings skip the conversion to lists.
+            return ORJSONResponse(content=embeddings)
+        return embeddings
+
     async def models(
         self,
     ) -> ListModelsResponse:
@@ -177,6 +216,13 @@ def register_openai_endpoints(app: FastAPI, dataplane: OpenAIDataPlane):
         response_model_exclude_none=True,
         response_model_exclude_unset=True,
     )
+    openai_router.add_api_route(
+        r"/v1/embeddings",
+        endpoints.create_embedding,
+        methods=["POST"],
+        response_model_exclude_none=True,
+        response_model_exclude_unset=True,
+    )
     openai_router.add_api_route(
         r"/v1/models",
         endpoints.models,
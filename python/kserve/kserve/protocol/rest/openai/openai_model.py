@@ -14,8 +14,10 @@
 
 from abc import abstractmethod
 from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+import base64
 import inspect
 
+import numpy as np
 from pydantic import BaseModel
 
 from kserve.protocol.rest.openai.types import (
@@ -24,6 +26,8 @@ from kserve.protocol.rest.openai.types import (
     Completion,
     CreateChatCompletionRequest,
     CreateCompletionRequest,
+    CreateEmbeddingRequest,
+    CreateEmbeddingResponse,
 )
 
 from ....model import BaseKServeModel
@@ -48,6 +52,12 @@ class ChatCompletionRequest(BaseCompletionRequest):
     params: CreateChatCompletionRequest
 
 
+class EmbeddingRequest(BaseModel):
+    request_id: Optional[str] = None
+    context: Optional[Dict[str, Any]] = None  # headers can go in here
+    params: CreateEmbeddingRequest
+
+
 class OpenAIModel(BaseKServeModel):
     """
     An abstract model with methods for implementing OpenAI's completions (v1/completions)
@@ -77,6 +87,58 @@ class OpenAIModel(BaseKServeModel):
         pass
 
 
+class OpenAIEncoderModel(BaseKServeModel):
+    """
+    An abstract model with a method for implementing OpenAI's embeddings (v1/embeddings) endpoint.
+
+    Users should extend this model and implement the abstract method in order to expose
+    the endpoint. Unlike OpenAIModel, it can be mixed into a Model which also serves the
+    v1/v2 inference protocols.
+    """
+
+    @abstractmethod
+    async def create_embedding(
+        self, request: EmbeddingRequest
+    ) -> Union[CreateEmbeddingResponse, Dict[str, Any]]:
+        pass
+
+
+def create_embedding_response(
+    model_name: str,
+    embeddings: np.ndarray,
+    prompt_tokens: int,
+    encoding_format: str = "float",
+) -> Dict[str, Any]:
+    """Build the body of an embeddings response.
+
+    The embeddings are kept as numpy rows, which are serialized by orjson without building a list of
+    python floats, or encoded as base64 of their little-endian float32 bytes like the OpenAI API does.
+
+    Args:
+        model_name: The name of the model which generated the embeddings.
+        embeddings: A 2D array with one embedding per input.
+        prompt_tokens: The number of tokens of the inputs.
+        encoding_format: Either "float" or "base64".
+
+    Returns:
+        A dict in the shape of CreateEmbeddingResponse.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="<f4")
+    if encoding_format == "base64":
+        values = [base64.b64encode(row.tobytes()).decode("ascii") for row in embeddings]
+    else:
+        values = list(embeddings)
+    return {
+        "object": "list",
+        "model": model_name,
+        "data": [
+            {"object": "embedding", "index": index, "embedding": value}
+            for index, value in enumerate(values)
+        ],
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
+
+
 class AsyncMappingIterator:
     def __init__(
         self,
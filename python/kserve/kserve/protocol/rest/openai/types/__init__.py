@@ -40,6 +40,9 @@ from kserve.protocol.rest.openai.types.openapi import CreateCompletionRequest
 from kserve.protocol.rest.openai.types.openapi import (
     CreateCompletionResponse as Completion,
 )
+from kserve.protocol.rest.openai.types.openapi import CreateEmbeddingRequest
+from kserve.protocol.rest.openai.types.openapi import CreateEmbeddingResponse
+from kserve.protocol.rest.openai.types.openapi import Embedding
 from kserve.protocol.rest.openai.types.openapi import Logprobs
 from kserve.protocol.rest.openai.types.openapi import (
     Logprobs2 as ChatCompletionChoiceLogprobs,
@@ -76,6 +79,9 @@ __all__ = [
     "CompletionChoice",
     "CreateChatCompletionRequest",
     "CreateCompletionRequest",
+    "CreateEmbeddingRequest",
+    "CreateEmbeddingResponse",
+    "Embedding",
     "ErrorResponse",
     "Logprobs",
     "TopLogprob",
@@ -31,13 +31,16 @@ from kserve.errors import (
     InvalidInput,
     ModelNotFound,
     ModelNotReady,
+    ModelOverloaded,
     generic_exception_handler,
     inference_error_handler,
     invalid_input_handler,
     model_not_found_handler,
     model_not_ready_handler,
+    model_overloaded_handler,
     not_implemented_error_handler,
 )
+from kserve.executor import set_default_executor
 from kserve.logging import trace_logger
 from kserve.protocol.dataplane import DataPlane
 
@@ -182,6 +185,7 @@ class RESTServer:
                     v2_endpoints.infer,
                     methods=["POST"],
                     tags=["V2"],
+                    response_model=None,
                     include_in_schema=False,
                 ),
                 FastAPIRoute(
@@ -202,6 +206,7 @@ class RESTServer:
                 InferenceError: inference_error_handler,
                 ModelNotFound: model_not_found_handler,
                 ModelNotReady: model_not_ready_handler,
+                ModelOverloaded: model_overloaded_handler,
                 NotImplementedError: not_implemented_error_handler,
                 Exception: generic_exception_handler,
             },
@@ -260,9 +265,14 @@ class UvicornServer:
 
         self.server = _NoSignalUvicornServer(config=self.cfg)
 
-    def run_sync(self):
-        server = uvicorn.Server(config=self.cfg)
-        asyncio.run(server.serve(sockets=self.sockets))
+    def run_sync(self, max_asyncio_workers: Optional[int] = None):
+        async def serve():
+            if max_asyncio_workers is not None:
+                set_default_executor(max_asyncio_workers)
+            server = uvicorn.Server(config=self.cfg)
+            await server.serve(sockets=self.sockets)
+
+        asyncio.run(serve())
 
     async def run(self):
         await self.server.serve()
@@ -14,6 +14,7 @@
 from typing import Optional, Union, Dict, List, AsyncIterator
 
 from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
 from starlette.responses import StreamingResponse
 
 from kserve.errors import ModelNotReady
@@ -92,6 +93,9 @@ class V1Endpoints:
             return Response(content=response, headers=response_headers)
         if isinstance(response, AsyncIterator):
             return StreamingResponse(content=response)
+        if isinstance(response, dict):
+            # Serialized with orjson directly, numpy arrays in the response skip the conversion to lists.
+            return ORJSONResponse(content=response)
         return response
 
     async def explain(self, model_name: str, request: Request) -> Union[Response, Dict]:
@@ -126,4 +130,5 @@ class V1Endpoints:
 
         if not isinstance(response, dict):
             return Response(content=response, headers=response_headers)
-        return response
+        # Serialized with orjson like the predict response, the explanations often hold numpy arrays.
+        return ORJSONResponse(content=response)
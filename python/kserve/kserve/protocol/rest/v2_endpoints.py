@@ -13,23 +13,23 @@
 # limitations under the License.
 from typing import Optional, Dict
 
+import orjson
 from fastapi.requests import Request
-from fastapi.responses import Response
+from fastapi.responses import ORJSONResponse, Response
 
-from ..infer_type import InferInput, InferRequest
+from ..infer_type import InferRequest, InferResponse
 from .v2_datamodels import (
-    InferenceRequest,
     ServerMetadataResponse,
     ServerLiveResponse,
     ServerReadyResponse,
     ModelMetadataResponse,
-    InferenceResponse,
     ModelReadyResponse,
     ListModelsResponse,
 )
 from ..dataplane import DataPlane
 from ..model_repository_extension import ModelRepositoryExtension
-from ...errors import ModelNotReady
+from ...constants.constants import INFERENCE_CONTENT_LENGTH_HEADER
+from ...errors import InvalidInput, ModelNotReady
 
 
 class V2Endpoints:
@@ -123,22 +123,22 @@ class V2Endpoints:
     async def infer(
         self,
         raw_request: Request,
-        raw_response: Response,
         model_name: str,
-        request_body: InferenceRequest,
         model_version: Optional[str] = None,
-    ) -> InferenceResponse:
+    ) -> Response:
         """Infer handler.
 
+        The request body is either a JSON inference request or, when the `Inference-Header-Content-Length`
+        header is set, a JSON header followed by the binary tensor data.
+
         Args:
             raw_request (Request): fastapi request object,
-            raw_response (Response): fastapi response object,
             model_name (str): Model name.
-            request_body (InferenceRequest): Inference request body.
             model_version (Optional[str]): Model version (optional).
 
         Returns:
-            InferenceResponse: Inference response object.
+            Response: The JSON inference response, or the binary response when the outputs
+                      are requested in binary format.
         """
         # TODO: support model_version
         if model_version:
@@ -150,26 +150,36 @@ class V2Endpoints:
             raise ModelNotReady(model_name)
 
         request_headers = dict(raw_request.headers)
-        infer_inputs = [
-            InferInput(
-                name=input.name,
-                shape=input.shape,
-                datatype=input.datatype,
-                data=input.data,
-                parameters={} if input.parameters is None else input.parameters,
-            )
-            for input in request_body.inputs
-        ]
-        infer_request = InferRequest(
-            request_id=request_body.id,
-            model_name=model_name,
-            infer_inputs=infer_inputs,
-            parameters=request_body.parameters,
-        )
+        body = await raw_request.body()
+        json_length = request_headers.get(INFERENCE_CONTENT_LENGTH_HEADER, None)
+        if json_length is not None:
+            try:
+                json_length = int(json_length)
+            except ValueError:
+                raise InvalidInput(
+                    f"invalid {INFERENCE_CONTENT_LENGTH_HEADER} header: {json_length}"
+                )
+            infer_request = InferRequest.from_bytes(body, json_length, model_name)
+        else:
+            # The body is decoded straight into the InferRequest, bypassing the pydantic data models which
+            # validate the tensor data element by element.
+            try:
+                request_body = orjson.loads(body)
+            except orjson.JSONDecodeError as e:
+                raise InvalidInput(f"Unrecognized request format: {e}")
+            infer_request = InferRequest.from_rest(model_name, request_body)
         response, response_headers = await self.dataplane.infer(
             model_name=model_name, request=infer_request, headers=request_headers
         )
 
+        binary_headers = {}
+        if isinstance(response, InferResponse) and infer_request.use_binary_outputs:
+            response, json_length = response.to_bytes()
+            binary_headers = {
+                "content-type": "application/octet-stream",
+                INFERENCE_CONTENT_LENGTH_HEADER: str(json_length),
+            }
+
         response, response_headers = self.dataplane.encode(
             model_name=model_name,
             response=response,
@@ -177,10 +187,11 @@ class V2Endpoints:
             req_attributes={},
         )
 
-        if response_headers:
-            raw_response.headers.update(response_headers)
-        res = InferenceResponse.parse_obj(response)
-        return res
+        if isinstance(response, (bytes, str)):
+            return Response(
+                content=response, headers={**response_headers, **binary_headers}
+            )
+        return ORJSONResponse(content=response, headers=response_headers)
 
     async def load(self, model_name: str) -> Dict:
         """Model load handler.
@@ -0,0 +1,230 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import orjson
+
+from .constants.constants import CACHE_BYPASS_HEADER
+from .metrics import RESPONSE_CACHE_HITS, RESPONSE_CACHE_MISSES, get_labels
+from .protocol.infer_type import InferRequest, InferResponse, to_http_parameters
+from .utils.utils import generate_uuid
+
+CacheKey = Tuple[str, Optional[str], bytes]
+
+_ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class _CacheEntry:
+    def __init__(self, response: Any, size: int, expires_at: Optional[float]):
+        self.response = response
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 60,
+    ):
+        """An in-memory LRU cache of inference responses keyed on the model and the decoded inputs.
+
+        Entries expire ``ttl_seconds`` after they are stored, and the least recently used entries are evicted
+        when the cache holds more than ``max_entries`` responses or ``max_bytes`` of response data.
+
+        Args:
+            max_entries: The max number of cached responses.
+            max_bytes: The max estimated size in bytes of the cached responses.
+            ttl_seconds: The time to live in seconds of a cached response. Entries don't expire if not set.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """The estimated size in bytes of the cached responses."""
+        return self._size
+
+    def get(
+        self, key: CacheKey, request: Union[Dict, InferRequest]
+    ) -> Optional[Union[Dict, InferResponse]]:
+        """Get the cached response of a request.
+
+        Args:
+            key: The cache key of the request.
+            request: The request, whose id is set on a cached v2 response.
+
+        Returns:
+            A copy of the cached response, or None on a cache miss.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at is not None:
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+        if entry is None:
+            RESPONSE_CACHE_MISSES.labels(**get_labels(key[0])).inc()
+            return None
+        self._entries.move_to_end(key)
+        RESPONSE_CACHE_HITS.labels(**get_labels(key[0])).inc()
+        if isinstance(entry.response, bytes):
+            return orjson.loads(entry.response)
+        response = copy.copy(entry.response)
+        response.outputs = list(response.outputs)
+        response.id = request.id if request.id else generate_uuid()
+        return response
+
+    def put(self, key: CacheKey, response: Union[Dict, InferResponse]):
+        """Store the response of a request, unless it can't be serialized or is larger than the cache.
+
+        Args:
+            key: The cache key of the request.
+            response: The inference response.
+        """
+        if isinstance(response, dict):
+            try:
+                value = orjson.dumps(response, option=orjson.OPT_SERIALIZE_NUMPY)
+            except TypeError:
+                return
+            size = len(value)
+        elif isinstance(response, InferResponse):
+            value = response
+            try:
+                size = _response_size(response)
+            except TypeError:
+                return
+        else:
+            return
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = (
+            time.monotonic() + self.ttl_seconds
+            if self.ttl_seconds is not None
+            else None
+        )
+        self._entries[key] = _CacheEntry(value, size, expires_at)
+        self._size += size
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, model_name: str):
+        """Remove the cached responses of a model.
+
+        Args:
+            model_name: The name of the model.
+        """
+        for key in [key for key in self._entries if key[0] == model_name]:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+
+def get_cache_key(
+    model_name: str,
+    request: Union[Dict, InferRequest],
+    headers: Optional[Dict[str, str]] = None,
+    model_version: Optional[str] = None,
+) -> Optional[CacheKey]:
+    """Get the response cache key of a request.
+
+    The key is a hash of the decoded inputs: the tensor bytes with their shapes, datatypes and
+    parameters for v2 requests, the JSON body for v1 requests.
+
+    Args:
+        model_name: The name of the model.
+        request: The decoded request.
+        headers: Request headers. The request is not cached when the cache bypass header is true.
+        model_version: The version of the model.
+
+    Returns:
+        The cache key, or None if the request must not be cached.
+    """
+    if headers and headers.get(CACHE_BYPASS_HEADER, "").lower() == "true":
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        if isinstance(request, InferRequest):
+            digest.update(
+                orjson.dumps(
+                    [
+                        request.use_binary_outputs,
+                        request.from_grpc,
+                        to_http_parameters(request.parameters or {}),
+                    ],
+                    option=_ORJSON_OPTIONS,
+                )
+            )
+            for infer_input in request.inputs:
+                digest.update(
+                    orjson.dumps(
+                        [
+                            infer_input.name,
+                            infer_input.datatype,
+                            list(infer_input.shape),
+                            to_http_parameters(infer_input.parameters or {}),
+                        ],
+                        option=_ORJSON_OPTIONS,
+                    )
+                )
+                digest.update(_tensor_bytes(infer_input))
+        elif isinstance(request, dict):
+            digest.update(orjson.dumps(request, option=_ORJSON_OPTIONS))
+        else:
+            return None
+    except TypeError:
+        return None
+    return model_name, model_version, digest.digest()
+
+
+def _tensor_bytes(infer_input) -> Union[bytes, memoryview]:
+    # The tensor buffers are hashed in place, without copying them to bytes.
+    if infer_input._raw_data is not None:
+        return memoryview(infer_input._raw_data)
+    data = infer_input.data
+    if isinstance(data, np.ndarray) and data.dtype != np.object_:
+        return memoryview(np.ascontiguousarray(data).reshape(-1).view(np.uint8))
+    return orjson.dumps(data, option=_ORJSON_OPTIONS)
+
+
+def _response_size(response: InferResponse) -> int:
+    size = 0
+    for output in response.outputs:
+        if output._raw_data is not None:
+            size += len(output._raw_data)
+        elif isinstance(output.data, np.ndarray) and output.data.dtype != np.object_:
+            size += output.data.nbytes
+        else:
+            size += len(orjson.dumps(output.data, option=orjson.OPT_SERIALIZE_NUMPY))
+    return size
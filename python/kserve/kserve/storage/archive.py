@@ -0,0 +1,159 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import queue
+import tarfile
+import threading
+from typing import BinaryIO, Optional
+
+from ..logging import logger
+
+_READ_AHEAD_CHUNK_SIZE = 1024 * 1024
+_READ_AHEAD_CHUNKS = 16
+_CLOSE_TIMEOUT_SECONDS = 1
+
+# Archive name suffixes whose compression is not detected by the tarfile module.
+_TAR_COMPRESSION_SUFFIXES = {
+    ".tar.zst": "zst",
+    ".tzst": "zst",
+    ".tar.lz4": "lz4",
+}
+
+
+def get_tar_compression(name: str) -> Optional[str]:
+    """Get the compression of a tar archive which needs an extra decompressor, from the archive name.
+
+    Args:
+        name: The archive name.
+
+    Returns:
+        ``zst`` or ``lz4``, or None if the archive is not compressed with one of them.
+    """
+    for suffix, compression in _TAR_COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            return compression
+    return None
+
+
+class _ReadAheadReader(io.RawIOBase):
+    def __init__(self, fileobj: BinaryIO):
+        """Reads a stream on a background thread, so that reading from the network overlaps with the
+        decompression and the extraction of the data already received."""
+        self._fileobj = fileobj
+        self._queue: "queue.Queue" = queue.Queue(maxsize=_READ_AHEAD_CHUNKS)
+        self._buffer = memoryview(b"")
+        self._eof = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._read, name="kserve-read-ahead", daemon=True
+        )
+        self._thread.start()
+
+    def _read(self):
+        try:
+            while not self._stopped.is_set():
+                chunk = self._fileobj.read(_READ_AHEAD_CHUNK_SIZE)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if not self._buffer:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._buffer = memoryview(item)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if self.closed:
+            return
+        self._stopped.set()
+        # The reading thread can be blocked in a read from the network, closing the stream makes the read
+        # return or fail. The thread is a daemon and is not waited for longer if the stream ignores it.
+        try:
+            self._fileobj.close()
+        except Exception as e:
+            logger.debug(f"Failed to close the archive stream: {e}")
+        self._thread.join(_CLOSE_TIMEOUT_SECONDS)
+        super().close()
+
+
+def extract_tar_stream(
+    fileobj: BinaryIO, target_dir: str, compression: Optional[str] = None
+):
+    """Extract a tar archive while it is being read, without storing the archive.
+
+    gzip, bz2 and xz archives are detected by the tarfile module, zstd and lz4 archives need the
+    ``zstandard`` and ``lz4`` packages.
+
+    Args:
+        fileobj: The archive stream.
+        target_dir: The directory the archive is extracted to.
+        compression: ``zst`` or ``lz4`` for archives compressed with them.
+
+    Raises:
+        RuntimeError: If the archive is not valid or its decompressor is not installed.
+    """
+    reader = io.BufferedReader(_ReadAheadReader(fileobj), _READ_AHEAD_CHUNK_SIZE)
+    try:
+        stream = reader
+        if compression == "zst":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError(
+                    "The zstandard package is required to unpack zstd archives, install it with kserve[storage]."
+                )
+            stream = zstandard.ZstdDecompressor().stream_reader(reader)
+        elif compression == "lz4":
+            try:
+                import lz4.frame
+            except ImportError:
+                raise RuntimeError(
+                    "The lz4 package is required to unpack lz4 archives, install it with kserve[storage]."
+                )
+            stream = lz4.frame.LZ4FrameFile(reader, mode="rb")
+        logger.info("Unpacking archive stream to %s", target_dir)
+        with tarfile.open(fileobj=stream, mode="r|*", encoding="utf-8") as archive:
+            archive.extractall(target_dir)
+    except (tarfile.TarError, EOFError) as e:
+        raise RuntimeError(
+            "Failed to unpack archive file. The file format is not valid: %s" % e
+        )
+    finally:
+        reader.close()
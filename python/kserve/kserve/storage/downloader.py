@@ -0,0 +1,257 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from ..logging import logger
+
+_DOWNLOAD_WORKERS_ENV = "STORAGE_DOWNLOAD_WORKERS"
+_PART_SIZE_ENV = "STORAGE_DOWNLOAD_PART_SIZE"
+_MULTIPART_THRESHOLD_ENV = "STORAGE_DOWNLOAD_MULTIPART_THRESHOLD"
+
+_DEFAULT_DOWNLOAD_WORKERS = 8
+_DEFAULT_PART_SIZE = 32 * 1024 * 1024
+_DEFAULT_MULTIPART_THRESHOLD = 64 * 1024 * 1024
+_PART_RETRIES = 3
+
+_PART_SUFFIX = ".part"
+_STATE_SUFFIX = ".part.json"
+_ETAG_XATTR = "user.kserve.etag"
+
+# Downloads the whole object to the given path.
+DownloadFile = Callable[[str], None]
+# Returns the bytes of the object between the start and end offsets, both inclusive.
+ReadRange = Callable[[int, int], Iterable[bytes]]
+
+
+class _MultipartDownload:
+    def __init__(self, target: str, size: int, etag: str, part_size: int):
+        self.target = target
+        self.size = size
+        self.etag = etag
+        self.part_size = part_size
+        self.part_path = target + _PART_SUFFIX
+        self.state_path = target + _STATE_SUFFIX
+        self.done: Set[int] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def part_count(self) -> int:
+        return (self.size + self.part_size - 1) // self.part_size
+
+    def prepare(self):
+        """Load the progress of an earlier attempt, or start over if the object or the part size changed."""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if (
+                state.get("etag") == self.etag
+                and state.get("size") == self.size
+                and state.get("part_size") == self.part_size
+                and os.path.getsize(self.part_path) == self.size
+            ):
+                self.done = set(state.get("parts", []))
+                logger.info(
+                    "Resuming download of %s, %d/%d parts already downloaded",
+                    self.target,
+                    len(self.done),
+                    self.part_count,
+                )
+                return
+        except (OSError, ValueError):
+            pass
+        self.done = set()
+        with open(self.part_path, "wb") as f:
+            f.truncate(self.size)
+        self._save_state()
+
+    def download_part(self, index: int, read_range: ReadRange):
+        start = index * self.part_size
+        end = min(start + self.part_size, self.size) - 1
+        for attempt in range(1, _PART_RETRIES + 1):
+            try:
+                written = 0
+                with open(self.part_path, "r+b") as f:
+                    f.seek(start)
+                    for chunk in read_range(start, end):
+                        f.write(chunk)
+                        written += len(chunk)
+                if written != end - start + 1:
+                    raise RuntimeError(
+                        "Downloaded %d bytes of %s, expected %d."
+                        % (written, self.target, end - start + 1)
+                    )
+                break
+            except Exception as e:
+                if attempt == _PART_RETRIES:
+                    raise
+                logger.warning(
+                    "Failed to download part %d of %s, retrying: %s",
+                    index,
+                    self.target,
+                    e,
+                )
+        with self._lock:
+            self.done.add(index)
+            self._save_state()
+
+    def finalize(self):
+        os.replace(self.part_path, self.target)
+        os.remove(self.state_path)
+
+    def _save_state(self):
+        state = {
+            "etag": self.etag,
+            "size": self.size,
+            "part_size": self.part_size,
+            "parts": sorted(self.done),
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+
+class ParallelDownloader:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        part_size: Optional[int] = None,
+        multipart_threshold: Optional[int] = None,
+    ):
+        """Downloads objects concurrently on a pool of worker threads.
+
+        Objects larger than ``multipart_threshold`` are split into parts of ``part_size`` bytes fetched with
+        ranged reads and written in place into a ``.part`` file. The downloaded parts are recorded next to it
+        with the object size and ETag, so that a download interrupted by a failure resumes from the missing
+        parts if the object did not change. The ETag of a downloaded object is stored in an extended attribute
+        where the file system supports it, and the object is skipped when it is downloaded again.
+
+        The defaults are read from the ``STORAGE_DOWNLOAD_WORKERS``, ``STORAGE_DOWNLOAD_PART_SIZE`` and
+        ``STORAGE_DOWNLOAD_MULTIPART_THRESHOLD`` environment variables.
+
+        Args:
+            workers: The number of download threads.
+            part_size: The size in bytes of the parts of a multipart download.
+            multipart_threshold: The min size in bytes of the objects downloaded in parts.
+        """
+        self.workers = workers or int(
+            os.getenv(_DOWNLOAD_WORKERS_ENV, _DEFAULT_DOWNLOAD_WORKERS)
+        )
+        self.part_size = part_size or int(os.getenv(_PART_SIZE_ENV, _DEFAULT_PART_SIZE))
+        self.multipart_threshold = multipart_threshold or int(
+            os.getenv(_MULTIPART_THRESHOLD_ENV, _DEFAULT_MULTIPART_THRESHOLD)
+        )
+        self._executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix="kserve-download"
+        )
+        self._futures: List[Future] = []
+        self._multipart: List[_MultipartDownload] = []
+        self._completed: List[Tuple[str, str]] = []
+
+    def __enter__(self) -> "ParallelDownloader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.wait()
+        else:
+            self._cancel()
+
+    def submit(
+        self,
+        target: str,
+        download_file: DownloadFile,
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+        read_range: Optional[ReadRange] = None,
+    ):
+        """Schedule the download of an object.
+
+        Args:
+            target: The local path of the object.
+            download_file: Downloads the whole object to a local path.
+            size: The size in bytes of the object, if known.
+            etag: The ETag of the object, if known.
+            read_range: Reads a byte range of the object. The object is downloaded in a single request if not set.
+        """
+        if not isinstance(size, int) or not isinstance(etag, str):
+            size = etag = None
+        elif _is_downloaded(target, size, etag):
+            logger.info("Skipping %s, already downloaded", target)
+            return
+        if read_range is not None and size is not None:
+            if size >= self.multipart_threshold:
+                download = _MultipartDownload(target, size, etag, self.part_size)
+                download.prepare()
+                self._multipart.append(download)
+                for index in range(download.part_count):
+                    if index not in download.done:
+                        self._futures.append(
+                            self._executor.submit(
+                                download.download_part, index, read_range
+                            )
+                        )
+                return
+        self._futures.append(self._executor.submit(download_file, target))
+        if etag is not None:
+            self._completed.append((target, etag))
+
+    def wait(self):
+        """Wait for the scheduled downloads to complete.
+
+        Raises:
+            Exception: The first download failure, the other pending downloads are cancelled.
+        """
+        try:
+            done, _ = wait(self._futures, return_when=FIRST_EXCEPTION)
+            for future in done:
+                future.result()
+        except BaseException:
+            self._cancel()
+            raise
+        try:
+            for download in self._multipart:
+                download.finalize()
+                self._completed.append((download.target, download.etag))
+            for target, etag in self._completed:
+                _set_etag(target, etag)
+        finally:
+            self._executor.shutdown()
+
+    def _cancel(self):
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+
+
+def _is_downloaded(target: str, size: int, etag: str) -> bool:
+    try:
+        return (
+            os.path.getsize(target) == size
+            and os.getxattr(target, _ETAG_XATTR).decode() == etag
+        )
+    except (AttributeError, OSError):
+        return False
+
+
+def _set_etag(target: str, etag: str):
+    try:
+        os.setxattr(target, _ETAG_XATTR, etag.encode())
+    except (AttributeError, OSError):
+        pass
@@ -0,0 +1,198 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import errno
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from ..logging import logger
+
+_CACHE_DIR_ENV = "STORAGE_CACHE_DIR"
+_CACHE_MAX_BYTES_ENV = "STORAGE_CACHE_MAX_BYTES"
+
+_ENTRIES_DIR = "entries"
+_LOCKS_DIR = "locks"
+_EVICTION_LOCK = ".eviction.lock"
+
+# Downloads the model to the given directory and returns the directory holding the model files.
+DownloadModel = Callable[[str], str]
+
+
+class ModelCache:
+    def __init__(self, cache_dir: str, max_bytes: Optional[int] = None):
+        """An on-disk cache of downloaded models shared by the processes of a node.
+
+        Entries are keyed on the model URI and a fingerprint of the remote content, e.g. the ETags or
+        generations of the objects, so a model is downloaded again when it changes. The files of an entry
+        are hard linked into the output directory, or copied when they can't be hard linked, e.g. when the
+        output directory is on another file system, so the output directory never depends on an entry which
+        can be evicted. Downloads of the same entry are serialized with a file lock, so concurrent processes
+        share a single copy, and the least recently used entries are evicted when the cache holds more
+        than ``max_bytes``.
+
+        Args:
+            cache_dir: The directory of the cache.
+            max_bytes: The max size in bytes of the cached models. Unlimited if not set.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, _ENTRIES_DIR), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, _LOCKS_DIR), exist_ok=True)
+
+    @staticmethod
+    def from_env() -> Optional["ModelCache"]:
+        """Create the cache configured by the ``STORAGE_CACHE_DIR`` and ``STORAGE_CACHE_MAX_BYTES``
+        environment variables.
+
+        Returns:
+            The model cache, or None if ``STORAGE_CACHE_DIR`` is not set.
+        """
+        cache_dir = os.getenv(_CACHE_DIR_ENV)
+        if not cache_dir:
+            return None
+        max_bytes = os.getenv(_CACHE_MAX_BYTES_ENV)
+        return ModelCache(cache_dir, int(max_bytes) if max_bytes else None)
+
+    @staticmethod
+    def get_key(uri: str, fingerprint: str) -> str:
+        return hashlib.sha256(f"{uri}\n{fingerprint}".encode()).hexdigest()
+
+    def fetch(
+        self, uri: str, fingerprint: str, out_dir: str, download: DownloadModel
+    ) -> str:
+        """Link the cached model into the output directory, downloading it on a cache miss.
+
+        Args:
+            uri: The model URI.
+            fingerprint: Identifies the version of the remote content.
+            out_dir: The output directory.
+            download: Downloads the model to a directory and returns the directory holding the model files.
+
+        Returns:
+            The output directory.
+        """
+        key = ModelCache.get_key(uri, fingerprint)
+        entry_dir = self._entry_dir(key)
+        with _file_lock(self._lock_path(key)):
+            if os.path.isdir(entry_dir):
+                logger.info("Using cached model %s for %s", entry_dir, uri)
+            else:
+                logger.info("Model %s is not cached, downloading", uri)
+                tmp_dir = tempfile.mkdtemp(
+                    dir=os.path.join(self.cache_dir, _ENTRIES_DIR), prefix=".tmp-"
+                )
+                try:
+                    model_dir = download(tmp_dir)
+                    if os.path.realpath(model_dir) != os.path.realpath(tmp_dir):
+                        shutil.move(model_dir, entry_dir)
+                    else:
+                        os.rename(tmp_dir, entry_dir)
+                finally:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+            # The modification time of the entry tracks its last use for the eviction.
+            os.utime(entry_dir)
+            _link_tree(entry_dir, out_dir)
+        self.evict(keep=key)
+        return out_dir
+
+    def evict(self, keep: Optional[str] = None):
+        """Remove the least recently used entries until the cache fits in ``max_bytes``.
+
+        Entries being downloaded or linked by another process are skipped.
+
+        Args:
+            keep: The key of an entry which must not be removed.
+        """
+        if self.max_bytes is None:
+            return
+        with _file_lock(os.path.join(self.cache_dir, _EVICTION_LOCK)):
+            entries = self._entries()
+            total = sum(size for _, _, size in entries)
+            for key, _, size in sorted(entries, key=lambda entry: entry[1]):
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                with _file_lock(self._lock_path(key), blocking=False) as locked:
+                    if not locked:
+                        continue
+                    logger.info("Evicting cached model %s", key)
+                    shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                    total -= size
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        entries_dir = os.path.join(self.cache_dir, _ENTRIES_DIR)
+        for key in os.listdir(entries_dir):
+            if key.startswith("."):
+                continue
+            entry_dir = os.path.join(entries_dir, key)
+            try:
+                entries.append(
+                    (key, os.path.getmtime(entry_dir), _tree_size(entry_dir))
+                )
+            except OSError:
+                continue
+        return entries
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, _ENTRIES_DIR, key)
+
+    def _lock_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, _LOCKS_DIR, key + ".lock")
+
+
+@contextmanager
+def _file_lock(path: str, blocking: bool = True) -> Iterator[bool]:
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _link_tree(src_dir: str, dest_dir: str):
+    for root, _, files in os.walk(src_dir):
+        target_dir = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            src = os.path.join(root, name)
+            dest = os.path.join(target_dir, name)
+            if os.path.lexists(dest):
+                os.remove(dest)
+            try:
+                os.link(src, dest)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+                # A symlink would break when another process evicts the entry.
+                shutil.copy2(src, dest)
+
+
+def _tree_size(path: str) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            size += os.lstat(os.path.join(root, name)).st_size
+    return size
@@ -14,7 +14,6 @@
 
 import base64
 import glob
-import gzip
 import json
 import mimetypes
 import os
@@ -24,12 +23,14 @@ import tarfile
 import tempfile
 import time
 import zipfile
+from functools import partial
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 from urllib.parse import urlparse
 
 import boto3
 import requests
+from azure.core import MatchConditions
 from azure.storage.blob import BlobServiceClient
 from azure.storage.blob._list_blobs_helper import BlobPrefix
 from azure.storage.fileshare import ShareServiceClient
@@ -39,6 +40,9 @@ from google.auth import exceptions
 from google.cloud import storage
 
 from ..logging import logger
+from .archive import extract_tar_stream, get_tar_compression
+from .downloader import ParallelDownloader
+from .model_cache import ModelCache
 
 MODEL_MOUNT_DIRS = "/mnt/models"
 
@@ -53,6 +57,13 @@ _URI_RE = "https?://(.+)/(.+)"
 _HTTP_PREFIX = "http(s)://"
 _HEADERS_SUFFIX = "-headers"
 _PVC_PREFIX = "/mnt/pvc"
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+_TAR_COMPRESSION_CONTENT_TYPES = (
+    "application/zstd",
+    "application/x-zstd",
+    "application/x-lz4",
+    "application/octet-stream",
+)
 
 _HDFS_SECRET_DIRECTORY = "/var/secrets/kserve-hdfscreds"
 _HDFS_FILE_SECRETS = ["KERBEROS_KEYTAB", "TLS_CERT", "TLS_KEY", "TLS_CA"]
@@ -87,30 +98,95 @@ class Storage(object):
                 # Don't need to download models if this InferenceService is running in the multi-model
                 # serving mode. The model agent will download models.
                 model_dir = out_dir
-            elif uri.startswith(_GCS_PREFIX):
-                model_dir = Storage._download_gcs(uri, out_dir)
-            elif uri.startswith(_S3_PREFIX):
-                model_dir = Storage._download_s3(uri, out_dir)
-            elif uri.startswith(_HDFS_PREFIX) or uri.startswith(_WEBHDFS_PREFIX):
-                model_dir = Storage._download_hdfs(uri, out_dir)
-            elif re.search(_AZURE_BLOB_RE, uri):
-                model_dir = Storage._download_azure_blob(uri, out_dir)
-            elif re.search(_AZURE_FILE_RE, uri):
-                model_dir = Storage._download_azure_file_share(uri, out_dir)
-            elif re.search(_URI_RE, uri):
-                model_dir = Storage._download_from_uri(uri, out_dir)
             else:
-                raise Exception(
-                    "Cannot recognize storage type for "
-                    + uri
-                    + "\n'%s', '%s', '%s', and '%s' are the current available storage type."
-                    % (_GCS_PREFIX, _S3_PREFIX, _LOCAL_PREFIX, _HTTP_PREFIX)
-                )
+                model_cache = ModelCache.from_env()
+                fingerprint = Storage._get_fingerprint(uri) if model_cache else None
+                if fingerprint is not None:
+                    model_dir = model_cache.fetch(
+                        uri,
+                        fingerprint,
+                        out_dir,
+                        partial(Storage._download_remote, uri),
+                    )
+                else:
+                    model_dir = Storage._download_remote(uri, out_dir)
 
         logger.info("Successfully copied %s to %s", uri, out_dir)
         logger.info(f"Model downloaded in {time.monotonic() - start} seconds.")
         return model_dir
 
+    @staticmethod
+    def _download_remote(uri: str, out_dir: str) -> str:
+        if uri.startswith(_GCS_PREFIX):
+            return Storage._download_gcs(uri, out_dir)
+        elif uri.startswith(_S3_PREFIX):
+            return Storage._download_s3(uri, out_dir)
+        elif uri.startswith(_HDFS_PREFIX) or uri.startswith(_WEBHDFS_PREFIX):
+            return Storage._download_hdfs(uri, out_dir)
+        elif re.search(_AZURE_BLOB_RE, uri):
+            return Storage._download_azure_blob(uri, out_dir)
+        elif re.search(_AZURE_FILE_RE, uri):
+            return Storage._download_azure_file_share(uri, out_dir)
+        elif re.search(_URI_RE, uri):
+            return Storage._download_from_uri(uri, out_dir)
+        raise Exception(
+            "Cannot recognize storage type for "
+            + uri
+            + "\n'%s', '%s', '%s', and '%s' are the current available storage type."
+            % (_GCS_PREFIX, _S3_PREFIX, _LOCAL_PREFIX, _HTTP_PREFIX)
+        )
+
+    @staticmethod
+    def _get_fingerprint(uri: str) -> Optional[str]:
+        """Identify the version of the remote content of a URI for the model cache.
+
+        Returns:
+            A fingerprint of the object names and ETags or generations, or None if the content of the URI
+            can't be identified and the model must not be cached.
+        """
+        try:
+            if uri.startswith(_GCS_PREFIX):
+                bucket_args = uri.replace(_GCS_PREFIX, "", 1).split("/", 1)
+                prefix = bucket_args[1] if len(bucket_args) > 1 else ""
+                bucket = Storage._get_gcs_client().bucket(bucket_args[0])
+                objects = [
+                    (blob.name, blob.generation)
+                    for blob in bucket.list_blobs(prefix=prefix)
+                ]
+            elif uri.startswith(_S3_PREFIX):
+                parsed = urlparse(uri, scheme="s3")
+                bucket = Storage._get_s3_resource().Bucket(parsed.netloc)
+                objects = [
+                    (obj.key, obj.e_tag)
+                    for obj in bucket.objects.filter(Prefix=parsed.path.lstrip("/"))
+                ]
+            elif re.search(_AZURE_BLOB_RE, uri):
+                _, account_url, container_name, prefix = Storage._parse_azure_uri(uri)
+                container_client = Storage._get_azure_container_client(
+                    account_url, container_name
+                )
+                objects = [
+                    (blob.name, blob.etag)
+                    for blob in container_client.list_blobs(name_starts_with=prefix)
+                ]
+            elif re.search(_URI_RE, uri):
+                headers = json.loads(
+                    os.getenv(urlparse(uri).hostname + _HEADERS_SUFFIX, "{}")
+                )
+                response = requests.head(uri, headers=headers, allow_redirects=True)
+                etag = response.headers.get("ETag")
+                if response.status_code != 200 or not etag:
+                    return None
+                objects = [(uri, etag)]
+            else:
+                return None
+        except Exception as e:
+            logger.warning("Failed to identify the content of %s: %s", uri, e)
+            return None
+        if not objects:
+            return None
+        return json.dumps(sorted(objects))
+
     @staticmethod
     def _update_with_storage_spec():
         storage_secret_json = json.loads(os.environ.get("STORAGE_CONFIG", "{}"))
@@ -176,7 +252,7 @@ class Storage(object):
         return c
 
     @staticmethod
-    def _download_s3(uri, temp_dir: str) -> str:
+    def _get_s3_resource():
         # Boto3 looks at various configuration locations until it finds configuration values.
         # lookup order:
         # 1. Config object passed in as the config parameter when creating S3 resource
@@ -215,7 +291,11 @@ class Storage(object):
                     raise RuntimeError(
                         "Failed to find ca bundle file(%s)." % ca_bundle_full_path
                     )
-        s3 = boto3.resource("s3", **kwargs)
+        return boto3.resource("s3", **kwargs)
+
+    @staticmethod
+    def _download_s3(uri, temp_dir: str) -> str:
+        s3 = Storage._get_s3_resource()
         parsed = urlparse(uri, scheme="s3")
         bucket_name = parsed.netloc
         bucket_path = parsed.path.lstrip("/")
@@ -223,49 +303,62 @@ class Storage(object):
         file_count = 0
         exact_obj_found = False
         bucket = s3.Bucket(bucket_name)
-        for obj in bucket.objects.filter(Prefix=bucket_path):
-            # Skip where boto3 lists the directory as an object
-            if obj.key.endswith("/"):
-                continue
-            # In the case where bucket_path points to a single object, set the target key to bucket_path
-            # Otherwise, remove the bucket_path prefix, strip any extra slashes, then prepend the target_dir
-            # Example:
-            # s3://test-bucket
-            # Objects: /a/b/c/model.bin /a/model.bin /model.bin
-            #
-            # If 'uri' is set to "s3://test-bucket", then the downloader will
-            # download all the objects listed above, re-creating their subpaths
-            # under the temp_dir.
-            # If 'uri' is set to "s3://test-bucket/a", then the downloader will
-            # add to temp_dir: b/c/model.bin and model.bin.
-            # If 'uri' is set to "s3://test-bucket/a/b/c/model.bin", then
-            # the downloader will add to temp dir: model.bin
-            # (without any subpaths).
-            # If the bucket path is s3://test/models
-            # Objects: churn, churn-pickle, churn-pickle-logs
-            bucket_path_last_part = bucket_path.split("/")[-1]
-            object_last_path = obj.key.split("/")[-1]
-
-            if bucket_path == obj.key:
-                target_key = obj.key.rsplit("/", 1)[-1]
-                exact_obj_found = True
-            elif bucket_path_last_part and object_last_path.startswith(
-                bucket_path_last_part
-            ):
-                target_key = object_last_path
-            else:
-                target_key = obj.key.replace(bucket_path, "").lstrip("/")
-
-            target = f"{temp_dir}/{target_key}"
-            if not os.path.exists(os.path.dirname(target)):
-                os.makedirs(os.path.dirname(target), exist_ok=True)
-            bucket.download_file(obj.key, target)
-            logger.info("Downloaded object %s to %s" % (obj.key, target))
-            file_count += 1
+        with ParallelDownloader() as downloader:
+            for obj in bucket.objects.filter(Prefix=bucket_path):
+                # Skip where boto3 lists the directory as an object
+                if obj.key.endswith("/"):
+                    continue
+                # In the case where bucket_path points to a single object, set the target key to bucket_path
+                # Otherwise, remove the bucket_path prefix, strip any extra slashes, then prepend the target_dir
+                # Example:
+                # s3://test-bucket
+                # Objects: /a/b/c/model.bin /a/model.bin /model.bin
+                #
+                # If 'uri' is set to "s3://test-bucket", then the downloader will
+                # download all the objects listed above, re-creating their subpaths
+                # under the temp_dir.
+                # If 'uri' is set to "s3://test-bucket/a", then the downloader will
+                # add to temp_dir: b/c/model.bin and model.bin.
+                # If 'uri' is set to "s3://test-bucket/a/b/c/model.bin", then
+                # the downloader will add to temp dir: model.bin
+                # (without any subpaths).
+                # If the bucket path is s3://test/models
+                # Objects: churn, churn-pickle, churn-pickle-logs
+                bucket_path_last_part = bucket_path.split("/")[-1]
+                object_last_path = obj.key.split("/")[-1]
+
+                if bucket_path == obj.key:
+                    target_key = obj.key.rsplit("/", 1)[-1]
+                    exact_obj_found = True
+                elif bucket_path_last_part and object_last_path.startswith(
+                    bucket_path_last_part
+                ):
+                    target_key = object_last_path
+                else:
+                    target_key = obj.key.replace(bucket_path, "").lstrip("/")
+
+                target = f"{temp_dir}/{target_key}"
+                if not os.path.exists(os.path.dirname(target)):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                logger.info("Downloading object %s to %s" % (obj.key, target))
+                downloader.submit(
+                    target,
+                    partial(bucket.download_file, obj.key),
+                    size=obj.size,
+                    etag=obj.e_tag,
+                    read_range=partial(
+                        Storage._read_s3_range,
+                        s3.meta.client,
+                        bucket_name,
+                        obj.key,
+                        obj.e_tag,
+                    ),
+                )
+                file_count += 1
 
-            # If the exact object is found, then it is sufficient to download that and break the loop
-            if exact_obj_found:
-                break
+                # If the exact object is found, then it is sufficient to download that and break the loop
+                if exact_obj_found:
+                    break
         if file_count == 0:
             raise RuntimeError(
                 "Failed to fetch model. No model found in %s." % bucket_path
@@ -279,11 +372,15 @@ class Storage(object):
         return temp_dir
 
     @staticmethod
-    def _download_gcs(uri, temp_dir: str) -> str:
+    def _get_gcs_client():
         try:
-            storage_client = storage.Client()
+            return storage.Client()
         except exceptions.DefaultCredentialsError:
-            storage_client = storage.Client.create_anonymous_client()
+            return storage.Client.create_anonymous_client()
+
+    @staticmethod
+    def _download_gcs(uri, temp_dir: str) -> str:
+        storage_client = Storage._get_gcs_client()
         bucket_args = uri.replace(_GCS_PREFIX, "", 1).split("/", 1)
         bucket_name = bucket_args[0]
         bucket_path = bucket_args[1] if len(bucket_args) > 1 else ""
@@ -293,22 +390,31 @@ class Storage(object):
             prefix = prefix + "/"
         blobs = bucket.list_blobs(prefix=prefix)
         file_count = 0
-        for blob in blobs:
-            # Replace any prefix from the object key with temp_dir
-            subdir_object_key = blob.name.replace(bucket_path, "", 1).lstrip("/")
-
-            # Create necessary subdirectory to store the object locally
-            if "/" in subdir_object_key:
-                local_object_dir = os.path.join(
-                    temp_dir, subdir_object_key.rsplit("/", 1)[0]
-                )
-                if not os.path.isdir(local_object_dir):
-                    os.makedirs(local_object_dir, exist_ok=True)
-            if subdir_object_key.strip() != "" and not subdir_object_key.endswith("/"):
-                dest_path = os.path.join(temp_dir, subdir_object_key)
-                logger.info("Downloading: %s", dest_path)
-                blob.download_to_filename(dest_path)
-                file_count += 1
+        with ParallelDownloader() as downloader:
+            for blob in blobs:
+                # Replace any prefix from the object key with temp_dir
+                subdir_object_key = blob.name.replace(bucket_path, "", 1).lstrip("/")
+
+                # Create necessary subdirectory to store the object locally
+                if "/" in subdir_object_key:
+                    local_object_dir = os.path.join(
+                        temp_dir, subdir_object_key.rsplit("/", 1)[0]
+                    )
+                    if not os.path.isdir(local_object_dir):
+                        os.makedirs(local_object_dir, exist_ok=True)
+                if subdir_object_key.strip() != "" and not subdir_object_key.endswith(
+                    "/"
+                ):
+                    dest_path = os.path.join(temp_dir, subdir_object_key)
+                    logger.info("Downloading: %s", dest_path)
+                    downloader.submit(
+                        dest_path,
+                        blob.download_to_filename,
+                        size=blob.size,
+                        etag=blob.etag,
+                        read_range=partial(Storage._read_gcs_range, blob),
+                    )
+                    file_count += 1
         if file_count == 0:
             raise RuntimeError("Failed to fetch model. No model found in %s." % uri)
 
@@ -436,6 +542,20 @@ class Storage(object):
                 )
         return out_dir
 
+    @staticmethod
+    def _get_azure_container_client(account_url, container_name):
+        token = (
+            Storage._get_azure_storage_token()
+            or Storage._get_azure_storage_access_key()
+        )
+        if token is None:
+            logger.warning(
+                "Azure credentials or shared access signature token not found, retrying anonymous access"
+            )
+
+        blob_service_client = BlobServiceClient(account_url, credential=token)
+        return blob_service_client.get_container_client(container_name)
+
     @staticmethod
     def _download_azure_blob(
         uri, out_dir: str
@@ -449,17 +569,9 @@ class Storage(object):
             container_name,
             prefix,
         )
-        token = (
-            Storage._get_azure_storage_token()
-            or Storage._get_azure_storage_access_key()
+        container_client = Storage._get_azure_container_client(
+            account_url, container_name
         )
-        if token is None:
-            logger.warning(
-                "Azure credentials or shared access signature token not found, retrying anonymous access"
-            )
-
-        blob_service_client = BlobServiceClient(account_url, credential=token)
-        container_client = blob_service_client.get_container_client(container_name)
         file_count = 0
         blobs = []
         max_depth = 5
@@ -475,17 +587,29 @@ class Storage(object):
                     blobs += container_client.list_blobs(
                         name_starts_with=item.name, include=["snapshots"]
                     )
-        for blob in blobs:
-            file_name = blob.name.replace(prefix, "", 1).lstrip("/")
-            if not file_name:
-                file_name = os.path.basename(prefix)
-            dest_path = os.path.join(out_dir, file_name)
-            Path(os.path.dirname(dest_path)).mkdir(parents=True, exist_ok=True)
-            logger.info("Downloading: %s to %s", blob.name, dest_path)
-            downloader = container_client.download_blob(blob.name)
-            with open(dest_path, "wb+") as f:
-                f.write(downloader.readall())
-            file_count += 1
+        with ParallelDownloader() as downloader:
+            for blob in blobs:
+                file_name = blob.name.replace(prefix, "", 1).lstrip("/")
+                if not file_name:
+                    file_name = os.path.basename(prefix)
+                dest_path = os.path.join(out_dir, file_name)
+                Path(os.path.dirname(dest_path)).mkdir(parents=True, exist_ok=True)
+                logger.info("Downloading: %s to %s", blob.name, dest_path)
+                downloader.submit(
+                    dest_path,
+                    partial(
+                        Storage._download_azure_blob_file, container_client, blob.name
+                    ),
+                    size=blob.size,
+                    etag=blob.etag,
+                    read_range=partial(
+                        Storage._read_azure_blob_range,
+                        container_client,
+                        blob.name,
+                        blob.etag,
+                    ),
+                )
+                file_count += 1
         if file_count == 0:
             raise RuntimeError("Failed to fetch model. No model found in %s." % (uri))
 
@@ -532,18 +656,19 @@ class Storage(object):
                     )
                 else:
                     share_files.append((curr_prefix, item))
-        for prefix, file_item in share_files:
-            parts = [prefix] if prefix else []
-            parts.append(file_item.name)
-            file_path = "/".join(parts).lstrip("/")
-            dest_path = os.path.join(out_dir, file_path)
-            Path(os.path.dirname(dest_path)).mkdir(parents=True, exist_ok=True)
-            logger.info("Downloading: %s to %s", file_item.name, dest_path)
-            file_client = share_client.get_file_client(file_path)
-            with open(dest_path, "wb+") as f:
-                data = file_client.download_file()
-                data.readinto(f)
-            file_count += 1
+        with ParallelDownloader() as downloader:
+            for prefix, file_item in share_files:
+                parts = [prefix] if prefix else []
+                parts.append(file_item.name)
+                file_path = "/".join(parts).lstrip("/")
+                dest_path = os.path.join(out_dir, file_path)
+                Path(os.path.dirname(dest_path)).mkdir(parents=True, exist_ok=True)
+                logger.info("Downloading: %s to %s", file_item.name, dest_path)
+                file_client = share_client.get_file_client(file_path)
+                downloader.submit(
+                    dest_path, partial(Storage._download_azure_share_file, file_client)
+                )
+                file_count += 1
         if file_count == 0:
             raise RuntimeError("Failed to fetch model. No model found in %s." % (uri))
 
@@ -554,6 +679,42 @@ class Storage(object):
                 out_dir = Storage._unpack_archive_file(dest_path, mimetype, out_dir)
         return out_dir
 
+    @staticmethod
+    def _read_s3_range(client, bucket_name, key, etag, start, end):
+        response = client.get_object(
+            Bucket=bucket_name, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag
+        )
+        return response["Body"].iter_chunks(_DOWNLOAD_CHUNK_SIZE)
+
+    @staticmethod
+    def _read_gcs_range(blob, start, end):
+        # Parts are verified by their size, the md5 checksum only covers whole objects.
+        return [
+            blob.download_as_bytes(
+                start=start, end=end, if_etag_match=blob.etag, checksum=None
+            )
+        ]
+
+    @staticmethod
+    def _download_azure_blob_file(container_client, blob_name, dest_path):
+        with open(dest_path, "wb") as f:
+            container_client.download_blob(blob_name).readinto(f)
+
+    @staticmethod
+    def _read_azure_blob_range(container_client, blob_name, etag, start, end):
+        return container_client.download_blob(
+            blob_name,
+            offset=start,
+            length=end - start + 1,
+            etag=etag,
+            match_condition=MatchConditions.IfNotModified,
+        ).chunks()
+
+    @staticmethod
+    def _download_azure_share_file(file_client, dest_path):
+        with open(dest_path, "wb") as f:
+            file_client.download_file().readinto(f)
+
     @staticmethod
     def _parse_azure_uri(uri):  # pylint: disable=too-many-locals
         parsed = urlparse(uri)
@@ -634,10 +795,18 @@ class Storage(object):
         url = urlparse(uri)
         filename = os.path.basename(url.path)
         # Determine if the symbol '?' exists in the path
-        if mimetypes.guess_type(url.path)[0] is None and url.query != "":
-            mimetype, encoding = mimetypes.guess_type(url.query)
+        if (
+            mimetypes.guess_type(url.path)[0] is None
+            and get_tar_compression(url.path) is None
+            and url.query != ""
+        ):
+            archive_name = url.query
         else:
-            mimetype, encoding = mimetypes.guess_type(url.path)
+            archive_name = url.path
+        mimetype, _ = mimetypes.guess_type(archive_name)
+        compression = get_tar_compression(archive_name)
+        if compression is not None:
+            mimetype = "application/x-tar"
         local_path = os.path.join(out_dir, filename)
 
         if filename == "":
@@ -674,6 +843,8 @@ class Storage(object):
                 "application/x-gzip",
                 "application/gzip",
             )
+            if compression is not None:
+                tar_content_types += _TAR_COMPRESSION_CONTENT_TYPES
             if mimetype == "application/x-tar" and not response.headers.get(
                 "Content-Type", ""
             ).startswith(tar_content_types):
@@ -692,15 +863,14 @@ class Storage(object):
                     % uri
                 )
 
-            if encoding == "gzip":
-                stream = gzip.GzipFile(fileobj=response.raw)
-                local_path = os.path.join(out_dir, f"{filename}.tar")
-            else:
-                stream = response.raw
+            if mimetype == "application/x-tar":
+                # Tar archives are extracted while they are downloaded, without storing the archive.
+                extract_tar_stream(response.raw, out_dir, compression)
+                return out_dir
             with open(local_path, "wb") as out:
-                shutil.copyfileobj(stream, out)
+                shutil.copyfileobj(response.raw, out)
 
-        if mimetype in ["application/x-tar", "application/zip"]:
+        if mimetype == "application/zip":
             out_dir = Storage._unpack_archive_file(local_path, mimetype, out_dir)
         return out_dir
 
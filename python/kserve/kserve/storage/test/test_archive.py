@@ -0,0 +1,152 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+import sys
+import tarfile
+import threading
+import time
+import unittest.mock as mock
+
+import pytest
+
+from kserve.storage import Storage
+from kserve.storage.archive import extract_tar_stream, get_tar_compression
+
+FILES = {"model.bin": os.urandom(3 * 1024 * 1024), "config/config.json": b"{}"}
+
+
+def make_tar(mode="w:gz"):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode=mode) as archive:
+        for name, data in FILES.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def assert_extracted(out_dir):
+    for name, data in FILES.items():
+        with open(os.path.join(out_dir, name), "rb") as f:
+            assert f.read() == data
+
+
+class MockHttpResponse(object):
+    def __init__(self, raw, content_type):
+        self.status_code = 200
+        self.raw = io.BytesIO(raw)
+        self.headers = {"Content-Type": content_type}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ex_type, ex_val, traceback):
+        pass
+
+
+class FailingStream(io.RawIOBase):
+    def __init__(self, data):
+        self.data = io.BytesIO(data[: len(data) // 2])
+
+    def read(self, size=-1):
+        chunk = self.data.read(size)
+        if not chunk:
+            raise ConnectionError("connection reset")
+        return chunk
+
+
+class BlockingStream(io.RawIOBase):
+    def __init__(self, data):
+        self.data = data
+        self.closed_event = threading.Event()
+
+    def read(self, size=-1):
+        if self.data:
+            data, self.data = self.data, b""
+            return data
+        # Blocks like a read from a stalled connection until the stream is closed.
+        self.closed_event.wait(30)
+        return b""
+
+    def close(self):
+        self.closed_event.set()
+        super().close()
+
+
+@pytest.mark.parametrize("mode", ["w", "w:gz", "w:bz2", "w:xz"])
+def test_extract_tar_stream(tmp_path, mode):
+    extract_tar_stream(io.BytesIO(make_tar(mode)), str(tmp_path))
+    assert_extracted(tmp_path)
+
+
+def test_extract_invalid_archive(tmp_path):
+    with pytest.raises(RuntimeError, match="not valid"):
+        extract_tar_stream(io.BytesIO(b"not an archive" * 100), str(tmp_path))
+
+
+def test_extract_stream_error(tmp_path):
+    with pytest.raises(ConnectionError):
+        extract_tar_stream(FailingStream(make_tar("w")), str(tmp_path))
+
+
+def test_extract_error_with_stalled_stream(tmp_path):
+    stream = BlockingStream(b"not an archive" * 100)
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="not valid"):
+        extract_tar_stream(stream, str(tmp_path))
+    # The stream is closed to unblock the reading thread instead of waiting for the read.
+    assert time.monotonic() - start < 5
+    assert stream.closed_event.is_set()
+
+
+def test_extract_zstd(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    data = zstandard.ZstdCompressor().compress(make_tar("w"))
+    extract_tar_stream(io.BytesIO(data), str(tmp_path), "zst")
+    assert_extracted(tmp_path)
+
+
+def test_missing_decompressor(tmp_path):
+    with mock.patch.dict(sys.modules, {"lz4": None, "lz4.frame": None}):
+        with pytest.raises(RuntimeError, match="lz4 package is required"):
+            extract_tar_stream(io.BytesIO(b""), str(tmp_path), "lz4")
+
+
+def test_get_tar_compression():
+    assert get_tar_compression("/models/model.tar.zst") == "zst"
+    assert get_tar_compression("model.tzst") == "zst"
+    assert get_tar_compression("model.tar.lz4") == "lz4"
+    assert get_tar_compression("model.tar.gz") is None
+
+
+def test_download_from_uri_streams_tar(tmp_path):
+    response = MockHttpResponse(make_tar("w:gz"), "application/gzip")
+    with mock.patch("requests.get", return_value=response):
+        out_dir = Storage._download_from_uri(
+            "https://foo.bar/model.tar.gz", str(tmp_path)
+        )
+    assert_extracted(out_dir)
+    # The archive itself is never written to the output directory.
+    assert sorted(os.listdir(out_dir)) == ["config", "model.bin"]
+
+
+def test_download_from_uri_zstd_content_type(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    data = zstandard.ZstdCompressor().compress(make_tar("w"))
+    response = MockHttpResponse(data, "application/zstd")
+    with mock.patch("requests.get", return_value=response):
+        Storage._download_from_uri("https://foo.bar/model.tar.zst", str(tmp_path))
+    assert_extracted(tmp_path)
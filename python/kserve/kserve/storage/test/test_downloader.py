@@ -0,0 +1,143 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest.mock as mock
+
+import pytest
+
+from kserve.storage.downloader import ParallelDownloader
+
+DATA = bytes(range(256)) * 40
+
+
+class FakeObject:
+    def __init__(self, data=DATA, fail_at=None, failures=None):
+        self.data = data
+        self.fail_at = fail_at
+        self.failures = failures
+        self.ranges = []
+
+    def read_range(self, start, end):
+        self.ranges.append((start, end))
+        if start == self.fail_at and self.failures != 0:
+            if self.failures is not None:
+                self.failures -= 1
+            raise ConnectionError("connection reset")
+        chunk = self.data[start : end + 1]
+        return [chunk[: len(chunk) // 2], chunk[len(chunk) // 2 :]]
+
+    def download_file(self, target):
+        with open(target, "wb") as f:
+            f.write(self.data)
+
+
+def download(target, obj, etag="etag-1", **kwargs):
+    with ParallelDownloader(
+        workers=4, part_size=1000, multipart_threshold=2000, **kwargs
+    ) as downloader:
+        downloader.submit(
+            target,
+            obj.download_file,
+            size=len(obj.data),
+            etag=etag,
+            read_range=obj.read_range,
+        )
+
+
+def test_multipart_download(tmp_path):
+    target = str(tmp_path / "model.bin")
+    obj = FakeObject()
+    download(target, obj)
+    with open(target, "rb") as f:
+        assert f.read() == DATA
+    assert sorted(obj.ranges) == [
+        (i, min(i + 1000, len(DATA)) - 1) for i in range(0, len(DATA), 1000)
+    ]
+    assert os.listdir(tmp_path) == ["model.bin"]
+
+
+def test_small_object_single_request(tmp_path):
+    target = str(tmp_path / "model.bin")
+    obj = FakeObject(data=b"small")
+    download(target, obj)
+    with open(target, "rb") as f:
+        assert f.read() == b"small"
+    assert obj.ranges == []
+
+
+def test_unknown_size_single_request(tmp_path):
+    target = str(tmp_path / "model.bin")
+    obj = FakeObject()
+    with ParallelDownloader(multipart_threshold=1) as downloader:
+        downloader.submit(
+            target, obj.download_file, size=mock.MagicMock(), read_range=obj.read_range
+        )
+    assert obj.ranges == []
+    assert os.path.getsize(target) == len(DATA)
+
+
+@mock.patch("kserve.storage.downloader._PART_RETRIES", 1)
+def test_resume_after_failure(tmp_path):
+    target = str(tmp_path / "model.bin")
+    failing = FakeObject(fail_at=3000)
+    with pytest.raises(ConnectionError):
+        download(target, failing)
+    assert not os.path.exists(target)
+    assert os.path.exists(target + ".part.json")
+
+    obj = FakeObject()
+    download(target, obj)
+    with open(target, "rb") as f:
+        assert f.read() == DATA
+    # Only the missing parts are downloaded again.
+    assert (3000, 3999) in obj.ranges
+    assert not set(obj.ranges) & (set(failing.ranges) - {(3000, 3999)})
+    assert not os.path.exists(target + ".part.json")
+
+
+@mock.patch("kserve.storage.downloader._PART_RETRIES", 1)
+def test_restart_when_etag_changed(tmp_path):
+    target = str(tmp_path / "model.bin")
+    with pytest.raises(ConnectionError):
+        download(target, FakeObject(fail_at=3000))
+
+    obj = FakeObject(data=DATA[::-1])
+    download(target, obj, etag="etag-2")
+    with open(target, "rb") as f:
+        assert f.read() == DATA[::-1]
+    assert len(obj.ranges) == 11
+
+
+def test_retry_failed_part(tmp_path):
+    target = str(tmp_path / "model.bin")
+    obj = FakeObject(fail_at=3000, failures=2)
+    download(target, obj)
+    assert obj.ranges.count((3000, 3999)) == 3
+    with open(target, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_skip_downloaded_object(tmp_path):
+    target = str(tmp_path / "model.bin")
+    download(target, FakeObject())
+    try:
+        os.getxattr(target, "user.kserve.etag")
+    except (AttributeError, OSError):
+        pytest.skip("extended attributes are not supported")
+    obj = FakeObject()
+    download(target, obj)
+    assert obj.ranges == []
+    download(target, obj, etag="etag-2")
+    assert len(obj.ranges) == 11
@@ -0,0 +1,155 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import errno
+import os
+import threading
+import time
+import unittest.mock as mock
+
+from kserve.storage import Storage
+from kserve.storage.model_cache import ModelCache
+
+STORAGE_MODULE = "kserve.storage.storage"
+
+
+class FakeDownload:
+    def __init__(self, files, delay=0):
+        self.files = files
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, out_dir):
+        self.calls += 1
+        time.sleep(self.delay)
+        for name, data in self.files.items():
+            path = os.path.join(out_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        return out_dir
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_reuse_cached_model(tmp_path):
+    cache = ModelCache(str(tmp_path / "cache"))
+    download = FakeDownload({"model.bin": b"weights", "config/a.json": b"{}"})
+    first = cache.fetch("s3://bucket/model", "v1", str(tmp_path / "out1"), download)
+    second = cache.fetch("s3://bucket/model", "v1", str(tmp_path / "out2"), download)
+    assert download.calls == 1
+    assert read(os.path.join(second, "model.bin")) == b"weights"
+    assert read(os.path.join(second, "config/a.json")) == b"{}"
+    # The files are hard links to the single cached copy.
+    assert (
+        os.stat(os.path.join(first, "model.bin")).st_ino
+        == os.stat(os.path.join(second, "model.bin")).st_ino
+    )
+
+
+def test_new_fingerprint_downloads_again(tmp_path):
+    cache = ModelCache(str(tmp_path / "cache"))
+    cache.fetch(
+        "s3://bucket/model", "v1", str(tmp_path / "out1"), FakeDownload({"m": b"1"})
+    )
+    download = FakeDownload({"m": b"2"})
+    out_dir = cache.fetch("s3://bucket/model", "v2", str(tmp_path / "out2"), download)
+    assert download.calls == 1
+    assert read(os.path.join(out_dir, "m")) == b"2"
+
+
+def test_lru_eviction(tmp_path):
+    cache = ModelCache(str(tmp_path / "cache"), max_bytes=10)
+    for i, version in enumerate(["v1", "v2", "v1", "v3"]):
+        cache.fetch(
+            "s3://bucket/model",
+            version,
+            str(tmp_path / f"out{i}"),
+            FakeDownload({"m": b"x" * 5}),
+        )
+        time.sleep(0.01)
+    keys = os.listdir(tmp_path / "cache" / "entries")
+    assert sorted(keys) == sorted(
+        ModelCache.get_key("s3://bucket/model", version) for version in ["v1", "v3"]
+    )
+    # Models linked from evicted entries are still readable.
+    assert read(tmp_path / "out1" / "m") == b"x" * 5
+
+
+def test_copy_when_hard_link_fails(tmp_path):
+    cache = ModelCache(str(tmp_path / "cache"), max_bytes=5)
+    with mock.patch(
+        "kserve.storage.model_cache.os.link",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+    ):
+        out_dir = cache.fetch(
+            "s3://bucket/model", "v1", str(tmp_path / "out1"), FakeDownload({"m": b"1"})
+        )
+    path = os.path.join(out_dir, "m")
+    assert not os.path.islink(path)
+    # The copy outlives the eviction of the entry by another fetch.
+    cache.fetch(
+        "s3://bucket/model", "v2", str(tmp_path / "out2"), FakeDownload({"m": b"2" * 5})
+    )
+    assert read(path) == b"1"
+
+
+def test_concurrent_fetch_downloads_once(tmp_path):
+    download = FakeDownload({"m": b"weights"}, delay=0.1)
+
+    def fetch(i):
+        ModelCache(str(tmp_path / "cache")).fetch(
+            "gs://bucket/model", "v1", str(tmp_path / f"out{i}"), download
+        )
+
+    threads = [threading.Thread(target=fetch, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert download.calls == 1
+    for i in range(4):
+        assert read(tmp_path / f"out{i}" / "m") == b"weights"
+
+
+def test_storage_download_uses_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_CACHE_DIR", str(tmp_path / "cache"))
+    download = FakeDownload({"model.bin": b"weights"})
+    with mock.patch(
+        STORAGE_MODULE + ".Storage._get_fingerprint", return_value="v1"
+    ), mock.patch(
+        STORAGE_MODULE + ".Storage._download_gcs",
+        side_effect=lambda uri, out_dir: download(out_dir),
+    ):
+        Storage.download("gs://bucket/model", str(tmp_path / "out1"))
+        Storage.download("gs://bucket/model", str(tmp_path / "out2"))
+    assert download.calls == 1
+    assert read(tmp_path / "out2" / "model.bin") == b"weights"
+
+
+def test_storage_download_without_fingerprint(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_CACHE_DIR", str(tmp_path / "cache"))
+    download = FakeDownload({"model.bin": b"weights"})
+    with mock.patch(
+        STORAGE_MODULE + ".Storage._get_fingerprint", return_value=None
+    ), mock.patch(
+        STORAGE_MODULE + ".Storage._download_gcs",
+        side_effect=lambda uri, out_dir: download(out_dir),
+    ):
+        Storage.download("gs://bucket/model", str(tmp_path / "out1"))
+        Storage.download("gs://bucket/model", str(tmp_path / "out2"))
+    assert download.calls == 2
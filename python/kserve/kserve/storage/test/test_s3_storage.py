@@ -288,3 +288,22 @@ def test_target_startswith_parent_folder_name(mock_storage):
         == expected_call_args_list("test/artifacts/model", "dest_path", paths)[0]
     )
     mock_boto3_bucket.objects.filter.assert_called_with(Prefix="test/artifacts/model")
+
+
+@mock.patch(STORAGE_MODULE + ".boto3")
+def test_listing_failure_stops_download_threads(mock_storage):
+    def objects(Prefix):
+        yield create_mock_obj("bar/model.pt")
+        raise RuntimeError("listing failed")
+
+    mock_boto3_bucket = create_mock_boto3_bucket(mock_storage, [])
+    mock_boto3_bucket.objects.filter.side_effect = objects
+    with mock.patch(STORAGE_MODULE + ".ParallelDownloader._cancel") as cancel:
+        try:
+            Storage._download_s3("s3://foo/bar", "dest_path")
+        except RuntimeError as e:
+            assert str(e) == "listing failed"
+        else:
+            raise AssertionError("the listing failure is not raised")
+    # The download threads are stopped when the listing fails.
+    cancel.assert_called_once()
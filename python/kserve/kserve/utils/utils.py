@@ -16,19 +16,43 @@ import os
 import sys
 import uuid
 
-from kserve.protocol.grpc.grpc_predict_v2_pb2 import InferParameter
-from typing import Dict, Union, List
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 
 from kserve.utils.numpy_codec import from_np_dtype
-import pandas as pd
 import numpy as np
 import psutil
 from cloudevents.conversion import to_binary, to_structured
 from cloudevents.http import CloudEvent
 from grpc import ServicerContext
-from kserve.protocol.infer_type import InferOutput, InferRequest, InferResponse
+from kserve.protocol.infer_type import (
+    InferOutput,
+    InferRequest,
+    InferResponse,
+    _import_pyarrow,
+)
 from ..errors import InvalidInput
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def lazy_isinstance(obj, module_name: str, class_name: str) -> bool:
+    """Check if an object is an instance of a class without importing the module of the class.
+
+    An object can't be an instance of a class whose module was never imported, so the check doesn't pay
+    the import time of optional dependencies like Ray or pandas when they are not used.
+
+    Args:
+        obj: The object to check.
+        module_name: The name of the module defining the class, e.g. ``ray.serve.handle``.
+        class_name: The name of the class.
+
+    Returns:
+        True if the module is imported and the object is an instance of the class.
+    """
+    module = sys.modules.get(module_name)
+    return module is not None and isinstance(obj, getattr(module, class_name))
+
 
 def is_running_in_k8s():
     return os.path.isdir("/var/run/secrets/kubernetes.io/")
@@ -147,7 +171,7 @@ def to_headers(context: ServicerContext) -> Dict[str, str]:
 
 def get_predict_input(
     payload: Union[Dict, InferRequest], columns: List = None
-) -> Union[np.ndarray, pd.DataFrame, List[str]]:
+) -> Union[np.ndarray, "pd.DataFrame", List[str]]:
     if isinstance(payload, Dict):
         instances = payload["inputs"] if "inputs" in payload else payload["instances"]
         if len(instances) == 0:
@@ -157,6 +181,11 @@ def get_predict_input(
             and len(instances[0]) != 0
             and isinstance(instances[0][0], Dict)
         ):
+            import pandas as pd
+
+            column_data = _instances_to_columns(instances)
+            if column_data is not None:
+                return pd.DataFrame(column_data, columns=columns)
             dfs = []
             for instance in instances:
                 dfs.append(pd.DataFrame(instance, columns=columns))
@@ -167,22 +196,17 @@ def get_predict_input(
                 return instances
             return np.array(instances)
     elif isinstance(payload, InferRequest):
-        content_type = ""
-        parameters = payload.parameters
-        if parameters:
-            if isinstance(parameters.get("content_type"), InferParameter):
-                # for v2 grpc, we get InferParameter obj eg: {"content_type": string_param: "pd"}
-                content_type = str(parameters.get("content_type").string_param)
-            else:
-                # for v2 http, we get string eg: {"content_type": "pd"}
-                content_type = parameters.get("content_type")
-
+        content_type = payload.content_type
         if content_type == "pd":
             return payload.as_dataframe()
+        elif content_type == "arrow":
+            # split_blocks keeps the Arrow columns as separate pandas blocks, without copying them.
+            return payload.as_arrow_table().to_pandas(split_blocks=True)
         else:
             input = payload.inputs[0]
             if (
                 input.datatype == "BYTES"
+                and input.data is not None
                 and len(input.data) > 0
                 and isinstance(input.data[0], str)
             ):
@@ -190,23 +214,46 @@ def get_predict_input(
             return input.as_numpy()
 
 
+def _instances_to_columns(instances: List) -> Optional[Dict[str, List]]:
+    """Merge v1 instances of the ``{"column": [values]}`` form into a single dict of columns,
+    so that the dataframe is built at once instead of per instance. Returns None if the instances
+    don't all have the same columns with lists of the same length.
+    """
+    if not isinstance(instances[0], Dict):
+        return None
+    keys = list(instances[0].keys())
+    column_data = {key: [] for key in keys}
+    for instance in instances:
+        if not isinstance(instance, Dict) or list(instance.keys()) != keys:
+            return None
+        length = None
+        for key, values in instance.items():
+            if not isinstance(values, List) or (
+                length is not None and len(values) != length
+            ):
+                return None
+            length = len(values)
+            column_data[key].extend(values)
+    return column_data
+
+
 def get_predict_response(
     payload: Union[Dict, InferRequest],
-    result: Union[np.ndarray, List, pd.DataFrame],
+    result: Union[np.ndarray, List, "pd.DataFrame"],
     model_name: str,
 ) -> Union[Dict, InferResponse]:
     if isinstance(payload, Dict):
         infer_outputs = result
-        if isinstance(result, pd.DataFrame):
-            infer_outputs = []
-            for label, row in result.iterrows():
-                infer_outputs.append(row.to_dict())
+        if lazy_isinstance(result, "pandas", "DataFrame"):
+            infer_outputs = result.to_dict(orient="records")
         elif isinstance(result, np.ndarray):
             infer_outputs = result.tolist()
         return {"predictions": infer_outputs}
     elif isinstance(payload, InferRequest):
         infer_outputs = []
-        if isinstance(result, pd.DataFrame):
+        if payload.content_type == "arrow":
+            infer_outputs.append(_to_arrow_output(result))
+        elif lazy_isinstance(result, "pandas", "DataFrame"):
             for col in result.columns:
                 infer_output = InferOutput(
                     name=col,
@@ -251,6 +298,34 @@ def get_predict_response(
         raise InvalidInput(f"unsupported payload type {type(payload)}")
 
 
+def _to_arrow_output(result: Union[np.ndarray, List, "pd.DataFrame"]) -> InferOutput:
+    """Encode the result as an Arrow IPC stream in a single BYTES output."""
+    import pandas as pd
+
+    pa = _import_pyarrow()
+    if not isinstance(result, pd.DataFrame):
+        result = np.asarray(result)
+        result = pd.DataFrame(
+            result.reshape(len(result), -1),
+            columns=[f"output-{i}" for i in range(int(np.prod(result.shape[1:])))],
+        )
+    table = pa.Table.from_pandas(result, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    infer_output = InferOutput(
+        name="output-0",
+        shape=[1],
+        datatype="BYTES",
+        parameters={"content_type": "arrow"},
+    )
+    # The IPC stream is binary, it is always sent as raw data.
+    infer_output.set_data_from_numpy(
+        np.array([sink.getvalue().to_pybytes()], dtype=np.object_), binary_data=True
+    )
+    return infer_output
+
+
 def strtobool(val: str) -> bool:
     """Convert a string representation of truth to True or False.
 
@@ -0,0 +1,154 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from kserve import Model, ModelRepository
+from kserve.admission import AdmissionController, get_queue_timeout
+from kserve.constants.constants import QUEUE_TIMEOUT_HEADER
+from kserve.errors import InvalidInput, ModelOverloaded
+from kserve.protocol.dataplane import DataPlane
+
+
+class SlowModel(Model):
+    def __init__(self, name):
+        super().__init__(name)
+        self.ready = True
+        self.release = asyncio.Event()
+        self.running = 0
+        self.max_running = 0
+
+    async def predict(self, payload, headers=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await self.release.wait()
+        self.running -= 1
+        return {"predictions": payload["instances"]}
+
+
+def gauge_value(name, model_name):
+    return REGISTRY.get_sample_value(name, {"model_name": model_name})
+
+
+@pytest.mark.asyncio
+class TestAdmissionController:
+    async def test_fifo_admission(self):
+        controller = AdmissionController("fifo", max_concurrency=1)
+        order = []
+
+        async def run(i):
+            async with controller.admit():
+                order.append(i)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[run(i) for i in range(4)])
+        assert order == [0, 1, 2, 3]
+        assert controller.in_flight == 0
+        assert controller.queue_depth == 0
+
+    async def test_queue_full(self):
+        controller = AdmissionController("full", max_concurrency=1, max_queue_depth=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+        assert gauge_value("request_queue_depth", "full") == 1
+        with pytest.raises(ModelOverloaded, match="already waiting"):
+            await controller.acquire()
+        controller.release()
+        await waiter
+        assert controller.in_flight == 1
+        assert gauge_value("request_in_flight", "full") == 1
+        controller.release()
+        assert controller.in_flight == 0
+
+    async def test_queue_timeout(self):
+        controller = AdmissionController("timeout", max_concurrency=1)
+        await controller.acquire()
+        with pytest.raises(ModelOverloaded, match="longer than 10 ms"):
+            await controller.acquire(timeout=0.01)
+        with pytest.raises(ModelOverloaded, match="deadline expired"):
+            await controller.acquire(timeout=0)
+        assert controller.queue_depth == 0
+        controller.release()
+        assert controller.in_flight == 0
+
+    async def test_cancelled_waiter(self):
+        controller = AdmissionController("cancelled", max_concurrency=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 0
+        controller.release()
+        assert controller.in_flight == 0
+
+    async def test_get_queue_timeout(self):
+        assert get_queue_timeout(None) is None
+        assert get_queue_timeout({QUEUE_TIMEOUT_HEADER: "250"}) == 0.25
+        with pytest.raises(InvalidInput):
+            get_queue_timeout({QUEUE_TIMEOUT_HEADER: "soon"})
+
+    async def test_dataplane_limits_concurrency(self):
+        model = SlowModel("LimitedModel")
+        model.max_concurrency = 2
+        model.max_queue_depth = 1
+        model_repository = ModelRepository()
+        model_repository.update(model)
+        dataplane = DataPlane(model_registry=model_repository)
+
+        tasks = [
+            asyncio.ensure_future(
+                dataplane.infer("LimitedModel", {"instances": [i]}, headers={})
+            )
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        assert model.running == 2
+        assert model.admission_controller.queue_depth == 1
+        with pytest.raises(ModelOverloaded):
+            await dataplane.infer("LimitedModel", {"instances": [3]}, headers={})
+
+        model.release.set()
+        results = await asyncio.gather(*tasks)
+        assert [res["predictions"] for res, _ in results] == [[0], [1], [2]]
+        assert model.max_running == 2
+        assert model.admission_controller.in_flight == 0
+
+    async def test_dataplane_sheds_after_queue_timeout(self):
+        model = SlowModel("SheddingModel")
+        model.max_concurrency = 1
+        model_repository = ModelRepository()
+        model_repository.update(model)
+        dataplane = DataPlane(model_registry=model_repository)
+
+        first = asyncio.ensure_future(
+            dataplane.infer("SheddingModel", {"instances": [1]}, headers={})
+        )
+        await asyncio.sleep(0.01)
+        with pytest.raises(ModelOverloaded, match="waited in the queue"):
+            await dataplane.infer(
+                "SheddingModel",
+                {"instances": [2]},
+                headers={QUEUE_TIMEOUT_HEADER: "20"},
+            )
+        model.release.set()
+        await first
+
+    async def test_no_limit_by_default(self):
+        assert Model("UnlimitedModel").admission_controller is None
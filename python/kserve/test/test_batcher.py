@@ -0,0 +1,184 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from kserve import Model
+from kserve.batcher import get_batch_key
+from kserve.errors import InferenceError
+from kserve.protocol.infer_type import InferInput, InferRequest
+from kserve.utils.utils import get_predict_input, get_predict_response
+
+
+class CountingModel(Model):
+    def __init__(self, name):
+        super().__init__(name)
+        self.batches = []
+        self.ready = True
+
+    def predict(self, payload, headers=None):
+        inputs = get_predict_input(payload)
+        self.batches.append(len(inputs))
+        if isinstance(payload, InferRequest):
+            return get_predict_response(payload, np.asarray(inputs) * 2, self.name)
+        return {"predictions": [[v * 2 for v in row] for row in inputs]}
+
+
+class BrokenModel(CountingModel):
+    def predict(self, payload, headers=None):
+        return {"predictions": [1]}
+
+
+def make_request(request_id, rows, raw=False):
+    data = np.array(rows, dtype=np.int32)
+    infer_input = InferInput(
+        name="input-0", shape=list(data.shape), datatype="INT32", data=data.tolist()
+    )
+    raw_inputs = None
+    if raw:
+        infer_input.set_data_from_numpy(data, binary_data=True)
+        raw_inputs = [infer_input._raw_data]
+    return InferRequest(
+        model_name="TestModel",
+        request_id=request_id,
+        infer_inputs=[infer_input],
+        raw_inputs=raw_inputs,
+    )
+
+
+@pytest.mark.asyncio
+class TestDynamicBatcher:
+    async def test_batch_v2_requests(self):
+        model = CountingModel("TestModel")
+        model.max_batch_size = 8
+        model.max_latency_ms = 50
+        responses = await asyncio.gather(
+            model(make_request("1", [[1, 2]])),
+            model(make_request("2", [[3, 4], [5, 6]])),
+            model(make_request("3", [[7, 8]])),
+        )
+        assert model.batches == [4]
+        assert [res.id for res in responses] == ["1", "2", "3"]
+        assert responses[0].outputs[0].as_numpy().tolist() == [[2, 4]]
+        assert responses[1].outputs[0].as_numpy().tolist() == [[6, 8], [10, 12]]
+        assert responses[1].outputs[0].shape == [2, 2]
+        assert responses[2].outputs[0].as_numpy().tolist() == [[14, 16]]
+
+    async def test_batch_raw_inputs(self):
+        model = CountingModel("TestModel")
+        model.max_batch_size = 8
+        model.max_latency_ms = 50
+        responses = await asyncio.gather(
+            model(make_request("1", [[1, 2]], raw=True)),
+            model(make_request("2", [[3, 4]], raw=True)),
+        )
+        assert model.batches == [2]
+        assert responses[1].outputs[0]._raw_data is not None
+        assert responses[1].outputs[0].as_numpy().tolist() == [[6, 8]]
+
+    async def test_batch_v1_requests(self):
+        model = CountingModel("TestModel")
+        model.max_batch_size = 8
+        model.max_latency_ms = 50
+        responses = await asyncio.gather(
+            model({"instances": [[1, 2]]}),
+            model({"instances": [[3, 4], [5, 6]]}),
+        )
+        assert model.batches == [3]
+        assert responses == [
+            {"predictions": [[2, 4]]},
+            {"predictions": [[6, 8], [10, 12]]},
+        ]
+
+    async def test_flush_on_max_batch_size(self):
+        model = CountingModel("TestModel")
+        model.max_batch_size = 2
+        model.max_latency_ms = 10000
+        await asyncio.wait_for(
+            asyncio.gather(
+                model({"instances": [[1, 2]]}),
+                model({"instances": [[3, 4]]}),
+                model({"instances": [[5, 6], [7, 8]]}),
+            ),
+            timeout=5,
+        )
+        assert model.batches == [2, 2]
+
+    async def test_incompatible_requests_are_not_merged(self):
+        model = CountingModel("TestModel")
+        model.max_batch_size = 8
+        model.max_latency_ms = 50
+        await asyncio.gather(
+            model(make_request("1", [[1, 2]])),
+            model(make_request("2", [[1, 2, 3]])),
+        )
+        assert model.batches == [1, 1]
+
+    async def test_requests_with_different_content_types_are_not_merged(self):
+        model = CountingModel("TestModel")
+        model.max_batch_size = 8
+        model.max_latency_ms = 50
+        await asyncio.gather(
+            model({"instances": [[1, 2]]}, headers={"content-type": "a"}),
+            model({"instances": [[3, 4]]}, headers={"content-type": "a"}),
+            model({"instances": [[5, 6]]}, headers={"content-type": "b"}),
+        )
+        assert model.batches == [2, 1]
+
+    async def test_tracing_and_proxy_headers_are_ignored(self):
+        model = CountingModel("TestModel")
+        model.max_batch_size = 8
+        model.max_latency_ms = 50
+
+        def headers(i):
+            return {
+                "x-request-id": str(i),
+                "x-b3-traceid": f"trace-{i}",
+                "x-b3-spanid": f"span-{i}",
+                "x-envoy-attempt-count": str(i),
+                "x-envoy-external-address": f"10.0.0.{i}",
+                "x-forwarded-for": f"10.0.0.{i}",
+                "x-request-start": f"t={i}",
+            }
+
+        await asyncio.gather(
+            *[model({"instances": [[i, i]]}, headers=headers(i)) for i in range(3)],
+            model({"instances": [[3, 3]]}),
+        )
+        assert model.batches == [4]
+
+    async def test_split_error_is_propagated(self):
+        model = BrokenModel("TestModel")
+        model.max_batch_size = 8
+        model.max_latency_ms = 50
+        results = await asyncio.gather(
+            model({"instances": [[1, 2]]}),
+            model({"instances": [[3, 4]]}),
+            return_exceptions=True,
+        )
+        assert all(isinstance(res, InferenceError) for res in results)
+
+    async def test_batch_key(self):
+        assert get_batch_key({"instances": [[1], [2]]})[1] == 2
+        assert get_batch_key({"inputs": [[1], [2]]}) is None
+        assert get_batch_key(make_request("1", [[1, 2], [3, 4]]))[1] == 2
+        grpc_request = make_request("2", [[1, 2], [3, 4]])
+        grpc_request.from_grpc = True
+        assert (
+            get_batch_key(grpc_request)[0]
+            != get_batch_key(make_request("1", [[1, 2], [3, 4]]))[0]
+        )
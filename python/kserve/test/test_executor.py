@@ -0,0 +1,130 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import sys
+import threading
+from unittest import mock
+
+import grpc
+import pytest
+
+from kserve import Model, ModelRepository
+from kserve.errors import ModelOverloaded
+from kserve.executor import ExecutionPolicy
+from kserve.protocol.dataplane import DataPlane
+from kserve.protocol.grpc import grpc_predict_v2_pb2 as pb
+from kserve.protocol.grpc.servicer import InferenceServicer
+from kserve.protocol.model_repository_extension import ModelRepositoryExtension
+
+
+class SyncModel(Model):
+    def __init__(self, name):
+        super().__init__(name)
+        self.ready = True
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict(self, payload, headers=None):
+        self.release.wait(timeout=5)
+        return {
+            "predictions": payload["instances"],
+            "thread": threading.current_thread().name,
+            "pid": os.getpid(),
+        }
+
+
+@pytest.mark.asyncio
+class TestHandlerExecutor:
+    async def test_sync_predict_runs_off_loop(self):
+        model = SyncModel("TestModel")
+        response = await model({"instances": [1, 2]})
+        assert response["predictions"] == [1, 2]
+        assert response["thread"] != threading.current_thread().name
+
+    async def test_inline_policy(self):
+        model = SyncModel("TestModel")
+        model.execution_policy = ExecutionPolicy.INLINE
+        response = await model({"instances": [1]})
+        assert response["thread"] == threading.current_thread().name
+
+    async def test_dedicated_thread_pool(self):
+        model = SyncModel("TestModel")
+        model.max_execution_workers = 1
+        response = await model({"instances": [1]})
+        assert response["thread"].startswith("TestModel-handler")
+        model.stop()
+
+    async def test_queue_full(self):
+        model = SyncModel("TestModel")
+        model.max_execution_queue_size = 1
+        model.release.clear()
+        first = asyncio.ensure_future(model({"instances": [1]}))
+        await asyncio.sleep(0.1)
+        with pytest.raises(ModelOverloaded):
+            await model({"instances": [2]})
+        model.release.set()
+        assert (await first)["predictions"] == [1]
+        assert (await model({"instances": [3]}))["predictions"] == [3]
+
+    async def test_unload_shuts_down_executor(self):
+        class StoppedModel(SyncModel):
+            def stop(self):
+                self.stopped = True
+
+        model = StoppedModel("TestModel")
+        model.max_execution_workers = 1
+        await model({"instances": [1]})
+        pool = model._executor._executor
+        model_repository = ModelRepository()
+        model_repository.update(model)
+        # The executor is shut down even though stop is overridden without calling it.
+        model_repository.unload("TestModel")
+        assert model.stopped and model._executor is None
+        with pytest.raises(RuntimeError):
+            pool.submit(print)
+
+    @pytest.mark.skipif(sys.platform != "linux", reason="requires fork")
+    async def test_process_policy(self):
+        model = SyncModel("TestModel")
+        model.execution_policy = ExecutionPolicy.PROCESS
+        model.max_execution_workers = 1
+        try:
+            response = await model({"instances": [1, 2]})
+        finally:
+            model.stop()
+        assert response["predictions"] == [1, 2]
+        assert response["pid"] != os.getpid()
+
+    async def test_grpc_resource_exhausted(self):
+        model = SyncModel("TestModel")
+        model_repository = ModelRepository()
+        model_repository.update(model)
+        servicer = InferenceServicer(
+            DataPlane(model_registry=model_repository),
+            ModelRepositoryExtension(model_registry=model_repository),
+        )
+        context = mock.AsyncMock()
+        context.invocation_metadata = mock.Mock(return_value=[])
+        context.time_remaining = mock.Mock(return_value=None)
+        del context.trailing_metadata
+        with mock.patch.object(
+            DataPlane, "infer", side_effect=ModelOverloaded("TestModel")
+        ):
+            await servicer.ModelInfer(
+                pb.ModelInferRequest(model_name="TestModel"), context
+            )
+        context.abort.assert_awaited_once()
+        assert context.abort.call_args[0][0] == grpc.StatusCode.RESOURCE_EXHAUSTED
@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import socket
+import sys
+
 import grpc
 import grpc_testing
 import numpy as np
@@ -22,7 +26,8 @@ from unittest.mock import patch
 
 from kserve import Model, ModelServer
 from kserve.errors import InvalidInput
-from kserve.protocol.grpc import grpc_predict_v2_pb2, servicer
+from kserve.protocol.grpc import grpc_predict_v2_pb2, grpc_predict_v2_pb2_grpc, servicer
+from kserve.protocol.grpc.server import GRPCProcess, GRPCServer
 from kserve.protocol.infer_type import serialize_byte_tensor, InferResponse
 from kserve.utils.utils import get_predict_response
 
@@ -125,8 +130,7 @@ class DummyFP16InputModel(Model):
         return infer_response
 
 
-@pytest.fixture(scope="class")
-def server():
+def create_server(use_typed_contents=False):
     server = ModelServer()
     model = DummyModel("TestModel")
     model.load()
@@ -141,7 +145,9 @@ def server():
         grpc_predict_v2_pb2.DESCRIPTOR.services_by_name[
             "GRPCInferenceService"
         ]: servicer.InferenceServicer(
-            server.dataplane, server.model_repository_extension
+            server.dataplane,
+            server.model_repository_extension,
+            use_typed_contents=use_typed_contents,
         )
     }
     test_server = grpc_testing.server_from_dictionary(
@@ -151,11 +157,22 @@ def server():
     return test_server
 
 
+@pytest.fixture(scope="class")
+def server():
+    return create_server()
+
+
+@pytest.fixture(scope="class")
+def typed_contents_server():
+    return create_server(use_typed_contents=True)
+
+
 @pytest.mark.asyncio
 @patch(
-    "kserve.protocol.grpc.servicer.to_headers", return_value=[]
+    "kserve.protocol.grpc.servicer.to_headers", return_value={}
 )  # To avoid NotImplementedError from trailing_metadata function
-async def test_grpc_inputs(mock_to_headers, server):
+async def test_grpc_inputs(mock_to_headers, typed_contents_server):
+    server = typed_contents_server
     request = grpc_predict_v2_pb2.ModelInferRequest(
         model_name="TestModel",
         id="123",
@@ -295,7 +312,76 @@ async def test_grpc_inputs(mock_to_headers, server):
 
 @pytest.mark.asyncio
 @patch(
-    "kserve.protocol.grpc.servicer.to_headers", return_value=[]
+    "kserve.protocol.grpc.servicer.to_headers", return_value={}
+)  # To avoid NotImplementedError from trailing_metadata function
+async def test_grpc_inputs_raw_outputs(mock_to_headers, server):
+    """
+    By default, the outputs are returned as raw outputs even if the request uses typed contents.
+    """
+    int_data = [6, 2, 4, 1, 6, 3, 4, 1]
+    request = grpc_predict_v2_pb2.ModelInferRequest(
+        model_name="TestModel",
+        id="123",
+        inputs=[
+            {
+                "name": "fp32_input",
+                "shape": [8],
+                "datatype": "FP32",
+                "contents": {"fp32_contents": int_data},
+            },
+            {
+                "name": "int32_input",
+                "shape": [8],
+                "datatype": "INT32",
+                "contents": {"int_contents": int_data},
+            },
+            {
+                "name": "string_input",
+                "shape": [8],
+                "datatype": "BYTES",
+                "contents": {"bytes_contents": [b"Cat"] * 8},
+            },
+            {
+                "name": "uint8_input",
+                "shape": [8],
+                "datatype": "UINT8",
+                "contents": {"uint_contents": int_data},
+            },
+            {
+                "name": "bool_input",
+                "shape": [8],
+                "datatype": "BOOL",
+                "contents": {"bool_contents": [True] * 8},
+            },
+        ],
+    )
+
+    model_infer_method = server.invoke_unary_unary(
+        method_descriptor=(
+            grpc_predict_v2_pb2.DESCRIPTOR.services_by_name[
+                "GRPCInferenceService"
+            ].methods_by_name["ModelInfer"]
+        ),
+        invocation_metadata={},
+        request=request,
+        timeout=20,
+    )
+
+    response, _, code, _ = model_infer_method.termination()
+    response = await response
+    assert code == grpc.StatusCode.OK
+    assert len(response.raw_output_contents) == 5
+    assert not any(output.HasField("contents") for output in response.outputs)
+    infer_response = InferResponse.from_grpc(response)
+    assert infer_response.outputs[0].as_numpy().tolist() == int_data
+    assert infer_response.outputs[1].as_numpy().tolist() == int_data
+    assert infer_response.outputs[2].as_numpy().tolist() == [b"Cat"] * 8
+    assert infer_response.outputs[4].as_numpy().tolist() == [True] * 8
+
+
+@pytest.mark.asyncio
+@patch(
+    "kserve.protocol.grpc.servicer.to_headers", return_value={}
 )  # To avoid NotImplementedError from trailing_metadata function
 async def test_grpc_raw_inputs(mock_to_headers, server):
     """
@@ -422,7 +508,7 @@ async def test_grpc_raw_inputs(mock_to_headers, server):
 
 @pytest.mark.asyncio
 @patch(
-    "kserve.protocol.grpc.servicer.to_headers", return_value=[]
+    "kserve.protocol.grpc.servicer.to_headers", return_value={}
 )  # To avoid NotImplementedError from trailing_metadata function
 async def test_grpc_fp16_output(mock_to_headers, server):
     """
@@ -493,7 +579,7 @@ async def test_grpc_fp16_output(mock_to_headers, server):
 
 @pytest.mark.asyncio
 @patch(
-    "kserve.protocol.grpc.servicer.to_headers", return_value=[]
+    "kserve.protocol.grpc.servicer.to_headers", return_value={}
 )  # To avoid NotImplementedError from trailing_metadata function
 async def test_grpc_fp16_input(mock_to_headers, server):
     fp16_data = np.array([6.8, 2.8, 4.8, 1.4, 6.0, 3.4, 4.5, 1.6], dtype=np.float16)
@@ -557,7 +643,7 @@ async def test_grpc_fp16_input(mock_to_headers, server):
 
 @pytest.mark.asyncio
 @patch(
-    "kserve.protocol.grpc.servicer.to_headers", return_value=[]
+    "kserve.protocol.grpc.servicer.to_headers", return_value={}
 )  # To avoid NotImplementedError from trailing_metadata function
 async def test_grpc_raw_inputs_with_missing_input_data(mock_to_headers, server):
     """
@@ -608,7 +694,7 @@ async def test_grpc_raw_inputs_with_missing_input_data(mock_to_headers, server):
 
 @pytest.mark.asyncio
 @patch(
-    "kserve.protocol.grpc.servicer.to_headers", return_value=[]
+    "kserve.protocol.grpc.servicer.to_headers", return_value={}
 )  # To avoid NotImplementedError from trailing_metadata function
 async def test_grpc_raw_inputs_with_contents_specified(mock_to_headers, server):
     """
@@ -678,3 +764,204 @@ async def test_grpc_raw_inputs_with_contents_specified(mock_to_headers, server):
     with pytest.raises(InvalidInput):
         response, _, _, _ = model_infer_method.termination()
         _ = await response
+
+
+@pytest.mark.asyncio
+async def test_grpc_model_stream_infer():
+    model_server = ModelServer()
+    model = DummyFP16InputModel("FP16InputModel")
+    model.load()
+    model_server.register_model(model)
+    grpc_server = GRPCServer(
+        0,
+        model_server.dataplane,
+        model_server.model_repository_extension,
+        compression="gzip",
+    )
+    test_server = grpc.aio.server(options=grpc_server._server_options())
+    grpc_predict_v2_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(
+        servicer.InferenceServicer(
+            model_server.dataplane, model_server.model_repository_extension
+        ),
+        test_server,
+    )
+    port = test_server.add_insecure_port("127.0.0.1:0")
+    await test_server.start()
+
+    fp16_data = np.arange(8, dtype=np.float16)
+
+    def make_request(request_id, model_name="FP16InputModel"):
+        return grpc_predict_v2_pb2.ModelInferRequest(
+            model_name=model_name,
+            id=request_id,
+            inputs=[{"name": "fp16_input", "shape": [8], "datatype": "FP16"}],
+            raw_input_contents=[fp16_data.tobytes()],
+        )
+
+    async def requests():
+        for i in range(3):
+            yield make_request(str(i))
+        yield make_request("missing", model_name="MissingModel")
+
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = grpc_predict_v2_pb2_grpc.GRPCInferenceServiceStub(channel)
+            responses = [
+                response
+                async for response in stub.ModelStreamInfer(
+                    requests(), compression=grpc.Compression.Gzip
+                )
+            ]
+    finally:
+        await test_server.stop(grace=None)
+
+    assert len(responses) == 4
+    results = {response.infer_response.id: response for response in responses}
+    assert "MissingModel" in results["missing"].error_message
+    for i in range(3):
+        result = results[str(i)]
+        assert result.error_message == ""
+        infer_response = InferResponse.from_grpc(result.infer_response)
+        assert np.array_equal(infer_response.outputs[1].as_numpy(), fp16_data)
+
+
+@pytest.mark.asyncio
+async def test_grpc_model_stream_infer_limits_concurrent_requests():
+    class SlowModel(DummyFP16InputModel):
+        running = 0
+        max_running = 0
+
+        async def predict(self, request, headers=None):
+            SlowModel.running += 1
+            SlowModel.max_running = max(SlowModel.max_running, SlowModel.running)
+            await asyncio.sleep(0.05)
+            SlowModel.running -= 1
+            return await super().predict(request, headers)
+
+    model_server = ModelServer()
+    model = SlowModel("FP16InputModel")
+    model.load()
+    model_server.register_model(model)
+    test_server = grpc.aio.server()
+    grpc_predict_v2_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(
+        servicer.InferenceServicer(
+            model_server.dataplane,
+            model_server.model_repository_extension,
+            max_stream_concurrent_requests=2,
+        ),
+        test_server,
+    )
+    port = test_server.add_insecure_port("127.0.0.1:0")
+    await test_server.start()
+
+    fp16_data = np.arange(8, dtype=np.float16)
+
+    async def requests():
+        for i in range(6):
+            yield grpc_predict_v2_pb2.ModelInferRequest(
+                model_name="FP16InputModel",
+                id=str(i),
+                inputs=[{"name": "fp16_input", "shape": [8], "datatype": "FP16"}],
+                raw_input_contents=[fp16_data.tobytes()],
+            )
+
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = grpc_predict_v2_pb2_grpc.GRPCInferenceServiceStub(channel)
+            responses = [
+                response async for response in stub.ModelStreamInfer(requests())
+            ]
+    finally:
+        await test_server.stop(grace=None)
+
+    assert sorted(response.infer_response.id for response in responses) == [
+        str(i) for i in range(6)
+    ]
+    assert all(response.error_message == "" for response in responses)
+    assert SlowModel.max_running == 2
+
+
+def test_grpc_server_options():
+    grpc_server = GRPCServer(
+        8081,
+        None,
+        None,
+        max_message_length=-1,
+        keepalive_time_ms=10000,
+        keepalive_timeout_ms=2000,
+    )
+    options = dict(grpc_server._server_options())
+    assert options["grpc.max_receive_message_length"] == -1
+    assert options["grpc.max_send_message_length"] == -1
+    assert options["grpc.keepalive_time_ms"] == 10000
+    assert options["grpc.keepalive_timeout_ms"] == 2000
+    with pytest.raises(ValueError):
+        GRPCServer(8081, None, None, compression="brotli")
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="requires fork and SO_REUSEPORT")
+def test_grpc_process_workers_share_port():
+    model_server = ModelServer()
+    model = DummyFP16InputModel("FP16InputModel")
+    model.load()
+    model_server.register_model(model)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    processes = [
+        GRPCProcess(
+            port, 1, model_server.dataplane, model_server.model_repository_extension
+        )
+        for _ in range(2)
+    ]
+    # fork is the default start method on linux.
+    for process in processes:
+        process.start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = grpc_predict_v2_pb2_grpc.GRPCInferenceServiceStub(channel)
+            grpc.channel_ready_future(channel).result(timeout=10)
+            response = stub.ServerLive(grpc_predict_v2_pb2.ServerLiveRequest())
+            assert response.live
+    finally:
+        for process in processes:
+            process.stop()
+        for process in processes:
+            process.join(timeout=15)
+    # The workers shut down gracefully on SIGTERM.
+    assert [process.exitcode for process in processes] == [0, 0]
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="requires fork and SO_REUSEPORT")
+@pytest.mark.asyncio
+async def test_grpc_process_workers_are_waited_on_the_event_loop():
+    model_server = ModelServer()
+    model = DummyFP16InputModel("FP16InputModel")
+    model.load()
+    model_server.register_model(model)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    model_server._grpc_processes = [
+        GRPCProcess(
+            port, 1, model_server.dataplane, model_server.model_repository_extension
+        )
+        for _ in range(2)
+    ]
+    for process in model_server._grpc_processes:
+        process.start()
+    serving = asyncio.gather(
+        *[process.wait() for process in model_server._grpc_processes]
+    )
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            await asyncio.wait_for(channel.channel_ready(), timeout=10)
+        # The workers are waited for by the serving and the stopping tasks, without executor threads.
+        with patch.object(
+            asyncio.get_running_loop(), "run_in_executor", side_effect=AssertionError
+        ):
+            await model_server._stop_grpc_processes()
+            assert await asyncio.wait_for(serving, timeout=5) == [0, 0]
+    finally:
+        for process in model_server._grpc_processes:
+            process.kill()
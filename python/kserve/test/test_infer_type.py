@@ -12,8 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import struct
+import timeit
+
+import numpy as np
+import orjson
+import pytest
 
 from kserve import InferRequest, InferInput, InferResponse, InferOutput
+from kserve.errors import InferenceError, InvalidInput
+from kserve.protocol.infer_type import (
+    deserialize_bytes_tensor,
+    serialize_byte_tensor,
+)
 from kserve.protocol.grpc.grpc_predict_v2_pb2 import (
     ModelInferRequest,
     InferParameter,
@@ -107,9 +118,33 @@ class TestInferRequest:
                 }
             ],
         )
-        res = infer_req.to_grpc()
+        res = infer_req.to_grpc(use_typed_contents=True)
         assert res == expected
 
+    def test_to_grpc_raw_contents(self):
+        infer_req = InferRequest(
+            model_name="TestModel",
+            request_id="123",
+            infer_inputs=[
+                InferInput(
+                    name="input-0", datatype="INT32", shape=[1, 2], data=[[1, 2]]
+                ),
+                InferInput(
+                    name="input-1", datatype="BYTES", shape=[2], data=["a", "bc"]
+                ),
+            ],
+        )
+        res = infer_req.to_grpc()
+        assert not res.inputs[0].HasField("contents")
+        assert list(res.raw_input_contents) == [
+            np.array([1, 2], dtype=np.int32).tobytes(),
+            b"\x01\x00\x00\x00a\x02\x00\x00\x00bc",
+        ]
+        req = InferRequest.from_grpc(res)
+        assert req.inputs[0].data is None
+        assert req.inputs[0].as_numpy().tolist() == [[1, 2]]
+        assert req.inputs[1].as_numpy().tolist() == [b"a", b"bc"]
+
     def test_from_grpc(self):
         infer_req = ModelInferRequest(
             model_name="TestModel",
@@ -159,6 +194,90 @@ class TestInferRequest:
         res = InferRequest.from_grpc(infer_req)
         assert res == expected
 
+    def test_from_rest(self):
+        request = {
+            "id": "123",
+            "parameters": {"content_type": "pd"},
+            "inputs": [
+                {
+                    "name": "input-0",
+                    "shape": [1, 2],
+                    "datatype": "INT32",
+                    "data": [1, 2],
+                }
+            ],
+        }
+        expected = InferRequest(
+            model_name="TestModel",
+            request_id="123",
+            parameters={"content_type": "pd"},
+            infer_inputs=[
+                InferInput(
+                    name="input-0",
+                    datatype="INT32",
+                    shape=[1, 2],
+                    data=[1, 2],
+                    parameters={},
+                )
+            ],
+        )
+        assert InferRequest.from_rest("TestModel", request) == expected
+
+    def test_from_rest_invalid(self):
+        with pytest.raises(InvalidInput, match="inputs"):
+            InferRequest.from_rest("TestModel", {"inputs": None})
+        with pytest.raises(InvalidInput, match="datatype"):
+            InferRequest.from_rest(
+                "TestModel", {"inputs": [{"name": "a", "shape": [1], "data": [1]}]}
+            )
+        with pytest.raises(InvalidInput, match="parameters"):
+            InferRequest.from_rest(
+                "TestModel", {"inputs": [], "parameters": {"a": [1, 2]}}
+            )
+
+    def test_binary_roundtrip(self):
+        fp32 = np.array([[1.5, 2.5], [3.5, 4.5]], dtype=np.float32)
+        infer_req = InferRequest(
+            model_name="TestModel",
+            request_id="123",
+            parameters={"test-str": "dummy"},
+            infer_inputs=[
+                InferInput(name="input-0", datatype="FP32", shape=[2, 2], data=fp32),
+                InferInput(
+                    name="input-1", datatype="BYTES", shape=[2], data=["foo", "ba"]
+                ),
+            ],
+        )
+        body, json_length = infer_req.to_bytes()
+        res = InferRequest.from_bytes(body, json_length, "TestModel")
+        assert res.id == "123"
+        assert res.parameters == {"test-str": "dummy"}
+        assert res.inputs[0].parameters["binary_data_size"] == fp32.nbytes
+        assert isinstance(res.inputs[0]._raw_data, memoryview)
+        assert np.array_equal(res.inputs[0].as_numpy(), fp32)
+        assert res.inputs[1].as_numpy().tolist() == [b"foo", b"ba"]
+        assert res.to_rest()["inputs"][1]["data"] == ["foo", "ba"]
+
+    def test_from_bytes_mixed_json_and_binary(self):
+        header = (
+            b'{"inputs":[{"name":"a","shape":[2],"datatype":"INT32","data":[1,2]},'
+            b'{"name":"b","shape":[2],"datatype":"INT32","parameters":{"binary_data_size":8}}],'
+            b'"parameters":{"binary_data_output":true}}'
+        )
+        raw = np.array([3, 4], dtype=np.int32).tobytes()
+        res = InferRequest.from_bytes(header + raw, len(header), "TestModel")
+        assert res.inputs[0].as_numpy().tolist() == [1, 2]
+        assert res.inputs[1].as_numpy().tolist() == [3, 4]
+        assert res.use_binary_outputs
+
+    def test_from_bytes_invalid_binary_data_size(self):
+        header = b'{"inputs":[{"name":"a","shape":[2],"datatype":"INT32","parameters":{"binary_data_size":16}}]}'
+        raw = np.array([3, 4], dtype=np.int32).tobytes()
+        with pytest.raises(InvalidInput):
+            InferRequest.from_bytes(header + raw, len(header), "TestModel")
+        with pytest.raises(InvalidInput):
+            InferRequest.from_bytes(header + raw + raw + raw, len(header), "TestModel")
+
     class TestInferResponse:
         def test_to_rest(self):
             infer_res = InferResponse(
@@ -249,7 +368,7 @@ class TestInferRequest:
                     }
                 ],
             )
-            res = infer_res.to_grpc()
+            res = infer_res.to_grpc(use_typed_contents=True)
             assert res == expected
 
         def test_from_grpc(self):
@@ -302,3 +421,142 @@ class TestInferRequest:
             )
             res = InferResponse.from_grpc(infer_res)
             assert res == expected
+
+        def test_binary_roundtrip(self):
+            infer_res = InferResponse(
+                model_name="TestModel",
+                response_id="123",
+                infer_outputs=[
+                    InferOutput(
+                        name="output-0", datatype="INT64", shape=[1, 3], data=[1, 2, 3]
+                    )
+                ],
+            )
+            body, json_length = infer_res.to_bytes()
+            res = InferResponse.from_bytes(body, json_length)
+            assert res.model_name == "TestModel"
+            assert res.id == "123"
+            assert res.outputs[0].parameters == {"binary_data_size": 24}
+            assert res.outputs[0].as_numpy().tolist() == [[1, 2, 3]]
+            assert res.to_rest()["outputs"][0]["data"] == [[1, 2, 3]]
+
+
+class TestBytesTensorCodec:
+    def test_roundtrip(self):
+        tensor = np.array([[b"abc", "héllo"], [3, b""]], dtype=np.object_)
+        encoded = serialize_byte_tensor(tensor).item()
+        assert encoded == (
+            b"\x03\x00\x00\x00abc\x06\x00\x00\x00h\xc3\xa9llo"
+            b"\x01\x00\x00\x003\x00\x00\x00\x00"
+        )
+        decoded = deserialize_bytes_tensor(encoded)
+        assert decoded.tolist() == [b"abc", "héllo".encode("utf-8"), b"3", b""]
+
+    def test_memoryview(self):
+        encoded = serialize_byte_tensor(np.array([b"ab", b"cde"])).item()
+        decoded = deserialize_bytes_tensor(encoded, as_memoryview=True)
+        assert all(isinstance(val, memoryview) for val in decoded)
+        assert [val.tobytes() for val in decoded] == [b"ab", b"cde"]
+
+    def test_empty(self):
+        assert serialize_byte_tensor(np.array([], dtype=np.object_)).size == 0
+        assert deserialize_bytes_tensor(b"").size == 0
+
+    def test_fixed_length_elements(self):
+        tensor = np.array([b"ab", b"cd", b"ef"], dtype=np.object_)
+        encoded = serialize_byte_tensor(tensor).item()
+        assert deserialize_bytes_tensor(encoded).tolist() == [b"ab", b"cd", b"ef"]
+        decoded = deserialize_bytes_tensor(encoded, as_memoryview=True)
+        assert [val.tobytes() for val in decoded] == [b"ab", b"cd", b"ef"]
+        # The same total length as 3 elements of 2 bytes, but with different lengths.
+        encoded = b"\x01\x00\x00\x00a\x00\x00\x00\x00\x03\x00\x00\x00bcd"
+        assert deserialize_bytes_tensor(encoded).tolist() == [b"a", b"", b"bcd"]
+
+    @pytest.mark.parametrize(
+        "elements",
+        [[b"x" * 16] * 10000, [b"y" * (i % 32) for i in range(10000)]],
+        ids=["fixed-length", "variable-length"],
+    )
+    def test_faster_than_per_element_codec(self, elements):
+        # The codec packing and unpacking one element at a time, which these functions replace.
+        def serialize_per_element(tensor):
+            parts = []
+            for obj in np.nditer(tensor, flags=["refs_ok"], order="C"):
+                parts.append(struct.pack("<I", len(obj.item())))
+                parts.append(obj.item())
+            return b"".join(parts)
+
+        def deserialize_per_element(encoded):
+            strs, offset = [], 0
+            while offset < len(encoded):
+                length = struct.unpack_from("<I", encoded, offset)[0]
+                offset += 4
+                strs.append(struct.unpack_from(f"<{length}s", encoded, offset)[0])
+                offset += length
+            return np.array(strs, dtype=np.object_)
+
+        def best_time(func, arg):
+            return min(timeit.repeat(lambda: func(arg), number=3, repeat=5))
+
+        tensor = np.array(elements, dtype=np.object_)
+        encoded = serialize_per_element(tensor)
+        assert serialize_byte_tensor(tensor).item() == encoded
+        assert deserialize_bytes_tensor(encoded).tolist() == elements
+        assert best_time(serialize_byte_tensor, tensor) < best_time(
+            serialize_per_element, tensor
+        )
+        assert best_time(deserialize_bytes_tensor, encoded) < best_time(
+            deserialize_per_element, encoded
+        )
+
+    def test_truncated(self):
+        with pytest.raises(InvalidInput):
+            deserialize_bytes_tensor(b"\x05\x00\x00\x00abc")
+
+    def test_set_data_from_numpy_strings(self):
+        infer_input = InferInput(name="input-0", shape=[2], datatype="BYTES")
+        infer_input.set_data_from_numpy(
+            np.array([b"abc", "def"], dtype=np.object_), binary_data=False
+        )
+        assert infer_input.data == ["abc", "def"]
+        with pytest.raises(InferenceError):
+            infer_input.set_data_from_numpy(
+                np.array([b"\xff"], dtype=np.object_), binary_data=False
+            )
+
+
+class TestNumpyData:
+    def test_set_data_from_numpy_keeps_array(self):
+        tensor = np.array([[1.5, 2.5], [3.5, 4.5]], dtype=np.float32)
+        infer_output = InferOutput(name="output-0", shape=[2, 2], datatype="FP32")
+        infer_output.set_data_from_numpy(tensor, binary_data=False)
+        assert infer_output.data is tensor
+        assert infer_output == InferOutput(
+            name="output-0", shape=[2, 2], datatype="FP32", data=[1.5, 2.5, 3.5, 4.5]
+        )
+
+    def test_to_rest_numpy_data(self):
+        tensor = np.arange(6, dtype=np.int64).reshape(2, 3)
+        json_output = InferOutput(name="json", shape=[2, 3], datatype="INT64")
+        json_output.set_data_from_numpy(tensor, binary_data=False)
+        raw_output = InferOutput(name="raw", shape=[2, 3], datatype="INT64")
+        raw_output.set_data_from_numpy(tensor, binary_data=True)
+        infer_response = InferResponse(
+            response_id="1",
+            model_name="TestModel",
+            infer_outputs=[json_output, raw_output],
+        )
+        res = infer_response.to_rest(numpy_data=True)
+        assert isinstance(res["outputs"][0]["data"], np.ndarray)
+        assert isinstance(res["outputs"][1]["data"], np.ndarray)
+        assert orjson.dumps(res, option=orjson.OPT_SERIALIZE_NUMPY) == orjson.dumps(
+            infer_response.to_rest()
+        )
+
+    def test_request_to_rest_numpy_data(self):
+        infer_input = InferInput(name="input-0", shape=[2], datatype="FP64")
+        infer_input.set_data_from_numpy(np.array([0.5, 1.5]), binary_data=False)
+        infer_request = InferRequest(model_name="TestModel", infer_inputs=[infer_input])
+        res = infer_request.to_rest(numpy_data=True)
+        assert isinstance(res["inputs"][0]["data"], np.ndarray)
+        assert infer_request.to_rest()["inputs"][0]["data"] == [0.5, 1.5]
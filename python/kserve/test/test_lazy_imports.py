@@ -0,0 +1,59 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import subprocess
+import sys
+
+import pytest
+
+import kserve
+from kserve.utils.utils import lazy_isinstance
+
+LAZY_MODULES = [
+    "ray",
+    "pandas",
+    "kubernetes",
+    "kserve.api.kserve_client",
+    "kserve.models",
+    "kserve.protocol.rest.openai.types.openapi",
+]
+
+
+def loaded_modules(statement):
+    code = f"import sys; {statement}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    return [m for m in output.stdout.strip().split(",") if m]
+
+
+def test_model_server_imports_are_lazy():
+    assert loaded_modules("from kserve import Model, ModelServer") == []
+
+
+def test_lazy_attributes():
+    from kserve.api.kserve_client import KServeClient
+    from kserve.models.v1beta1_inference_service import V1beta1InferenceService
+
+    assert kserve.KServeClient is KServeClient
+    assert kserve.V1beta1InferenceService is V1beta1InferenceService
+    assert "V1beta1InferenceService" in dir(kserve)
+    with pytest.raises(AttributeError):
+        kserve.NotAnAttribute
+
+
+def test_lazy_isinstance():
+    assert lazy_isinstance(1.0, "builtins", "float")
+    assert not lazy_isinstance(1, "builtins", "float")
+    assert not lazy_isinstance(1, "kserve.not_imported", "Model")
@@ -12,7 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from kserve import ModelRepository, Model
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from kserve import MemoryAwareModelRepository, ModelRepository, Model
+from kserve.protocol.dataplane import DataPlane
 from kserve.protocol.rest.openai import CompletionRequest, OpenAIModel
 from unittest.mock import patch
 from kserve.protocol.rest.openai.types.openapi import (
@@ -84,3 +92,239 @@ def test_is_model_ready_openai_model():
 
     actual = repo.is_model_ready("openai-model")
     assert actual is True
+
+
+class SleepingModelRepository(ModelRepository):
+    def __init__(self, models_dir, load_workers=4, delay=0.2):
+        super().__init__(models_dir, load_workers=load_workers)
+        self.delay = delay
+        self.release = threading.Event()
+        self.release.set()
+
+    def load_model(self, name: str) -> bool:
+        if name == "blocked":
+            self.release.wait(5)
+        time.sleep(self.delay)
+        if name == "broken":
+            raise RuntimeError("corrupted model file")
+        model = Model(name)
+        model.load()
+        self.update(model)
+        return model.ready
+
+
+def make_models_dir(tmp_path, names):
+    for name in names:
+        os.makedirs(tmp_path / name)
+    # Files next to the model directories are ignored.
+    (tmp_path / "README").write_text("models")
+    return str(tmp_path)
+
+
+def test_load_models_concurrently(tmp_path):
+    names = [f"model{i}" for i in range(8)]
+    repo = SleepingModelRepository(make_models_dir(tmp_path, names), load_workers=8)
+    start = time.perf_counter()
+    results = repo.load_models()
+    # The 8 loads of 0.2 seconds overlap.
+    assert time.perf_counter() - start < 1.0
+    assert results == {name: True for name in names}
+    assert sorted(repo.load_times) == names
+    assert all(repo.is_model_ready(name) for name in names)
+
+
+def test_load_models_failure(tmp_path):
+    repo = SleepingModelRepository(
+        make_models_dir(tmp_path, ["model1", "broken", "model2"]), delay=0
+    )
+    results = repo.load_models()
+    assert results == {"broken": False, "model1": True, "model2": True}
+    assert repo.load_errors == {"broken": "corrupted model file"}
+    assert repo.get_model("broken") is None
+    assert repo.is_model_ready("model1") and repo.is_model_ready("model2")
+
+
+def test_load_models_in_background(tmp_path):
+    repo = SleepingModelRepository(
+        make_models_dir(tmp_path, ["model1", "blocked"]), delay=0
+    )
+    repo.release.clear()
+    assert repo.load_models(wait=False) == {}
+    deadline = time.monotonic() + 5
+    while not repo.is_model_ready("model1") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # A loaded model is served while the others are still loading.
+    assert repo.is_model_ready("model1")
+    assert not repo.is_model_ready("blocked")
+    repo.release.set()
+    assert repo.wait_for_models() == {"blocked": True, "model1": True}
+    assert repo.is_model_ready("blocked")
+
+
+def test_load_workers_from_env(monkeypatch):
+    monkeypatch.setenv("MODEL_LOAD_WORKERS", "3")
+    assert ModelRepository().load_workers == 3
+    assert ModelRepository(load_workers=5).load_workers == 5
+
+
+class FakeProcess:
+    rss = 0
+
+    def memory_info(self):
+        return self
+
+
+class ResidentModel(Model):
+    def __init__(self, name, size, delay=0.0):
+        super().__init__(name)
+        self.size = size
+        self.delay = delay
+
+    def load(self):
+        time.sleep(self.delay)
+        FakeProcess.rss += self.size
+        self.ready = True
+        return self.ready
+
+    def stop(self):
+        FakeProcess.rss -= self.size
+
+
+@pytest.fixture
+def memory_repo(monkeypatch):
+    monkeypatch.setattr("kserve.model_repository.psutil.Process", FakeProcess)
+    repo = MemoryAwareModelRepository(
+        models_dir="/nonexistent", memory_budget_bytes=250
+    )
+    repo.factory_calls = []
+
+    def factory(name, delay=0.0):
+        def create():
+            repo.factory_calls.append(name)
+            return ResidentModel(name, 100, delay)
+
+        return create
+
+    for name in ["a", "b", "c"]:
+        repo.register(name, factory(name))
+    repo.register("slow", factory("slow", delay=0.2))
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_lazy_load_on_first_request(memory_repo):
+    dataplane = DataPlane(model_registry=memory_repo)
+    assert memory_repo.get_model("a") is None
+    # A registered model is ready to be loaded by its first request.
+    assert dataplane.model_ready("a")
+    model = await dataplane.get_model_async("a")
+    assert model.ready and memory_repo.get_model("a") is model
+    assert memory_repo.model_sizes == {"a": 100}
+    assert await dataplane.get_model_async("a") is model
+    assert dataplane.get_model("a") is model
+    assert memory_repo.factory_calls == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_are_deduplicated(memory_repo):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    models = await asyncio.gather(
+        *[memory_repo.get_or_load_model("slow") for _ in range(5)]
+    )
+    task.cancel()
+    assert memory_repo.factory_calls == ["slow"]
+    assert all(model is models[0] for model in models)
+    # The event loop kept running while the model was loading.
+    assert ticks > 5
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(memory_repo):
+    await memory_repo.get_or_load_model("a")
+    await memory_repo.get_or_load_model("b")
+    await memory_repo.get_or_load_model("a")
+    await memory_repo.get_or_load_model("c")
+    # b is the least recently used model when c exceeds the budget.
+    assert list(memory_repo.model_sizes) == ["a", "c"]
+    assert memory_repo.get_model("b") is None
+    assert memory_repo.is_model_ready("b")
+    model = await memory_repo.get_or_load_model("b")
+    assert model.ready
+    assert list(memory_repo.model_sizes) == ["c", "b"]
+    assert memory_repo.factory_calls == ["a", "b", "c", "b"]
+
+
+@pytest.mark.asyncio
+async def test_model_in_use_is_not_evicted(memory_repo):
+    async with memory_repo.use_model("a") as model_a:
+        await memory_repo.get_or_load_model("b")
+        await memory_repo.get_or_load_model("c")
+        # a is the least recently used model but a request holds it, b is evicted.
+        assert memory_repo.get_model("a") is model_a
+        assert memory_repo.get_model("b") is None
+        assert list(memory_repo.model_sizes) == ["a", "c"]
+    await memory_repo.get_or_load_model("b")
+    # a is released and evicted by the next load.
+    assert memory_repo.get_model("a") is None
+    assert list(memory_repo.model_sizes) == ["c", "b"]
+
+
+@pytest.mark.asyncio
+async def test_dataplane_holds_model_during_request(memory_repo):
+    dataplane = DataPlane(model_registry=memory_repo)
+    async with dataplane.use_model("a"):
+        assert memory_repo._in_flight == {"a": 1}
+    assert memory_repo._in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_model_reported_size(memory_repo):
+    class SizedModel(ResidentModel):
+        def get_resident_bytes(self):
+            return 200
+
+    memory_repo.register("sized", lambda: SizedModel("sized", 0))
+    await memory_repo.get_or_load_model("sized")
+    # The reported size is used, the process memory didn't grow.
+    assert memory_repo.model_sizes == {"sized": 200}
+
+
+@pytest.mark.asyncio
+async def test_unknown_model(memory_repo):
+    assert await memory_repo.get_or_load_model("unknown") is None
+    assert not memory_repo.is_model_ready("unknown")
+
+
+@pytest.mark.asyncio
+async def test_model_name_outside_models_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("kserve.model_repository.psutil.Process", FakeProcess)
+    models_dir = tmp_path / "models"
+    (models_dir / "model").mkdir(parents=True)
+    (tmp_path / "outside").mkdir()
+    repo = MemoryAwareModelRepository(models_dir=str(models_dir))
+    loaded = []
+    repo.load_model = lambda name: loaded.append(name)
+    assert repo.has_model("model")
+    for name in ["../outside", "..", ".", "", str(tmp_path / "outside"), "model/.."]:
+        assert not repo.has_model(name)
+        assert not repo.is_model_ready(name)
+        assert await repo.get_or_load_model(name) is None
+    assert loaded == []
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_model_loads_model_not_ready():
+    repo = ModelRepository()
+    model = Model("not-ready")
+    repo.update(model)
+    assert not repo.is_model_ready("not-ready")
+    assert await repo.get_or_load_model("not-ready") is model
+    assert repo.is_model_ready("not-ready")
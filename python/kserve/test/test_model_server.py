@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+
 import pytest
-from kserve import ModelServer
+from kserve import Model, ModelServer
 
 UNKNOWN_MODEL_TYPE_ERR_MESSAGE = "Unknown model collection types"
 
@@ -25,3 +27,33 @@ def test_model_server_start_no_models():
         server.start(models=None)
 
     assert exc.value.args[0] == UNKNOWN_MODEL_TYPE_ERR_MESSAGE
+
+
+class ThreadNameModel(Model):
+    def __init__(self, name):
+        super().__init__(name)
+        self.ready = True
+        self.threads = []
+
+    def predict(self, payload, headers=None):
+        self.threads.append(threading.current_thread().name)
+        return payload
+
+
+class StopServer(Exception):
+    pass
+
+
+def test_sync_predict_runs_on_asyncio_workers(monkeypatch):
+    model = ThreadNameModel("ThreadNameModel")
+    server = ModelServer(max_asyncio_workers=2)
+
+    async def warmup_models():
+        await model({"instances": [1]})
+        raise StopServer()
+
+    monkeypatch.setattr(server, "_warmup_models", warmup_models)
+    with pytest.raises(StopServer):
+        server.start([model])
+    # The sync handler ran on the pool set on the event loop running the servers.
+    assert model.threads[0].startswith("kserve-asyncio")
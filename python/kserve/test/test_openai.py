@@ -12,22 +12,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import AsyncIterator, Callable, Iterable, List, Tuple, Union, cast
 from unittest.mock import MagicMock, patch
 
 import httpx
+import numpy as np
 import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
+from kserve import Model, ModelRepository
 from kserve.protocol.rest.openai import (
     ChatCompletionRequestMessage,
     ChatPrompt,
     CompletionRequest,
     ChatCompletionRequest,
+    EmbeddingRequest,
     OpenAIChatAdapterModel,
+    OpenAIEncoderModel,
     OpenAIProxyModel,
+    create_embedding_response,
 )
+from kserve.protocol.rest.openai.config import maybe_register_openai_endpoints
 from kserve.protocol.rest.openai.errors import OpenAIError
 from kserve.protocol.rest.openai.types.openapi import (
     CreateChatCompletionRequest,
@@ -155,6 +164,46 @@ def dummy_model(completion: Completion, completion_partial: Completion):
     return DummyModel((completion, completion_partial))
 
 
+class DummyEncoderModel(OpenAIEncoderModel):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.ready = True
+
+    async def create_embedding(self, request: EmbeddingRequest):
+        inputs = request.params.input
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        embeddings = np.array([[len(text), 0.5, -1.0] for text in inputs])
+        return create_embedding_response(
+            self.name,
+            embeddings,
+            sum(len(text) for text in inputs),
+            request.params.encoding_format,
+        )
+
+
+class AdmittedEncoderModel(Model, OpenAIEncoderModel):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.ready = True
+        self.max_concurrency = 1
+        self.in_flight = []
+
+    async def create_embedding(self, request: EmbeddingRequest):
+        self.in_flight.append(self.admission_controller.in_flight)
+        return create_embedding_response(
+            self.name, np.array([[1.0]]), 1, request.params.encoding_format
+        )
+
+
+@pytest.fixture
+def embedding_client():
+    repository = ModelRepository()
+    repository.update(DummyEncoderModel("embedding-model"))
+    app = FastAPI()
+    maybe_register_openai_endpoints(app, repository)
+    return TestClient(app)
+
+
 @asynccontextmanager
 async def mocked_openai_proxy_model(handler: Callable):
     transport = httpx.MockTransport(handler=handler)
@@ -272,6 +321,58 @@ class TestOpenAICreateChatCompletion:
         assert num_chunks_consumed == dummy_model.num_chunks
 
 
+class TestOpenAICreateEmbedding:
+    def test_create_embedding(self, embedding_client: TestClient):
+        response = embedding_client.post(
+            "/openai/v1/embeddings",
+            json={"model": "embedding-model", "input": ["a", "abc"]},
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "object": "list",
+            "model": "embedding-model",
+            "data": [
+                {"object": "embedding", "index": 0, "embedding": [1.0, 0.5, -1.0]},
+                {"object": "embedding", "index": 1, "embedding": [3.0, 0.5, -1.0]},
+            ],
+            "usage": {"prompt_tokens": 4, "total_tokens": 4},
+        }
+
+    def test_create_embedding_base64(self, embedding_client: TestClient):
+        response = embedding_client.post(
+            "/openai/v1/embeddings",
+            json={
+                "model": "embedding-model",
+                "input": "abc",
+                "encoding_format": "base64",
+            },
+        )
+        assert response.status_code == 200
+        embedding = response.json()["data"][0]["embedding"]
+        np.testing.assert_array_equal(
+            np.frombuffer(base64.b64decode(embedding), dtype="<f4"),
+            [3.0, 0.5, -1.0],
+        )
+
+    def test_create_embedding_is_admitted(self):
+        model = AdmittedEncoderModel("admitted-model")
+        repository = ModelRepository()
+        repository.update(model)
+        app = FastAPI()
+        maybe_register_openai_endpoints(app, repository)
+        response = TestClient(app).post(
+            "/openai/v1/embeddings",
+            json={"model": "admitted-model", "input": "a"},
+        )
+        assert response.status_code == 200
+        assert model.in_flight == [1]
+        assert model.admission_controller.in_flight == 0
+
+    def test_encoder_model_is_listed(self, embedding_client: TestClient):
+        response = embedding_client.get("/openai/v1/models")
+        assert [model["id"] for model in response.json()["data"]] == ["embedding-model"]
+
+
 class TestOpenAICompletionConversion:
     def test_completion_to_chat_completion(
         self, completion: Completion, chat_completion: ChatCompletion
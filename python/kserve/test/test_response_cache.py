@@ -0,0 +1,163 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+from kserve import Model, ModelRepository
+from kserve.constants.constants import CACHE_BYPASS_HEADER
+from kserve.protocol.dataplane import DataPlane
+from kserve.protocol.infer_type import InferInput, InferRequest
+from kserve.response_cache import ResponseCache, get_cache_key
+from kserve.utils.utils import get_predict_input, get_predict_response
+
+
+class CountingModel(Model):
+    def __init__(self, name):
+        super().__init__(name)
+        self.calls = 0
+        self.ready = True
+
+    async def predict(self, payload, headers=None):
+        self.calls += 1
+        inputs = get_predict_input(payload)
+        if isinstance(payload, InferRequest):
+            return get_predict_response(payload, np.asarray(inputs) * 2, self.name)
+        return {"predictions": [v * 2 for v in inputs]}
+
+
+def make_request(request_id, data):
+    infer_input = InferInput(
+        name="input-0", shape=[len(data)], datatype="INT32", data=data
+    )
+    return InferRequest(
+        model_name="TestModel", request_id=request_id, infer_inputs=[infer_input]
+    )
+
+
+def make_dataplane(model, **cache_kwargs):
+    model_repository = ModelRepository()
+    model_repository.response_cache = ResponseCache(**cache_kwargs)
+    model_repository.update(model)
+    return DataPlane(model_registry=model_repository), model_repository
+
+
+def cache_metric(name, model_name):
+    return REGISTRY.get_sample_value(f"{name}_total", {"model_name": model_name}) or 0
+
+
+class TestResponseCache:
+    def test_cache_key(self):
+        key = get_cache_key("m", make_request("1", [1, 2]))
+        assert key == get_cache_key("m", make_request("2", [1, 2]))
+        assert key != get_cache_key("m", make_request("1", [1, 3]))
+        assert key != get_cache_key("other", make_request("1", [1, 2]))
+        assert get_cache_key("m", {"instances": [1]}) == get_cache_key(
+            "m", {"instances": [1]}
+        )
+        assert get_cache_key("m", {"a": 1, "b": 2}) == get_cache_key(
+            "m", {"b": 2, "a": 1}
+        )
+        assert (
+            get_cache_key("m", {"instances": [1]}, {CACHE_BYPASS_HEADER: "true"})
+            is None
+        )
+
+    def test_cache_key_of_arrays(self):
+        def request(data, binary_data=False):
+            infer_input = InferInput(name="input-0", shape=[2, 2], datatype="INT32")
+            infer_input.set_data_from_numpy(data, binary_data=binary_data)
+            return InferRequest(model_name="TestModel", infer_inputs=[infer_input])
+
+        data = np.array([[1, 2], [3, 4]], dtype=np.int32)
+        key = get_cache_key("m", request(data.T.copy()))
+        # A non contiguous array is hashed like its contiguous copy.
+        assert key == get_cache_key("m", request(data.T))
+        assert key != get_cache_key("m", request(data))
+        assert get_cache_key("m", request(data, binary_data=True)) is not None
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        for i in range(3):
+            cache.put(("m", None, bytes([i])), {"predictions": [i]})
+        assert len(cache) == 2
+        assert cache.get(("m", None, bytes([0])), {}) is None
+        assert cache.get(("m", None, bytes([2])), {}) == {"predictions": [2]}
+
+    def test_memory_cap(self):
+        cache = ResponseCache(max_bytes=40)
+        cache.put(("m", None, b"1"), {"predictions": [1] * 5})
+        cache.put(("m", None, b"2"), {"predictions": [2] * 5})
+        assert len(cache) == 1
+        assert cache.size <= 40
+        cache.put(("m", None, b"3"), {"predictions": [3] * 100})
+        assert cache.get(("m", None, b"3"), {}) is None
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl_seconds=0)
+        cache.put(("m", None, b"1"), {"predictions": [1]})
+        assert cache.get(("m", None, b"1"), {}) is None
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        cache.put(("m", None, b"1"), {"predictions": [1]})
+        cache.put(("n", None, b"1"), {"predictions": [1]})
+        cache.invalidate("m")
+        assert len(cache) == 1
+        assert cache.get(("n", None, b"1"), {}) is not None
+
+
+@pytest.mark.asyncio
+class TestDataPlaneResponseCache:
+    async def test_cache_v1(self):
+        model = CountingModel("CachedV1Model")
+        dataplane, _ = make_dataplane(model)
+        hits = cache_metric("response_cache_hits", model.name)
+        first, _ = await dataplane.infer(model.name, {"instances": [1, 2]})
+        second, _ = await dataplane.infer(model.name, {"instances": [1, 2]})
+        assert first == second == {"predictions": [2, 4]}
+        assert first is not second
+        assert model.calls == 1
+        assert cache_metric("response_cache_hits", model.name) == hits + 1
+
+    async def test_cache_v2(self):
+        model = CountingModel("CachedV2Model")
+        dataplane, _ = make_dataplane(model)
+        first, _ = await dataplane.infer(model.name, make_request("1", [1, 2]))
+        second, _ = await dataplane.infer(model.name, make_request("2", [1, 2]))
+        assert model.calls == 1
+        assert first.id == "1"
+        assert second.id == "2"
+        assert second.outputs[0].as_numpy().tolist() == [2, 4]
+
+    async def test_bypass(self):
+        model = CountingModel("BypassModel")
+        dataplane, _ = make_dataplane(model)
+        headers = {CACHE_BYPASS_HEADER: "true"}
+        await dataplane.infer(model.name, {"instances": [1]}, headers)
+        await dataplane.infer(model.name, {"instances": [1]}, headers)
+        assert model.calls == 2
+
+    async def test_invalidated_on_reload_and_unload(self):
+        model = CountingModel("ReloadedModel")
+        dataplane, model_repository = make_dataplane(model)
+        await dataplane.infer(model.name, {"instances": [1]})
+        reloaded = CountingModel("ReloadedModel")
+        model_repository.update(reloaded)
+        await dataplane.infer(model.name, {"instances": [1]})
+        assert reloaded.calls == 1
+        model_repository.unload(model.name)
+        assert len(model_repository.response_cache) == 0
@@ -23,6 +23,7 @@ from unittest import mock
 import avro.io
 import avro.schema
 import httpx
+import numpy as np
 import pytest
 from cloudevents.conversion import to_binary, to_structured
 from cloudevents.http import CloudEvent
@@ -154,6 +155,11 @@ class DummyModel(Model):
         return {"predictions": request["instances"]}
 
 
+class DummyNumpyExplainModel(DummyModel):
+    async def explain(self, request, headers=None):
+        return {"explanations": np.asarray(request["instances"])}
+
+
 @serve.deployment
 class DummyServeModel(Model):
     def __init__(self, name):
@@ -324,6 +330,18 @@ class TestV1Endpoints:
         assert resp.content == b'{"predictions":[[1,2]]}'
         assert resp.headers["content-type"] == "application/json"
 
+    def test_explain_numpy_v1(self):
+        model = DummyNumpyExplainModel("NumpyModel")
+        model.load()
+        server = ModelServer()
+        server.register_model(model)
+        rest_server = RESTServer(server.dataplane, server.model_repository_extension)
+        resp = TestClient(rest_server.create_application()).post(
+            "/v1/models/NumpyModel:explain", content=b'{"instances":[[1,2]]}'
+        )
+        assert resp.status_code == 200
+        assert resp.content == b'{"explanations":[[1,2]]}'
+
     def test_unknown_path_v1(self, http_server_client):
         resp = http_server_client.get("/unknown_path")
         assert resp.status_code == 404
@@ -363,6 +381,101 @@ class TestV2Endpoints:
         assert result["outputs"][0]["data"] == [1, 2]
         assert resp.headers["content-type"] == "application/json"
 
+    @pytest.mark.parametrize(
+        "input_data",
+        [
+            b"{",
+            b'{"inputs": {}}',
+            b'{"inputs": [{"name": "input-0", "shape": [1, 2], "datatype": "INT32"}]}',
+            b'{"inputs": [{"name": "input-0", "shape": ["1"], "datatype": "INT32", "data": [1]}]}',
+        ],
+    )
+    def test_infer_invalid_request_v2(self, http_server_client, input_data):
+        resp = http_server_client.post("/v2/models/TestModel/infer", content=input_data)
+        assert resp.status_code == 400
+
+    def test_infer_binary_v2(self, http_server_client):
+        input_data = np.array([[1, 2], [3, 4]], dtype=np.int32)
+        req = InferRequest(
+            model_name="TestModel",
+            request_id="123",
+            parameters={"binary_data_output": True},
+            infer_inputs=[
+                InferInput(
+                    name="input-0", datatype="INT32", shape=[2, 2], data=input_data
+                )
+            ],
+        )
+        body, json_length = req.to_bytes()
+        resp = http_server_client.post(
+            "/v2/models/TestModel/infer",
+            content=body,
+            headers={
+                "content-type": "application/octet-stream",
+                "inference-header-content-length": str(json_length),
+            },
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/octet-stream"
+        result = InferResponse.from_bytes(
+            resp.content, int(resp.headers["inference-header-content-length"])
+        )
+        assert result.id == "123"
+        assert np.array_equal(result.outputs[0].as_numpy(), input_data)
+
+    def test_infer_binary_cloudevent_v2(self, http_server_client):
+        input_data = np.array([[1, 2]], dtype=np.int32)
+        req = InferRequest(
+            model_name="TestModel",
+            request_id="123",
+            parameters={"binary_data_output": True},
+            infer_inputs=[
+                InferInput(
+                    name="input-0", datatype="INT32", shape=[1, 2], data=input_data
+                )
+            ],
+        )
+        body, json_length = req.to_bytes()
+        resp = http_server_client.post(
+            "/v2/models/TestModel/infer",
+            content=body,
+            headers={
+                "inference-header-content-length": str(json_length),
+                "ce-specversion": "1.0",
+                "ce-source": "https://example.com/event-producer",
+                "ce-type": "com.example.sampletype1",
+                "ce-id": "36077800-0c23-4f38-a0b4-01f4369f670a",
+            },
+        )
+        # The response headers are set on the binary response too.
+        assert resp.status_code == 200
+        assert resp.headers["ce-specversion"] == "1.0"
+        assert resp.headers["content-type"] == "application/octet-stream"
+        result = InferResponse.from_bytes(
+            resp.content, int(resp.headers["inference-header-content-length"])
+        )
+        assert np.array_equal(result.outputs[0].as_numpy(), input_data)
+
+    def test_infer_binary_input_json_output_v2(self, http_server_client):
+        header = b'{"inputs":[{"name":"input-0","shape":[1,2],"datatype":"FP32","parameters":{"binary_data_size":8}}]}'
+        body = header + np.array([1.5, 2.5], dtype=np.float32).tobytes()
+        resp = http_server_client.post(
+            "/v2/models/TestModel/infer",
+            content=body,
+            headers={"inference-header-content-length": str(len(header))},
+        )
+        assert resp.status_code == 200
+        result = json.loads(resp.content)
+        assert result["outputs"][0]["data"] == [1.5, 2.5]
+
+    def test_infer_binary_invalid_header_length_v2(self, http_server_client):
+        resp = http_server_client.post(
+            "/v2/models/TestModel/infer",
+            content=b'{"inputs":[]}',
+            headers={"inference-header-content-length": "100"},
+        )
+        assert resp.status_code == 400
+
     def test_explain_v2(self, http_server_client):
         resp = http_server_client.post(
             "/v1/models/TestModel:explain", content=b'{"instances":[[1,2]]}'
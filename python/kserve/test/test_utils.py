@@ -0,0 +1,121 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kserve.errors import InvalidInput
+from kserve.protocol.infer_type import InferInput, InferRequest
+from kserve.utils.utils import get_predict_input, get_predict_response
+
+pa = pytest.importorskip("pyarrow")
+
+
+def make_arrow_request(table: pa.Table, binary: bool = True) -> InferRequest:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    infer_input = InferInput(name="input-0", shape=[1], datatype="BYTES")
+    infer_input.set_data_from_numpy(
+        np.array([sink.getvalue().to_pybytes()], dtype=np.object_), binary_data=binary
+    )
+    return InferRequest(
+        model_name="TestModel",
+        infer_inputs=[infer_input],
+        raw_inputs=[infer_input._raw_data] if binary else None,
+        parameters={"content_type": "arrow"},
+    )
+
+
+def read_arrow_output(infer_output) -> pa.Table:
+    stream = infer_output.as_numpy()[0]
+    return pa.ipc.open_stream(pa.py_buffer(stream)).read_all()
+
+
+class TestPredictInput:
+    def test_v1_column_instances(self):
+        instances = [{"a": [1, 2], "b": ["x", "y"]}, {"a": [3], "b": ["z"]}]
+        df = get_predict_input({"instances": instances})
+        assert df.to_dict(orient="list") == {"a": [1, 2, 3], "b": ["x", "y", "z"]}
+        df = get_predict_input({"instances": instances}, columns=["b", "a"])
+        assert list(df.columns) == ["b", "a"]
+
+    def test_v1_record_instances(self):
+        instances = [[{"a": 1}, {"b": 2}], [{"a": 3}, {"b": 4}]]
+        df = get_predict_input({"instances": instances})
+        assert len(df) == 4
+        assert list(df.columns) == ["a", "b"]
+
+    def test_v2_dataframe(self):
+        a = InferInput(name="a", shape=[3], datatype="INT64")
+        a.set_data_from_numpy(np.array([1, 2, 3]), binary_data=True)
+        b = InferInput(name="b", shape=[3], datatype="BYTES", data=["x", "y", "z"])
+        request = InferRequest(
+            model_name="TestModel",
+            infer_inputs=[a, b],
+            raw_inputs=[a._raw_data],
+            parameters={"content_type": "pd"},
+        )
+        df = get_predict_input(request)
+        assert df["a"].tolist() == [1, 2, 3]
+        assert df["b"].tolist() == ["x", "y", "z"]
+
+    def test_v2_arrow_ipc(self):
+        table = pa.table({"a": np.arange(5, dtype=np.float32), "b": list("abcde")})
+        df = get_predict_input(make_arrow_request(table))
+        assert isinstance(df, pd.DataFrame)
+        assert df["a"].dtype == np.float32
+        assert df["b"].tolist() == list("abcde")
+
+    def test_v2_arrow_ipc_invalid(self):
+        infer_input = InferInput(name="input-0", shape=[2], datatype="FP32")
+        infer_input.set_data_from_numpy(np.array([1.0, 2.0], dtype=np.float32))
+        request = InferRequest(
+            model_name="TestModel",
+            infer_inputs=[infer_input],
+            parameters={"content_type": "arrow"},
+        )
+        with pytest.raises(InvalidInput):
+            get_predict_input(request)
+
+    def test_as_arrow_table_columns(self):
+        a = InferInput(name="a", shape=[2, 1], datatype="FP64", data=[1.5, 2.5])
+        table = InferRequest(model_name="TestModel", infer_inputs=[a]).as_arrow_table()
+        assert table.column_names == ["a"]
+        assert table.column("a").to_pylist() == [1.5, 2.5]
+
+
+class TestPredictResponse:
+    def test_v1_dataframe(self):
+        result = pd.DataFrame({"a": [1, 2], "b": [0.5, 1.5]})
+        response = get_predict_response({"instances": [[1], [2]]}, result, "TestModel")
+        assert response == {"predictions": [{"a": 1, "b": 0.5}, {"a": 2, "b": 1.5}]}
+
+    def test_v2_arrow_output(self):
+        request = make_arrow_request(pa.table({"a": [1, 2]}))
+        result = pd.DataFrame({"score": [0.1, 0.9], "label": ["n", "y"]})
+        response = get_predict_response(request, result, "TestModel")
+        infer_output = response.outputs[0]
+        assert infer_output.parameters["content_type"] == "arrow"
+        table = read_arrow_output(infer_output)
+        assert table.to_pydict() == {"score": [0.1, 0.9], "label": ["n", "y"]}
+
+    def test_v2_arrow_output_from_numpy(self):
+        request = make_arrow_request(pa.table({"a": [1, 2]}))
+        response = get_predict_response(
+            request, np.array([[1, 2], [3, 4]]), "TestModel"
+        )
+        table = read_arrow_output(response.outputs[0])
+        assert table.to_pydict() == {"output-0": [1, 3], "output-1": [2, 4]}
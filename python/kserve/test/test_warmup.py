@@ -0,0 +1,187 @@
+# Copyright 2024 The KServe Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+from kserve import MemoryAwareModelRepository, Model, ModelRepository, ModelServer
+from kserve.protocol.infer_type import InferRequest
+from kserve.protocol.model_repository_extension import ModelRepositoryExtension
+
+
+class WarmupModel(Model):
+    def __init__(self, name):
+        super().__init__(name)
+        self.calls = []
+        self.ready_during_warmup = []
+
+    def load(self):
+        self.ready = True
+        return self.ready
+
+    def get_input_types(self):
+        return [
+            {"name": "features", "datatype": "FP32", "shape": [-1, 4]},
+            {"name": "text", "datatype": "BYTES", "shape": [-1]},
+        ]
+
+    async def preprocess(self, payload, headers=None):
+        self.calls.append("preprocess")
+        return payload
+
+    def predict(self, payload, headers=None):
+        self.calls.append("predict")
+        self.ready_during_warmup.append(self.ready)
+        if isinstance(payload, InferRequest):
+            return {"predictions": payload.inputs[0].as_numpy().tolist()}
+        return {"predictions": payload["instances"]}
+
+    async def postprocess(self, result, headers=None):
+        self.calls.append("postprocess")
+        return result
+
+
+class FailingModel(WarmupModel):
+    def predict(self, payload, headers=None):
+        raise RuntimeError("bad input")
+
+
+def warmup_metric(model_name):
+    return REGISTRY.get_sample_value("model_warmup_seconds", {"model_name": model_name})
+
+
+def warmup_failures(model_name):
+    return REGISTRY.get_sample_value(
+        "model_warmup_failures_total", {"model_name": model_name}
+    )
+
+
+class WarmupModelRepository(ModelRepository):
+    def load_model(self, name):
+        model = WarmupModel(name)
+        model.warmup_inputs = [{"instances": [1]}]
+        model.published_during_warmup = []
+        predict = model.predict
+
+        def record_published(payload, headers=None):
+            model.published_during_warmup.append(self.get_model(name) is not None)
+            return predict(payload, headers)
+
+        model.predict = record_published
+        model.load()
+        self.update(model)
+        return model.ready
+
+
+@pytest.mark.asyncio
+class TestWarmup:
+    async def test_warmup_inputs(self):
+        model = WarmupModel("DeclaredWarmupModel")
+        model.load()
+        model.warmup_inputs = [{"instances": [[1, 2]]}, {"instances": [[3, 4]]}]
+        model.warmup_iterations = 2
+        duration = await model.warmup()
+        assert duration is not None
+        assert model.calls == ["preprocess", "predict", "postprocess"] * 4
+        assert model.ready_during_warmup == [False] * 4
+        assert model.ready
+        assert warmup_metric(model.name) == duration
+        # The handlers get a copy of the warmup inputs.
+        assert model.warmup_inputs[0] == {"instances": [[1, 2]]}
+
+    async def test_synthesized_inputs(self):
+        model = WarmupModel("SynthesizedWarmupModel")
+        model.enable_warmup = True
+        requests = model.get_warmup_requests()
+        assert len(requests) == 1
+        features, text = requests[0].inputs
+        assert features.shape == [1, 4]
+        assert features.as_numpy().dtype == np.float32
+        assert text.shape == [1]
+        await model.warmup()
+        assert model.calls == ["preprocess", "predict", "postprocess"]
+
+    async def test_no_warmup_by_default(self):
+        model = WarmupModel("NoWarmupModel")
+        assert model.get_warmup_requests() == []
+        assert await model.warmup() is None
+        assert model.calls == []
+
+    async def test_failed_warmup(self):
+        model = FailingModel("FailingWarmupModel")
+        model.load()
+        model.warmup_inputs = [{"instances": [1]}]
+        assert await model.warmup() is not None
+        assert model.ready
+        # A failed warmup is not reported as a warmup duration.
+        assert warmup_metric(model.name) is None
+        assert warmup_failures(model.name) == 1
+
+    async def test_background_load_after_start(self, tmp_path):
+        (tmp_path / "BackgroundWarmupModel").mkdir()
+        repository = WarmupModelRepository(models_dir=str(tmp_path))
+        server = ModelServer(registered_models=repository, max_batch_size=4)
+        # The servers are started, the models loaded from now on are warmed up by the loader threads.
+        await server._warmup_models()
+        repository.load_models(wait=False)
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(None, repository.wait_for_models) == {
+            "BackgroundWarmupModel": True
+        }
+        model = repository.get_model("BackgroundWarmupModel")
+        assert model.calls == ["preprocess", "predict", "postprocess"]
+        assert model.published_during_warmup == [False]
+        assert model.max_batch_size == 4
+        assert model.ready
+
+    async def test_lazy_load(self):
+        repository = MemoryAwareModelRepository(models_dir="/nonexistent")
+        server = ModelServer(registered_models=repository, max_batch_size=4)
+        await server._warmup_models()
+
+        def create():
+            model = WarmupModel("LazyWarmupModel")
+            model.warmup_inputs = [{"instances": [1]}]
+            return model
+
+        repository.register("LazyWarmupModel", create)
+        model = await repository.get_or_load_model("LazyWarmupModel")
+        assert model.calls == ["preprocess", "predict", "postprocess"]
+        assert model.max_batch_size == 4
+        assert model.ready
+
+    async def test_models_loaded_before_start(self):
+        model = WarmupModel("EarlyWarmupModel")
+        model.warmup_inputs = [{"instances": [1]}]
+        model.load()
+        repository = ModelRepository()
+        repository.update(model)
+        # The model was loaded before the model server was created.
+        server = ModelServer(registered_models=repository, max_batch_size=4)
+        await server._warmup_models()
+        assert model.calls == ["preprocess", "predict", "postprocess"]
+        assert model.max_batch_size == 4
+
+    async def test_warmup_on_repository_load(self):
+        model = WarmupModel("RepositoryWarmupModel")
+        model.warmup_inputs = [{"instances": [1]}]
+        model_repository = ModelRepository()
+        model_repository.update(model)
+        model_repository.load = lambda name: model.load()
+        await ModelRepositoryExtension(model_repository).load(model.name)
+        assert model.calls == ["preprocess", "predict", "postprocess"]
+        assert model.ready
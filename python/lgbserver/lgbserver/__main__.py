@@ -48,7 +48,10 @@ if __name__ == "__main__":
             f"fail to load model {args.model_name} from dir {args.model_dir},"
             f"trying to load from model repository."
         )
-        model_repository = LightGBMModelRepository(args.model_dir, args.nthread)
+        # The models are served as soon as they are loaded, while the others are still loading.
+        model_repository = LightGBMModelRepository(
+            args.model_dir, args.nthread, load_in_background=True
+        )
         # LightGBM doesn't support multi-process, so the number of http server workers should be 1.
         server = kserve.ModelServer(workers=1, registered_models=model_repository)
         server.start([model] if model.ready else [])
@@ -20,10 +20,15 @@ from .model import LightGBMModel
 
 
 class LightGBMModelRepository(ModelRepository):
-    def __init__(self, model_dir: str = MODEL_MOUNT_DIRS, nthread: int = 1):
+    def __init__(
+        self,
+        model_dir: str = MODEL_MOUNT_DIRS,
+        nthread: int = 1,
+        load_in_background: bool = False,
+    ):
         super().__init__(model_dir)
         self.nthread = nthread
-        self.load_models()
+        self.load_models(wait=not load_in_background)
 
     async def load(self, name: str) -> bool:
         return self.load_model(name)
@@ -42,5 +42,7 @@ if __name__ == "__main__":
         )
 
         kserve.ModelServer(
-            registered_models=SKLearnModelRepository(args.model_dir)
+            registered_models=SKLearnModelRepository(
+                args.model_dir, load_in_background=True
+            )
         ).start([model] if model.ready else [])
@@ -19,9 +19,11 @@ from sklearnserver import SKLearnModel
 
 class SKLearnModelRepository(ModelRepository):
 
-    def __init__(self, model_dir: str = MODEL_MOUNT_DIRS):
+    def __init__(
+        self, model_dir: str = MODEL_MOUNT_DIRS, load_in_background: bool = False
+    ):
         super().__init__(model_dir)
-        self.load_models()
+        self.load_models(wait=not load_in_background)
 
     async def load(self, name: str) -> bool:
         return self.load_model(name)
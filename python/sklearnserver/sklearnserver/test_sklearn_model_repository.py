@@ -49,6 +49,16 @@ async def test_load_multiple():
         assert repo.is_model_ready(model)
 
 
+def test_load_in_background():
+    repo = SKLearnModelRepository(
+        _MODEL_DIR + "/multi/model_repository", load_in_background=True
+    )
+    assert repo.wait_for_models() == {"model1": True, "model2": True}
+    for model in ["model1", "model2"]:
+        assert repo.is_model_ready(model)
+    assert set(repo.load_times) == {"model1", "model2"}
+
+
 @pytest.mark.asyncio
 async def test_load_fail():
     with pytest.raises(FileNotFoundError):
@@ -49,5 +49,7 @@ if __name__ == "__main__":
         )
 
         kserve.ModelServer(
-            registered_models=XGBoostModelRepository(args.model_dir, args.nthread)
+            registered_models=XGBoostModelRepository(
+                args.model_dir, args.nthread, load_in_background=True
+            )
         ).start([model] if model.ready else [])
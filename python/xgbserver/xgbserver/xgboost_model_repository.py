@@ -18,10 +18,15 @@ from xgbserver import XGBoostModel
 
 
 class XGBoostModelRepository(ModelRepository):
-    def __init__(self, model_dir: str = MODEL_MOUNT_DIRS, nthread: int = 1):
+    def __init__(
+        self,
+        model_dir: str = MODEL_MOUNT_DIRS,
+        nthread: int = 1,
+        load_in_background: bool = False,
+    ):
         super().__init__(model_dir)
         self.nthread = nthread
-        self.load_models()
+        self.load_models(wait=not load_in_background)
 
     async def load(self, name: str) -> bool:
         return self.load_model(name)